@@ -13,25 +13,32 @@ Example Usage:
     app = create_app('development')
     app.run(host='0.0.0.0', port=5001)
 
+    # Production serving (preloaded assets, multiple workers)
+    gunicorn -c backend/gunicorn.conf.py backend.api.wsgi:app
+
     # Database operations
     with app.app_context():
-        from backend.api.extensions import db
+        from backend.api.extensions import db, recommendation_cache
         # Example: Query all songs
         songs = db.session.query(Song).all()
 """
+from typing import Optional
 from flask import Flask
 from flask_cors import CORS
 from backend.config import selected_config
-from backend.api.extensions import db
+from backend.api.extensions import db, metrics, recommendation_cache, request_logging
 
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_app():
+def create_app(config_overrides: Optional[dict] = None):
     """
     Application factory main entry point
+    Args:
+        config_overrides: Settings applied on top of the selected configuration
+                          (e.g., SQLALCHEMY_DATABASE_URI for a load-test database)
     Returns:
         Flask: Configured application instance
     """
@@ -39,6 +46,11 @@ def create_app():
 
     # Load dynamically selected configuration from config.py
     app.config.from_object(selected_config)
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    # Request ids; with LOG_QUEUE, logs are written by a background thread
+    request_logging.init_app(app)
     logger.info(f"Starting app with configuration: {selected_config.__name__}")
     logger.info(f"Debug mode: {app.debug}")
 
@@ -49,12 +61,28 @@ def create_app():
     # This binds the db instance to this specific Flask app configuration
     db.init_app(app)
 
+    # Configure the recommendation response cache
+    recommendation_cache.init_app(app)
+
+    # Request timing, SQL counting and the optional Server-Timing header
+    metrics.init_app(app)
+
+    # Configure FAISS search threads and request coalescing
+    from .services.song_service import RecommendationService
+    RecommendationService.init_app(app)
+
     # Register API routes (blueprints)
+    from .routes.admin import admin_bp
     from .routes.camelot_keys import camelot_keys_bp
+    from .routes.health import health_bp
+    from .routes.metrics import metrics_bp
     from .routes.songs import songs_bp
 
     app.register_blueprint(songs_bp, url_prefix="/api/songs")
     app.register_blueprint(camelot_keys_bp, url_prefix="/api/camelot_keys")
+    app.register_blueprint(health_bp, url_prefix="/api/health")
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
+    app.register_blueprint(metrics_bp)
 
     # Create database tables if they don't exist (development only)
     if app.config["ENV"] == "development":
@@ -1,8 +1,16 @@
+from datetime import datetime
 from typing import List, Optional
 from sqlalchemy.orm import Mapped
-from sqlalchemy import Integer, String, Float, ForeignKey, UniqueConstraint
+from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.dialects import sqlite
 from backend.api.extensions import db
 
+# Timestamps stored on SQLite as CURRENT_TIMESTAMP writes them, so bound values compare correctly as text
+UPDATED_AT_TYPE = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    'sqlite'
+)
+
 class Song(db.Model):
     '''Class to define the 'songs' table in the database.'''
     
@@ -32,6 +40,10 @@ class Song(db.Model):
     popularity: Mapped[int] = db.Column(Integer, nullable=False)
     genre: Mapped[Optional[str]] = db.Column(String(30), nullable=False)
     cluster: Mapped[Optional[int]] = db.Column(db.Integer, nullable=True)
+    # Set by the database on insert and by ORM updates; incremental index builds pick up rows changed since the last build.
+    # Raw SQL and COPY-based updates must set it themselves. Added to older databases by `manage_data migrate`
+    updated_at: Mapped[datetime] = db.Column(UPDATED_AT_TYPE, nullable=False, server_default=func.now(),
+                                             onupdate=func.now(), index=True)
     
     # Relationships
     camelot_key: Mapped["CamelotKey"] = db.relationship(back_populates="songs")
@@ -8,6 +8,9 @@ Purpose:
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from backend.api.services.cache_service import RecommendationCache
+from backend.api.services.logging_service import RequestLogging
+from backend.api.services.metrics_service import Metrics
 
 # Database instance (import this instead of SQLAlchemy directly)
 # Example usage in other files:
@@ -24,6 +27,21 @@ SQLALCHEMY_ENGINE_OPTIONS = {
 
 db = SQLAlchemy(engine_options=SQLALCHEMY_ENGINE_OPTIONS)
 
+# Recommendation response cache (configured from RECOMMENDATION_CACHE_* settings)
+#   from api.extensions import recommendation_cache
+#   recommendation_cache.get_or_compute(...)
+recommendation_cache = RecommendationCache()
+
+# Request/stage timers and SQL statement counts, served on /metrics
+#   from api.extensions import metrics
+#   with metrics.timed('search'): ...
+metrics = Metrics()
+
+# Request ids and queue-based, sampled logging (configured from LOG_* settings)
+#   from api.extensions import request_logging
+#   request_logging.start()  # restart the listener in a forked worker
+request_logging = RequestLogging()
+
 # -------------------------------
 # Example future extension pattern:
 # from flask_extension import ClassName
@@ -31,5 +49,4 @@ db = SQLAlchemy(engine_options=SQLALCHEMY_ENGINE_OPTIONS)
 # -------------------------------
 # Example potential future extensions:
 #   - Flask login manager for authentication
-#   - Flash caching
 #   - Flask admin
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Admin API Routes
+
+Operational endpoints for hot-reloading recommendation assets after
+`manage_data.py index` or `update`, without restarting the server.
+
+Every request must send the configured ADMIN_TOKEN in the X-Admin-Token
+header (401 without it, 403 with a wrong one); the endpoints are disabled
+(403) when no token is configured. With several worker processes a request
+only reaches one of them, so production setups should also enable
+ASSET_WATCH_INTERVAL.
+"""
+
+import hmac
+import logging
+import threading
+from datetime import datetime, timezone
+
+from flask import Blueprint, current_app, jsonify, request
+
+from backend.api.routes.songs import _parse_bool
+from backend.api.services.song_service import RecommendationService
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Create a blueprint for the admin API
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.before_request
+def require_admin_token():
+    """Reject requests without the configured admin token"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Admin endpoints are disabled (ADMIN_TOKEN is not set)'}), 403
+    sent = request.headers.get('X-Admin-Token')
+    if not sent:
+        return jsonify({'error': 'Missing X-Admin-Token header'}), 401
+    if not hmac.compare_digest(sent, token):
+        return jsonify({'error': 'Invalid admin token'}), 403
+
+
+def _assets_status() -> dict:
+    """Generation in service and the one on disk"""
+    status = {'on_disk': RecommendationService._assets_version_on_disk()}
+    if RecommendationService.is_ready():
+        assets = RecommendationService.get_assets()
+        status.update({
+            'generation': assets.generation,
+            'songs': len(assets.song_ids),
+            'loaded_at': datetime.fromtimestamp(assets.loaded_at, timezone.utc).isoformat(),
+        })
+    else:
+        status['generation'] = None
+    return status
+
+
+@admin_bp.route('/assets', methods=['GET'])
+def get_assets_status():
+    """Report the asset generation in service and the one on disk"""
+    return jsonify(_assets_status())
+
+
+@admin_bp.route('/assets/reload', methods=['POST'])
+def reload_assets():
+    """
+    Load the assets on disk as a new generation and swap it in
+
+    Query Parameters:
+        force (bool): Reload even if the generation on disk is already in service
+        wait (bool): Reload before responding instead of in the background
+    """
+    force = request.args.get('force', default=False, type=_parse_bool)
+    wait = request.args.get('wait', default=False, type=_parse_bool)
+
+    if wait:
+        try:
+            reloaded = RecommendationService.reload_assets(force=force)
+        except Exception as e:
+            logger.error(f"Failed to reload recommendation assets: {e}")
+            return jsonify({'error': 'Failed to reload recommendation assets', 'details': str(e)}), 500
+        return jsonify({'status': 'reloaded' if reloaded else 'unchanged', **_assets_status()})
+
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                RecommendationService.reload_assets(force=force)
+            except Exception as e:
+                logger.error(f"Failed to reload recommendation assets: {e}")
+
+    threading.Thread(target=run, name='asset-reload', daemon=True).start()
+    return jsonify({'status': 'reloading', **_assets_status()}), 202
@@ -0,0 +1,27 @@
+"""
+Health API Routes
+
+Liveness and readiness probes for process managers, load balancers and
+container orchestration.
+"""
+
+from flask import Blueprint, jsonify
+
+from backend.api.services.song_service import RecommendationService
+
+# Create a blueprint for the health checks
+health_bp = Blueprint('health', __name__)
+
+
+@health_bp.route('/live', methods=['GET'])
+def live():
+    """The process is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@health_bp.route('/ready', methods=['GET'])
+def ready():
+    """Recommendation assets are loaded, so requests won't pay the cold-start cost"""
+    if not RecommendationService.is_ready():
+        return jsonify({'status': 'loading'}), 503
+    assets = RecommendationService.get_assets()
+    return jsonify({'status': 'ok', 'songs': len(assets.song_ids), 'generation': assets.generation})
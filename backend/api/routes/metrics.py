@@ -0,0 +1,34 @@
+"""
+Metrics API Route
+
+Exposes request, pipeline stage and SQL metrics in the Prometheus text
+format (see services/metrics_service.py).
+"""
+
+from flask import Blueprint, Response
+
+from backend.api.extensions import metrics, recommendation_cache, request_logging
+from backend.api.services.song_service import RecommendationService
+
+# Create a blueprint for the metrics endpoint
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    cache = recommendation_cache.stats()
+    lines = [
+        "# HELP djsm_recommendation_cache_requests_total Recommendation cache lookups",
+        "# TYPE djsm_recommendation_cache_requests_total counter",
+        f'djsm_recommendation_cache_requests_total{{result="hit"}} {cache["hits"]}',
+        f'djsm_recommendation_cache_requests_total{{result="miss"}} {cache["misses"]}',
+        "# HELP djsm_recommendation_assets_ready Whether recommendation assets are loaded",
+        "# TYPE djsm_recommendation_assets_ready gauge",
+        f"djsm_recommendation_assets_ready {int(RecommendationService.is_ready())}",
+        "# HELP djsm_log_records_dropped_total Log records dropped because the log queue was full",
+        "# TYPE djsm_log_records_dropped_total counter",
+        f"djsm_log_records_dropped_total {request_logging.dropped}",
+    ]
+    body = metrics.render() + '\n'.join(lines) + '\n'
+    return Response(body, mimetype='text/plain; version=0.0.4')
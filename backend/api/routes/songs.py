@@ -4,11 +4,16 @@ Song API Routes
 Provides endpoints for song retrieval and recommendations.
 """
 
+import json
 import logging
-from flask import Blueprint, jsonify, request
+import math
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from sqlalchemy.exc import SQLAlchemyError
 
+from backend.api.extensions import metrics, recommendation_cache
+from backend.api.services.cache_service import MISS
 from backend.api.services.song_service import SongService, RecommendationService
+from backend.constants import AUDIO_FEATURES
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -17,13 +22,97 @@ logger = logging.getLogger(__name__)
 songs_bp = Blueprint('songs', __name__)
 
 
+def _parse_bool(value) -> bool:
+    """Parse a boolean query parameter or JSON value ('true', '1', 'yes' or true)"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Most recommendations returned for one seed
+MAX_RECOMMENDATIONS = 500
+
+
+def _validate_search_params(params: dict) -> None:
+    """
+    Reject recommendation parameters the search can't honour
+    Args:
+        params: get_similar_songs keyword arguments
+    Raises:
+        ValueError: On a limit outside 1..MAX_RECOMMENDATIONS, or a
+                    non-finite or negative tolerance, weight or feature value
+    """
+    limit = params.get('limit')
+    if limit is None or not 1 <= limit <= MAX_RECOMMENDATIONS:
+        raise ValueError(f"'limit' must be between 1 and {MAX_RECOMMENDATIONS}")
+    tempo_tolerance = params.get('tempo_tolerance')
+    if tempo_tolerance is None or not math.isfinite(tempo_tolerance) or tempo_tolerance < 0:
+        raise ValueError("'tempo_tolerance' must be a finite, non-negative number")
+    for feature, weight in (params.get('weights') or {}).items():
+        if not math.isfinite(weight) or weight < 0:
+            raise ValueError(f"Weight of '{feature}' must be a finite, non-negative number")
+    for feature in AUDIO_FEATURES:
+        value = params.get(feature)
+        if value is not None and not math.isfinite(value):
+            raise ValueError(f"'{feature}' must be a finite number")
+
+
+def _int_arg(name: str, default=None):
+    """
+    Read an integer query parameter
+    Raises:
+        ValueError: If the parameter is present but not an integer
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer") from None
+
 @songs_bp.route('/', methods=['GET'])
 def get_all_songs():
-    """Get all songs (for debugging/admin purposes)"""
+    """
+    Get all songs (for debugging/admin purposes)
+
+    Query parameters:
+        limit: Page size, at least 1 (default 100; in NDJSON mode the default is no limit)
+        after: Keyset cursor, return songs with song_id greater than this
+        format: 'json' (default) for a JSON list, or 'ndjson' to stream one
+                song per line in constant memory
+
+    JSON responses carry an X-Next-Cursor header when more songs may follow.
+    A malformed cursor or limit is a 400. NDJSON responses start before the
+    songs are read, so a database error ends the stream with an
+    {"error": ...} line instead of a 500.
+    """
+    output_format = request.args.get("format", default="json")
     try:
-        limit = request.args.get("limit", default=100, type=int)
-        songs = SongService.get_songs(limit=limit)
-        return jsonify([SongService.serialize_song(song) for song in songs])
+        after = _int_arg("after")
+        limit = _int_arg("limit", default=None if output_format == "ndjson" else 100)
+        if limit is not None and limit < 1:
+            raise ValueError("'limit' must be at least 1")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if output_format == "ndjson":
+        def generate():
+            try:
+                for song in SongService.iter_songs(after=after, limit=limit):
+                    yield json.dumps(SongService.serialize_song(song)) + "\n"
+            except SQLAlchemyError as e:
+                logger.error(f"Database error streaming songs: {e}")
+                yield json.dumps({'error': 'Database error'}) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    try:
+        songs = SongService.get_songs(limit=limit, after=after)
+        response = jsonify([SongService.serialize_song(song) for song in songs])
+        if len(songs) == limit:
+            response.headers["X-Next-Cursor"] = str(songs[-1].song_id)
+        return response
     except SQLAlchemyError as e:
         logger.error(f"Database error retrieving songs: {e}")
         return jsonify({'error': 'Database error'}), 500
@@ -32,7 +121,7 @@ def get_all_songs():
 def get_song(song_id: int):
     """Get a specific song by ID"""
     try:
-        song = SongService.get_song(song_id)
+        song = SongService.get_song_row(song_id)
         if not song:
             return jsonify({'error': 'Song not found'}), 404
         
@@ -43,60 +132,194 @@ def get_song(song_id: int):
 
 @songs_bp.route('/<int:song_id>/recommendations', methods=['GET'])
 def get_song_recommendations(song_id: int):
-    """Get DJ-optimized song recommendations"""
+    """
+    Get DJ-optimized song recommendations
+
+    Query parameters:
+        <feature>: Override an audio feature of the seed (any of AUDIO_FEATURES)
+        <feature>_weight: Weight of an audio feature in the distance (default 1.0)
+        tempo_tolerance, start_year, end_year, limit, extended_mixing: Filters
+
+    While the response cache is enabled, float parameters (overrides,
+    weights, tempo_tolerance) are rounded to RECOMMENDATION_CACHE_QUANTUM
+    (default 0.01) and the recommendations are computed for the rounded
+    values, e.g., energy=0.016 is answered as energy=0.02.
+    """
     # Get parameters
-    danceability = request.args.get("danceability", type=float)
-    energy = request.args.get("energy", type=float)
-    loudness = request.args.get("loudness", type=float)
-    tempo_tolerance = request.args.get("tempo_tolerance", default=4.0, type=float)
-    start_year = request.args.get("start_year", default=0, type=int)
-    end_year = request.args.get("end_year", default=3000, type=int)
-    limit = request.args.get("limit", default=50, type=int)
+    weights = {feature: request.args.get(f"{feature}_weight", type=float) for feature in AUDIO_FEATURES}
+    weights = {feature: weight for feature, weight in weights.items() if weight is not None}
+    params = {
+        'tempo_tolerance': request.args.get("tempo_tolerance", default=4.0, type=float),
+        'start_year': request.args.get("start_year", default=0, type=int),
+        'end_year': request.args.get("end_year", default=3000, type=int),
+        'limit': request.args.get("limit", default=50, type=int),
+        'extended_mixing': request.args.get("extended_mixing", default=False, type=_parse_bool),
+        'weights': weights or None,
+        **{feature: request.args.get(feature, type=float) for feature in AUDIO_FEATURES},
+    }
+    try:
+        _validate_search_params(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
-        base_song = SongService.get_song(song_id)
-        if not base_song:
-            return jsonify({'error': 'Base song not found'}), 404
-        
         # Check that FAISS index exists
         try:
-            RecommendationService._load_assets()
+            with metrics.timed('assets'):
+                RecommendationService._load_assets()
         except Exception as e:
             logger.error(f"Failed to load FAISS index: {e}")
             return jsonify({'error': 'Failed to load recommendation engine', 'details': str(e)}), 500
+
+        # Only fall back to the database for songs the catalog doesn't know
+        with metrics.timed('lookup'):
+            catalog = RecommendationService.get_catalog()
+            found = catalog.row_of(song_id) is not None or SongService.get_song_row(song_id)
+        if not found:
+            return jsonify({'error': 'Base song not found'}), 404
         
-        
-        # Get recommendations
-        recommendations = RecommendationService.get_similar_songs(
+        # Get recommendations (cached per catalog version and normalized parameters)
+        recommendations = recommendation_cache.get_or_compute(
+            RecommendationService.get_similar_songs,
+            version=catalog.version,
             base_song_id=song_id,
-            tempo_tolerance=tempo_tolerance,
-            start_year=start_year,
-            end_year=end_year,
-            danceability=danceability,
-            energy=energy,
-            loudness=loudness,
-            limit=limit
+            **params
         )
 
-
-
-        logger.info(f"Found {len(recommendations)} recommendations for song {song_id}")
-        for i, rec in enumerate(recommendations[:3]):  # Print first 3
-            song = rec['song']  # Access the song object inside the recommendation
-            logger.info(f"Rec {i+1}: {song_id} {song.title} by {song.artist}")
+        logger.debug(f"Found {len(recommendations)} recommendations for song {song_id}")
 
         # Format the response
-        serialized = []
-        for rec in recommendations:
-            song_data = SongService.serialize_song(rec['song'])
-            song_data['similarity'] = rec['similarity']
-            song_data['compatibilityType'] = rec['compatibility_type']
-            serialized.append(song_data)
-
-        return jsonify(serialized)
+        with metrics.timed('serialize'):
+            serialized = []
+            for rec in recommendations:
+                song_data = dict(rec['song'])
+                song_data['similarity'] = rec['similarity']
+                song_data['compatibilityType'] = rec['compatibility_type']
+                serialized.append(song_data)
+
+            return jsonify(serialized)
     except ValueError as e:
         logger.error(f"Value error in recommendations: {str(e)}")
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.exception(f"Error getting recommendations for song {song_id}")
-        return jsonify({'error': 'Server error', 'details': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': 'Server error', 'details': str(e)}), 500
+
+def _parse_weights(value) -> dict:
+    """Parse a {feature: weight} object from a JSON body"""
+    if not isinstance(value, dict):
+        raise ValueError("'weights' must be an object mapping audio features to numbers")
+    return {str(feature): float(weight) for feature, weight in value.items()}
+
+# Per-seed options accepted by the batch endpoint, with their types
+BATCH_SEED_OPTIONS = {
+    **{feature: float for feature in AUDIO_FEATURES},
+    'weights': _parse_weights,
+    'tempo_tolerance': float,
+    'start_year': int,
+    'end_year': int,
+    'limit': int,
+    'extended_mixing': _parse_bool,
+}
+BATCH_DEFAULTS = {'tempo_tolerance': 4.0, 'start_year': 0, 'end_year': 3000, 'limit': 50, 'extended_mixing': False}
+MAX_BATCH_SEEDS = 100
+
+def _parse_batch_seed(seed, defaults: dict) -> dict:
+    """Merge one seed entry (a song ID or an object with overrides) onto the defaults"""
+    # bool is a subclass of int, but true/false are not song IDs
+    if isinstance(seed, int) and not isinstance(seed, bool):
+        seed = {'song_id': seed}
+    song_id = seed.get('song_id') if isinstance(seed, dict) else None
+    if not isinstance(song_id, int) or isinstance(song_id, bool):
+        raise ValueError("Each seed must be a song ID or an object with an integer 'song_id'")
+
+    params = dict(defaults)
+    for name, cast in BATCH_SEED_OPTIONS.items():
+        if seed.get(name) is not None:
+            params[name] = cast(seed[name])
+    _validate_search_params(params)
+    params['base_song_id'] = song_id
+    return params
+
+@songs_bp.route('/recommendations/batch', methods=['POST'])
+def get_batch_recommendations():
+    """
+    Get DJ-optimized recommendations for several seed songs at once
+
+    Request body:
+        {
+            "seeds": [5, {"song_id": 12, "energy": 0.8, "weights": {"energy": 2.0}, "limit": 20}],
+            "defaults": {"tempo_tolerance": 4.0, "start_year": 0, "end_year": 3000, "limit": 50}
+        }
+    Response:
+        {"results": {"5": [...], "12": [...]}, "errors": {"<song_id>": "<message>"}}
+
+    Float parameters are rounded for the response cache as in
+    get_song_recommendations, and seeds share its cache entries.
+    """
+    body = request.get_json(silent=True) or {}
+    seeds = body.get('seeds')
+    if not isinstance(seeds, list) or not seeds:
+        return jsonify({'error': "Request body must contain a non-empty 'seeds' list"}), 400
+    if len(seeds) > MAX_BATCH_SEEDS:
+        return jsonify({'error': f"At most {MAX_BATCH_SEEDS} seeds per request"}), 400
+
+    try:
+        defaults = dict(BATCH_DEFAULTS)
+        for name, value in (body.get('defaults') or {}).items():
+            if name in BATCH_SEED_OPTIONS and value is not None:
+                defaults[name] = BATCH_SEED_OPTIONS[name](value)
+        params = [_parse_batch_seed(seed, defaults) for seed in seeds]
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    seed_ids = [p['base_song_id'] for p in params]
+    if len(set(seed_ids)) != len(seed_ids):
+        return jsonify({'error': 'Duplicate seed song IDs'}), 400
+
+    try:
+        try:
+            RecommendationService._load_assets()
+        except Exception as e:
+            logger.error(f"Failed to load FAISS index: {e}")
+            return jsonify({'error': 'Failed to load recommendation engine', 'details': str(e)}), 500
+
+        # Serve cached seeds directly; compute the rest in one batch
+        version = RecommendationService.get_catalog().version
+        results, pending = {}, {}
+        for seed_params in params:
+            if not recommendation_cache.enabled:
+                pending[None, seed_params['base_song_id']] = seed_params
+                continue
+            seed_params = recommendation_cache.normalize(seed_params)
+            key = recommendation_cache.make_key(version, seed_params)
+            cached = recommendation_cache.get(key)
+            if cached is MISS:
+                pending[key, seed_params['base_song_id']] = seed_params
+            else:
+                results[seed_params['base_song_id']] = cached
+
+        errors = {}
+        if pending:
+            computed, errors = RecommendationService.get_similar_songs_batch(list(pending.values()))
+            for key, seed_id in pending:
+                if seed_id in computed:
+                    results[seed_id] = computed[seed_id]
+                    if key is not None:
+                        recommendation_cache.set(key, computed[seed_id])
+        logger.debug(f"Served batch recommendations for {len(results)} seeds ({len(errors)} failed)")
+
+        serialized = {}
+        for seed_id, recommendations in results.items():
+            serialized[str(seed_id)] = [
+                dict(rec['song'], similarity=rec['similarity'], compatibilityType=rec['compatibility_type'])
+                for rec in recommendations
+            ]
+
+        return jsonify({
+            'results': serialized,
+            'errors': {str(seed_id): message for seed_id, message in errors.items()}
+        })
+    except Exception as e:
+        logger.exception("Error getting batch recommendations")
+        return jsonify({'error': 'Server error', 'details': str(e)}), 500
@@ -0,0 +1,294 @@
+"""
+Recommendation Asset Bundle
+
+Versioned, checksummed, pickle-free storage for everything the
+recommendation service loads: the FAISS index, the id mapping, feature
+statistics, normalized vectors and the song catalog columns.
+
+Layout:
+    assets/bundles/
+        CURRENT                 Name of the active generation (swapped atomically)
+        <version>/
+            manifest.json       Format, version, index type and file checksums
+            index.faiss         FAISS index, read with mmap flags
+            <name>.npy          One NumPy array per column (loaded with mmap_mode='r')
+            <name>.data.npy     UTF-8 bytes of a string column
+            <name>.offsets.npy  Start offset of each string (plus the end)
+
+Every worker maps the same files, so the arrays and the index share the
+page cache instead of being unpickled into private copies.
+
+Usage Example:
+    # Writing (see scripts/operations/index.py)
+    bundle = AssetBundle.write(arrays, strings, index)
+
+    # Reading
+    bundle = AssetBundle.current()
+    song_ids = bundle.array('song_ids')
+    index = bundle.read_index()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import faiss
+import numpy as np
+
+from backend.constants import BUNDLES_DIR
+
+logger = logging.getLogger(__name__)
+
+# Increment when the on-disk layout changes incompatibly
+BUNDLE_FORMAT = 1
+
+# Generations kept on disk after publishing a new one (the active one included)
+KEEP_GENERATIONS = 3
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+CURRENT_FILE = "CURRENT"
+
+
+class BundleError(Exception):
+    """Raised when a bundle is missing, incompatible or fails its checksums"""
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StringColumn:
+    """Read-only column of strings stored as UTF-8 bytes plus offsets"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @staticmethod
+    def encode(values: Sequence[Optional[str]]):
+        """
+        Encode strings for storage (None is stored as an empty string)
+        Returns:
+            (data, offsets) arrays; string i is data[offsets[i]:offsets[i + 1]]
+        """
+        encoded = [(value or '').encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return data, offsets
+
+    def __getitem__(self, row: int) -> str:
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return self.data[start:end].tobytes().decode('utf-8')
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        # One copy of the bytes and plain slicing, instead of a memmap view per string
+        data = self.data.tobytes()
+        offsets = np.asarray(self.offsets).tolist()
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            yield data[start:end].decode('utf-8')
+
+
+class AssetBundle:
+    """One generation of recommendation assets on disk"""
+
+    def __init__(self, directory: Path, manifest: Dict[str, Any]):
+        self.directory = Path(directory)
+        self.manifest = manifest
+
+    @property
+    def version(self) -> str:
+        return self.manifest['version']
+
+    @classmethod
+    def current_version(cls, root: Path = BUNDLES_DIR) -> Optional[str]:
+        """
+        Read the active generation name without opening the bundle
+        Returns:
+            Version string, or None if no bundle has been published
+        """
+        try:
+            return (Path(root) / CURRENT_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def current(cls, root: Path = BUNDLES_DIR, verify: bool = True) -> Optional['AssetBundle']:
+        """
+        Open the active generation
+        Args:
+            root: Directory holding the generations
+            verify: Check every file against its manifest checksum
+        Returns:
+            AssetBundle, or None if no bundle has been published
+        """
+        version = cls.current_version(root)
+        if version is None:
+            return None
+        return cls.open(Path(root) / version, verify=verify)
+
+    @classmethod
+    def open(cls, directory: Path, verify: bool = True) -> 'AssetBundle':
+        """
+        Open a bundle directory
+        Args:
+            directory: Generation directory containing manifest.json
+            verify: Check every file against its manifest checksum
+        Returns:
+            AssetBundle
+        """
+        directory = Path(directory)
+        try:
+            with open(directory / MANIFEST_FILE, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise BundleError(f"Cannot read bundle manifest in {directory}: {e}")
+
+        if manifest.get('format') != BUNDLE_FORMAT:
+            raise BundleError(f"Unsupported bundle format {manifest.get('format')} in {directory}")
+
+        bundle = cls(directory, manifest)
+        if verify:
+            bundle.verify()
+        return bundle
+
+    def verify(self) -> None:
+        """Check every file of the bundle against its manifest checksum"""
+        for name, info in self.manifest['files'].items():
+            path = self.directory / name
+            if not path.exists():
+                raise BundleError(f"Bundle {self.version} is missing {name}")
+            if _sha256(path) != info['sha256']:
+                raise BundleError(f"Checksum mismatch for {name} in bundle {self.version}")
+
+    def array(self, name: str) -> np.ndarray:
+        """Memory-map a stored array (read-only)"""
+        return np.load(self.directory / f"{name}.npy", mmap_mode='r', allow_pickle=False)
+
+    def has_array(self, name: str) -> bool:
+        return f"{name}.npy" in self.manifest['files']
+
+    def strings(self, name: str) -> StringColumn:
+        """Memory-map a stored string column"""
+        return StringColumn(self.array(f"{name}.data"), self.array(f"{name}.offsets"))
+
+    def read_index(self, writable: bool = False) -> faiss.Index:
+        """
+        Read the FAISS index with memory mapping.
+        IVF indexes map their inverted lists (IO_FLAG_MMAP); flat-code indexes
+        (Flat, HNSW storage) map their codes zero-copy (IO_FLAG_MMAP_IFC).
+        Args:
+            writable: Load a private in-memory copy instead (e.g., to update it)
+        """
+        if writable:
+            return faiss.read_index(str(self.directory / INDEX_FILE))
+        if 'IVF' in self.manifest.get('index_type', ''):
+            flags = faiss.IO_FLAG_MMAP
+        else:
+            flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP)
+        return faiss.read_index(str(self.directory / INDEX_FILE), flags | faiss.IO_FLAG_READ_ONLY)
+
+    @classmethod
+    def write(cls, arrays: Dict[str, np.ndarray], strings: Dict[str, Sequence[Optional[str]]],
+              index: faiss.Index, metadata: Optional[Dict[str, Any]] = None,
+              root: Path = BUNDLES_DIR) -> 'AssetBundle':
+        """
+        Write a new generation and make it the active one.
+        Files are written to a temporary directory, checksummed, renamed to
+        their version, and only then is CURRENT swapped, so readers never see
+        a partial bundle.
+        Args:
+            arrays: Name -> array to store as <name>.npy
+            strings: Name -> sequence of strings to store as a StringColumn
+            index: FAISS index
+            metadata: Extra manifest entries (e.g., search parameters)
+            root: Directory holding the generations
+        Returns:
+            The published AssetBundle
+        """
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        staging = root / f".staging-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+
+        faiss.write_index(index, str(staging / INDEX_FILE))
+        for name, values in arrays.items():
+            np.save(staging / f"{name}.npy", np.ascontiguousarray(values), allow_pickle=False)
+        for name, values in strings.items():
+            data, offsets = StringColumn.encode(values)
+            np.save(staging / f"{name}.data.npy", data, allow_pickle=False)
+            np.save(staging / f"{name}.offsets.npy", offsets, allow_pickle=False)
+
+        files = {
+            path.name: {'sha256': _sha256(path), 'bytes': path.stat().st_size}
+            for path in sorted(staging.iterdir())
+        }
+        created_at = datetime.now(timezone.utc)
+        content_hash = hashlib.sha1(
+            ''.join(info['sha256'] for info in files.values()).encode()
+        ).hexdigest()[:12]
+        version = f"{created_at.strftime('%Y%m%dT%H%M%S')}-{content_hash}"
+
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'version': version,
+            'created_at': created_at.isoformat(),
+            'index_type': type(faiss.downcast_index(index)).__name__,
+            'count': int(index.ntotal),
+            'dimension': int(index.d),
+            'files': files,
+            **(metadata or {}),
+        }
+        with open(staging / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        directory = root / version
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+
+        # Atomically point CURRENT at the new generation
+        pointer = root / f".{CURRENT_FILE}.tmp"
+        pointer.write_text(version)
+        os.replace(pointer, root / CURRENT_FILE)
+        logger.info(f"Published asset bundle {version} to {directory}")
+
+        cls._prune(root, keep=KEEP_GENERATIONS)
+        return cls(directory, manifest)
+
+    @classmethod
+    def _prune(cls, root: Path, keep: int) -> None:
+        """
+        Delete the oldest generations, keeping the newest `keep` and always the active one.
+        Age is the manifest's modification time: versions only have one-second
+        resolution, and generations published within a second sort by hash.
+        """
+        def written_at(path: Path) -> int:
+            try:
+                return (path / MANIFEST_FILE).stat().st_mtime_ns
+            except OSError:
+                return 0  # Incomplete generation
+
+        current = cls.current_version(root)
+        generations = sorted(
+            (path for path in root.iterdir() if path.is_dir() and not path.name.startswith('.')),
+            key=written_at
+        )
+        for path in generations[:-keep]:
+            if path.name == current:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Removed old asset bundle {path.name}")
@@ -0,0 +1,73 @@
+"""
+Recommendation Asset Watcher
+
+Background thread that polls the asset generation on disk (the active
+bundle's CURRENT pointer, or the legacy id mapping) and hot-swaps it into
+RecommendationService when it changes, so `manage_data.py index` takes
+effect without restarting the server.
+
+Each worker process runs its own watcher (threads don't survive fork;
+see post_fork in gunicorn.conf.py). Loading happens on the watcher thread
+while requests keep using the current generation.
+
+Usage Example:
+    watcher = AssetWatcher(app, interval=30)
+    watcher.start()
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from backend.api.services.song_service import RecommendationService
+
+logger = logging.getLogger(__name__)
+
+
+class AssetWatcher:
+    """Polls for new recommendation asset generations and reloads them"""
+
+    def __init__(self, app, interval: float):
+        """
+        Args:
+            app: Flask application (reloads need its app context for the database)
+            interval: Seconds between checks
+        """
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """
+        Reload the assets if a new generation is on disk.
+        Failures are logged and the current generation stays in service.
+        Returns:
+            True if a new generation was swapped in
+        """
+        try:
+            with self.app.app_context():
+                return RecommendationService.reload_assets()
+        except Exception as e:
+            logger.error(f"Failed to reload recommendation assets: {e}")
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        """Start polling on a daemon thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='asset-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Watching recommendation assets every {self.interval}s")
+
+    def stop(self) -> None:
+        """Stop polling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
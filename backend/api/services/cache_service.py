@@ -0,0 +1,322 @@
+"""
+Recommendation Response Cache
+
+LRU + TTL cache in front of RecommendationService.get_similar_songs, so
+identical queries (same seed, slider values, year window and limit) are
+not recomputed every time the UI refetches.
+
+Features:
+- Keys built from normalized parameters: float overrides are quantized
+  (default 0.01, the frontend slider step), so near-identical slider
+  positions share an entry and are answered with the quantized values
+- Keys include the index/catalog version, so a reload invalidates them
+- Optional shared backend (a directory of JSON files) for sharing entries
+  across worker processes; point it at /dev/shm for a shared memory store.
+  Its size is capped (oldest entries pruned first) and entries of previous
+  catalog versions are deleted on reload
+- Hit/miss counters
+
+Usage Example:
+    from backend.api.extensions import recommendation_cache
+    recommendations = recommendation_cache.get_or_compute(
+        RecommendationService.get_similar_songs,
+        version=catalog.version,
+        base_song_id=5, energy=0.8, limit=50
+    )
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned by backends on a miss (None can be a cached value)
+MISS = object()
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FileCacheBackend:
+    """
+    Cache shared between processes through a directory of JSON files.
+    Entries expire by file modification time; writes are atomic renames,
+    so concurrent workers never read a partial entry.
+
+    Every PRUNE_INTERVAL writes, expired files are deleted and, above
+    max_entries, the oldest by modification time.
+    """
+
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, directory: str, ttl: float, max_entries: int = 10000):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Any:
+        path = self._path(key)
+        try:
+            if path.stat().st_mtime + self.ttl < time.time():
+                path.unlink(missing_ok=True)
+                return MISS
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return MISS
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to write shared cache entry: {e}")
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_INTERVAL == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete expired entries, then the oldest ones above max_entries
+        Returns:
+            Number of files deleted
+        """
+        entries = []
+        for path in self.directory.glob('*.json'):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue  # Deleted by another worker
+        entries.sort()
+
+        expired_before = time.time() - self.ttl
+        excess = len(entries) - self.max_entries
+        removed = 0
+        for mtime, path in entries:
+            if mtime >= expired_before and removed >= excess:
+                break
+            path.unlink(missing_ok=True)
+            removed += 1
+        if removed:
+            logger.debug(f"Pruned {removed} shared cache entries from {self.directory}")
+        return removed
+
+    def discard_except(self, prefix: str) -> int:
+        """
+        Delete every entry whose key doesn't start with prefix
+        Returns:
+            Number of files deleted
+        """
+        removed = 0
+        for path in self.directory.glob('*.json'):
+            if not path.name.startswith(prefix):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for path in self.directory.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+
+class RecommendationCache:
+    """LRU + TTL cache for recommendation results, keyed on normalized query parameters"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0, quantum: float = 0.01,
+                 shared_backend: Optional[FileCacheBackend] = None):
+        """
+        Args:
+            max_entries: Entries kept in the in-process LRU (0 disables caching)
+            ttl: Seconds an entry stays valid
+            quantum: Step float parameters are rounded to before keying
+            shared_backend: Optional cross-process backend consulted on local misses
+        """
+        self.quantum = quantum
+        self.local = MemoryCacheBackend(max_entries, ttl)
+        self.shared = shared_backend
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Configure the cache from the Flask app config (RECOMMENDATION_CACHE_*)"""
+        ttl = float(app.config.get('RECOMMENDATION_CACHE_TTL', 300))
+        self.quantum = float(app.config.get('RECOMMENDATION_CACHE_QUANTUM', 0.01))
+        self.local = MemoryCacheBackend(int(app.config.get('RECOMMENDATION_CACHE_SIZE', 1024)), ttl)
+        self.shared = None
+        if app.config.get('RECOMMENDATION_CACHE_BACKEND', 'memory') == 'file':
+            self.shared = FileCacheBackend(
+                app.config['RECOMMENDATION_CACHE_DIR'], ttl,
+                max_entries=int(app.config.get('RECOMMENDATION_CACHE_FILE_SIZE', 10000))
+            )
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.local.max_entries > 0
+
+    def normalize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Quantize float parameters so near-identical queries share a key
+        Args:
+            params: get_similar_songs keyword arguments
+        Returns:
+            Copy of params with floats (also inside dicts, e.g., weights)
+            rounded to the cache quantum and unset (None) overrides dropped
+        Raises:
+            ValueError: On a NaN or infinite float
+        """
+        normalized = {}
+        for name, value in params.items():
+            if value is None:
+                continue
+            if isinstance(value, dict):
+                # Nested parameters (feature weights) get stable key order
+                value = self.normalize(dict(sorted(value.items())))
+            elif isinstance(value, float):
+                if not math.isfinite(value):
+                    raise ValueError(f"'{name}' must be a finite number")
+                if self.quantum > 0:
+                    value = round(round(value / self.quantum) * self.quantum, 10)
+            normalized[name] = value
+        return normalized
+
+    def make_key(self, version: str, params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for normalized parameters
+        Args:
+            version: Index/catalog version the results were computed against
+            params: Normalized get_similar_songs keyword arguments
+        Returns:
+            Hex digest identifying the query
+        """
+        payload = json.dumps([version, sorted(params.items())], default=str)
+        return f"{self._version_tag(version)}-{hashlib.sha1(payload.encode()).hexdigest()}"
+
+    @staticmethod
+    def _version_tag(version: str) -> str:
+        """Short key prefix identifying a catalog version"""
+        return hashlib.sha1(str(version).encode()).hexdigest()[:12]
+
+    def retain_version(self, version: str) -> None:
+        """
+        Delete shared entries computed against any other catalog version
+        (call after swapping in new assets; local entries just age out)
+        Args:
+            version: Catalog version now in service
+        """
+        if self.shared is not None:
+            removed = self.shared.discard_except(f"{self._version_tag(version)}-")
+            if removed:
+                logger.info(f"Dropped {removed} shared cache entries of previous catalog versions")
+
+    def get(self, key: str) -> Any:
+        """
+        Look up a key locally, then in the shared backend
+        Returns:
+            Cached value, or MISS
+        """
+        value = self.local.get(key)
+        if value is MISS and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not MISS:
+                self.local.set(key, value)
+        with self._stats_lock:
+            if value is MISS:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value locally and in the shared backend"""
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def get_or_compute(self, compute: Callable[..., Any], version: str, **params) -> Any:
+        """
+        Return the cached result for these parameters, computing it on a miss.
+        On a miss, compute is called with the normalized parameters so the
+        cached value matches its key.
+        Args:
+            compute: Function producing the result (e.g., get_similar_songs)
+            version: Index/catalog version
+            **params: Keyword arguments for compute
+        Returns:
+            Cached or freshly computed result
+        """
+        if not self.enabled:
+            return compute(**params)
+
+        params = self.normalize(params)
+        key = self.make_key(version, params)
+        value = self.get(key)
+        if value is MISS:
+            value = compute(**params)
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop every cached entry (local and shared)"""
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current local size"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.local)}
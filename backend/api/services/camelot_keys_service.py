@@ -1,5 +1,64 @@
 from typing import List, Dict, Optional
+import numpy as np
 from backend.api.database.models import CamelotKey
+from backend.constants import CAMELOT_KEYS
+
+# Compatibility type codes; 0 marks an incompatible key
+INCOMPATIBLE = 0
+HARMONIC = 1        # Same key or +/-1 on the same wheel (e.g., 8A with 7A and 9A)
+PARALLEL = 2        # Same number on the other wheel (e.g., 8A with 8B)
+ENERGY_BOOST = 3    # +2 on the same wheel (e.g., 8A to 10A) - extended set only
+DIAGONAL = 4        # Minor nA to major (n+1)B, major nB to minor (n-1)A - extended set only
+COMPATIBILITY_TYPES = {
+    HARMONIC: 'harmonic',
+    PARALLEL: 'parallel',
+    ENERGY_BOOST: 'energy_boost',
+    DIAGONAL: 'diagonal',
+}
+
+# Camelot key IDs run 1-24; index 0 is unused
+NUM_CAMELOT_IDS = 25
+
+# key_str labels indexed by Camelot key ID (the wheel is static, so no table lookup)
+CAMELOT_KEY_STRS = np.empty(NUM_CAMELOT_IDS, dtype=object)
+for _key_id, _key, _mode, _key_str in CAMELOT_KEYS:
+    CAMELOT_KEY_STRS[_key_id] = _key_str
+
+
+def _build_compatibility_matrix(extended: bool) -> np.ndarray:
+    """
+    Precompute the compatibility type code of every pair of Camelot keys
+    Args:
+        extended: Also mark energy boost (+2) and diagonal mixes
+    Returns:
+        Read-only int8 matrix where [base_id, candidate_id] holds the type code
+    """
+    matrix = np.full((NUM_CAMELOT_IDS, NUM_CAMELOT_IDS), INCOMPATIBLE, dtype=np.int8)
+
+    def key_id(number: int, minor: bool) -> int:
+        """Camelot key ID for wheel position `number` (wraps around 1-12)"""
+        return (number - 1) % 12 + 1 + (0 if minor else 12)
+
+    for base_id in range(1, NUM_CAMELOT_IDS):
+        minor = base_id <= 12
+        number = (base_id - 1) % 12 + 1
+
+        # Extended mixes first so the standard rules take precedence on overlap
+        if extended:
+            matrix[base_id, key_id(number + 2, minor)] = ENERGY_BOOST
+            matrix[base_id, key_id(number + 1 if minor else number - 1, not minor)] = DIAGONAL
+
+        matrix[base_id, key_id(number, not minor)] = PARALLEL
+        for offset in (-1, 0, 1):
+            matrix[base_id, key_id(number + offset, minor)] = HARMONIC
+
+    matrix.setflags(write=False)
+    return matrix
+
+
+CAMELOT_COMPATIBILITY = _build_compatibility_matrix(extended=False)
+CAMELOT_COMPATIBILITY_EXTENDED = _build_compatibility_matrix(extended=True)
+
 
 class CamelotKeysService:
     @staticmethod
@@ -12,43 +71,49 @@ class CamelotKeysService:
         return CamelotKey.query.get(key_id)
 
     @staticmethod
-    def get_compatible_keys(key_id: int, as_dict: bool = False) -> List[Dict]:
+    def get_key_str(key_id: Optional[int]) -> Optional[str]:
+        """Get the human-readable label of a Camelot key ID without a database query"""
+        if key_id is None or not 1 <= key_id < NUM_CAMELOT_IDS:
+            return None
+        return CAMELOT_KEY_STRS[key_id]
+
+    @staticmethod
+    def get_compatible_keys(key_id: int, as_dict: bool = False, extended: bool = False) -> List[Dict]:
         """
         Determine compatible Camelot keys based on:
         - Same wheel (inner/outer) and +/-1 (e.g., 8A works with 7A and 9A)
         - Parallel key (e.g., 8A works with 8B)
+        - Optionally (extended), energy boost +2 and diagonal mixes
+
+        The dict form is answered from the precomputed compatibility matrix;
+        only the CamelotKey model form queries the database.
         """
-        
-        # Calculate compatible keys
-        if 1 <= key_id <= 12:
-            compatible_ids = [
-                key_id - 1 if key_id > 1 else 12, # Adjacent
-                key_id,
-                key_id + 1 if key_id < 12 else 1, # Adjacent
-                key_id + 12 # Parallel
-            ]
-        else:
-            compatible_ids = [
-                key_id - 1 if key_id > 13 else 24, # Adjacent
-                key_id,
-                key_id + 1 if key_id < 24 else 13, # Adjacent
-                key_id - 12 # Parallel
-            ]
-        
+        codes = CamelotKeysService.get_compatibility_codes(key_id, extended)
+        compatible_ids = [int(i) for i in np.flatnonzero(codes)]
+
+        if as_dict:
+            return [{
+                'id': i,
+                'key_str': CAMELOT_KEY_STRS[i],
+                'compatibility_type': COMPATIBILITY_TYPES[int(codes[i])]
+            } for i in compatible_ids]
+
         # Query all compatible keys from database
-        compatible_keys = CamelotKey.query.filter(
+        return CamelotKey.query.filter(
             CamelotKey.id.in_(compatible_ids)
         ).all()
-        
-        if as_dict:
-            harmonic_keys = compatible_ids[:3] # Adjacent keys; same mode (harmonic mixing)
-            return [{
-                'id': k.id,
-                'key_str': k.key_str,
-                'compatibility_type': (
-                    'harmonic' if k.id in harmonic_keys 
-                    else 'parallel'
-                )
-            } for k in compatible_keys]
-        
-        return compatible_keys
\ No newline at end of file
+
+    @staticmethod
+    def get_compatibility_codes(key_id: int, extended: bool = False) -> np.ndarray:
+        """
+        Get the compatibility type code of every Camelot key relative to key_id
+        Args:
+            key_id: Camelot key ID of the reference song
+            extended: Include energy boost and diagonal mixes
+        Returns:
+            Read-only int8 array indexed by Camelot key ID (INCOMPATIBLE for no match)
+        """
+        matrix = CAMELOT_COMPATIBILITY_EXTENDED if extended else CAMELOT_COMPATIBILITY
+        if not 1 <= key_id < NUM_CAMELOT_IDS:
+            return matrix[0]  # Unknown key: nothing is compatible
+        return matrix[key_id]
@@ -0,0 +1,279 @@
+"""
+Song Catalog
+
+Read-only, column-oriented snapshot of the songs table, aligned row-for-row
+with the FAISS index so recommendations can be answered without any SQL.
+
+Features:
+- One query at load time, NumPy arrays afterwards
+- Row N of every column describes the song stored at FAISS row N
+- Versioned against the FAISS id mapping it was built alongside
+
+Usage Example:
+    from backend.api.services.catalog_service import SongCatalog
+    catalog = SongCatalog.from_database(song_ids)  # requires app context
+    catalog = SongCatalog.from_bundle(AssetBundle.current())  # no database needed
+    catalog.serialize(row)  # same shape as SongService.serialize_song
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from backend.api.extensions import db
+from backend.api.database.models import Song
+from backend.api.services.asset_bundle import AssetBundle
+from backend.api.services.camelot_keys_service import CamelotKeysService
+from backend.constants import AUDIO_FEATURES
+
+logger = logging.getLogger(__name__)
+
+
+def ids_version(song_ids: np.ndarray) -> str:
+    """
+    Fingerprint a FAISS row -> song_id mapping
+    Args:
+        song_ids: Array of song IDs in FAISS row order
+    Returns:
+        Short hex digest identifying this exact mapping
+    """
+    data = np.ascontiguousarray(song_ids, dtype=np.int64).tobytes()
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def build_row_lookup(song_ids: np.ndarray) -> np.ndarray:
+    """
+    Build the dense song_id -> FAISS row reverse index
+    Args:
+        song_ids: Array of song IDs in FAISS row order
+    Returns:
+        Array of length max(song_id) + 1 holding each song's row, -1 for unknown IDs
+    """
+    song_ids = np.asarray(song_ids, dtype=np.int64)
+    size = int(song_ids.max()) + 1 if len(song_ids) else 0
+    id_to_row = np.full(size, -1, dtype=np.int64)
+    id_to_row[song_ids] = np.arange(len(song_ids), dtype=np.int64)
+    return id_to_row
+
+
+def is_row_lookup_for(id_to_row: np.ndarray, song_ids: np.ndarray) -> bool:
+    """
+    Check that a persisted reverse index matches an id mapping
+    Args:
+        id_to_row: Reverse index as produced by build_row_lookup
+        song_ids: Array of song IDs in FAISS row order
+    Returns:
+        True if id_to_row maps every song_id back to its row
+    """
+    if len(song_ids) == 0:
+        return len(id_to_row) == 0
+    if int(song_ids.max()) >= len(id_to_row) or int(song_ids.min()) < 0:
+        return False
+    return bool(np.array_equal(id_to_row[song_ids], np.arange(len(song_ids))))
+
+
+class SongCatalog:
+    """Columnar song data indexed by FAISS row"""
+
+    # Columns as stored in an asset bundle
+    NUMERIC_COLUMNS = ['valid', 'tempo', 'year', 'camelot_key_id', 'features', 'popularity', 'duration']
+    STRING_COLUMNS = ['title', 'artist', 'genre']
+
+    def __init__(self, song_ids: np.ndarray, id_to_row: np.ndarray,
+                 columns: Dict[str, np.ndarray], version: str):
+        """
+        Args:
+            song_ids: Song IDs in FAISS row order
+            id_to_row: Reverse index from build_row_lookup
+            columns: Column name -> array with one entry per FAISS row
+            version: Version of the id mapping the columns were aligned to
+        """
+        self.song_ids = song_ids
+        self.id_to_row = id_to_row
+        self.version = version
+
+        # Rows whose song no longer exists in the database are never returned
+        self.valid: np.ndarray = columns['valid']
+
+        # Filtering columns
+        self.tempo: np.ndarray = columns['tempo']
+        self.year: np.ndarray = columns['year']
+        self.camelot_key_id: np.ndarray = columns['camelot_key_id']
+
+        # Audio features, ordered as AUDIO_FEATURES (un-normalized)
+        self.features: np.ndarray = columns['features']
+
+        # Display columns (object arrays, or StringColumns when mapped from a bundle)
+        self.title = columns['title']
+        self.artist = columns['artist']
+        self.genre = columns['genre']
+        self.popularity: np.ndarray = columns['popularity']
+        self.duration: np.ndarray = columns['duration']
+
+    def __len__(self) -> int:
+        return len(self.song_ids)
+
+    @classmethod
+    def from_database(cls, song_ids: np.ndarray, id_to_row: Optional[np.ndarray] = None) -> 'SongCatalog':
+        """
+        Build a catalog for the given FAISS id mapping with a single query
+        Args:
+            song_ids: Song IDs in FAISS row order
+            id_to_row: Matching reverse index (built from song_ids if None)
+        Returns:
+            SongCatalog aligned with song_ids
+        """
+        if id_to_row is None:
+            id_to_row = build_row_lookup(song_ids)
+
+        columns = cls._empty_columns(len(song_ids))
+        cls._scatter_rows(columns, db.session.execute(cls._catalog_query()).all(), id_to_row)
+
+        missing = len(song_ids) - int(columns['valid'].sum())
+        if missing:
+            logger.warning(f"{missing} songs in the FAISS index are missing from the database")
+
+        return cls(song_ids, id_to_row, columns, ids_version(song_ids))
+
+    @staticmethod
+    def _empty_columns(n: int) -> Dict[str, np.ndarray]:
+        """Columns for n rows, all invalid"""
+        return {
+            'valid': np.zeros(n, dtype=bool),
+            'tempo': np.zeros(n, dtype=np.float64),
+            'year': np.zeros(n, dtype=np.int32),
+            'camelot_key_id': np.zeros(n, dtype=np.int16),
+            'features': np.zeros((n, len(AUDIO_FEATURES)), dtype=np.float64),
+            'title': np.empty(n, dtype=object),
+            'artist': np.empty(n, dtype=object),
+            'genre': np.empty(n, dtype=object),
+            'popularity': np.zeros(n, dtype=np.int32),
+            'duration': np.zeros(n, dtype=np.int64),
+        }
+
+    @staticmethod
+    def _catalog_query():
+        """Select the catalog columns of songs (filter it to select fewer)"""
+        feature_columns = [getattr(Song, feature.lower()) for feature in AUDIO_FEATURES]
+        return select(
+            Song.song_id, Song.title, Song.artist, Song.year, Song.tempo,
+            Song.camelot_key_id, Song.genre, Song.popularity, Song.duration,
+            *feature_columns
+        )
+
+    @staticmethod
+    def _scatter_rows(columns: Dict[str, np.ndarray], rows: Sequence, id_to_row: np.ndarray) -> None:
+        """Write _catalog_query results into their FAISS rows, skipping songs not in the index"""
+        if not rows:
+            return
+        db_ids = np.array([song.song_id for song in rows], dtype=np.int64)
+        in_range = db_ids < len(id_to_row)
+        target = np.full(len(rows), -1, dtype=np.int64)
+        target[in_range] = id_to_row[db_ids[in_range]]
+        keep = target >= 0
+        target = target[keep]
+
+        values = list(zip(*rows))
+        columns['valid'][target] = True
+        for i, name in enumerate(['title', 'artist', 'year', 'tempo', 'camelot_key_id',
+                                  'genre', 'popularity', 'duration'], start=1):
+            columns[name][target] = np.asarray(values[i], dtype=columns[name].dtype)[keep]
+        columns['features'][target] = np.asarray(values[9:], dtype=np.float64).T[keep]
+
+    def updated(self, song_ids: np.ndarray, id_to_row: np.ndarray, rows: np.ndarray,
+                deleted_rows: np.ndarray, batch_size: int = 10000) -> 'SongCatalog':
+        """
+        Copy this catalog onto a grown id mapping, re-reading only some rows from the database
+        Args:
+            song_ids: This catalog's song IDs followed by any new ones
+            id_to_row: Matching reverse index
+            rows: Rows of changed and new songs to re-read (invalid if no longer in the database)
+            deleted_rows: Rows whose songs were deleted
+            batch_size: Song IDs per query
+        Returns:
+            SongCatalog aligned with song_ids
+        """
+        old = len(self.song_ids)
+        columns = self._empty_columns(len(song_ids))
+        for name in self.NUMERIC_COLUMNS:
+            columns[name][:old] = getattr(self, name)
+        for name in self.STRING_COLUMNS:
+            columns[name][:old] = list(getattr(self, name))
+        columns['valid'][rows] = False
+        columns['valid'][deleted_rows] = False
+
+        ids = np.asarray(song_ids, dtype=np.int64)[rows]
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size].tolist()
+            query = self._catalog_query().where(Song.song_id.in_(batch))
+            self._scatter_rows(columns, db.session.execute(query).all(), id_to_row)
+
+        return type(self)(song_ids, id_to_row, columns, ids_version(song_ids))
+
+    @classmethod
+    def from_bundle(cls, bundle: AssetBundle) -> 'SongCatalog':
+        """
+        Map a catalog from an asset bundle without touching the database
+        Args:
+            bundle: Asset bundle written by build_faiss_index
+        Returns:
+            SongCatalog backed by read-only memory-mapped arrays
+        """
+        columns = {name: bundle.array(name) for name in cls.NUMERIC_COLUMNS}
+        columns.update({name: bundle.strings(name) for name in cls.STRING_COLUMNS})
+        return cls(bundle.array('song_ids'), bundle.array('id_to_row'), columns, bundle.version)
+
+    def to_columns(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Sequence[Optional[str]]]]:
+        """
+        Export the catalog for writing to an asset bundle
+        Returns:
+            (arrays, strings): numeric columns (plus song_ids and id_to_row)
+            and string columns, keyed by name
+        """
+        arrays = {name: getattr(self, name) for name in self.NUMERIC_COLUMNS}
+        arrays['song_ids'] = np.asarray(self.song_ids, dtype=np.int64)
+        arrays['id_to_row'] = self.id_to_row
+        strings = {name: list(getattr(self, name)) for name in self.STRING_COLUMNS}
+        return arrays, strings
+
+    def row_of(self, song_id: int) -> Optional[int]:
+        """
+        Find the FAISS row holding a song in O(1)
+        Args:
+            song_id: The ID of the song to locate
+        Returns:
+            Row number if the song is in the catalog, None otherwise
+        """
+        if song_id < 0 or song_id >= len(self.id_to_row):
+            return None
+        row = int(self.id_to_row[song_id])
+        if row < 0 or not self.valid[row]:
+            return None
+        return row
+
+    def serialize(self, row: int) -> Dict[str, Any]:
+        """
+        Convert a catalog row to API response format
+        Args:
+            row: FAISS row of the song
+        Returns:
+            Dictionary with the same keys as SongService.serialize_song
+        """
+        song = {
+            'songId': int(self.song_ids[row]),
+            'title': self.title[row],
+            'artist': self.artist[row],
+            'year': int(self.year[row]),
+            'tempo': float(self.tempo[row]),
+            'camelotKeyId': int(self.camelot_key_id[row]),
+            'camelotKeyStr': CamelotKeysService.get_key_str(int(self.camelot_key_id[row])),
+            'genre': self.genre[row],
+            'popularity': int(self.popularity[row]),
+            'duration': int(self.duration[row]),
+        }
+        for j, feature in enumerate(AUDIO_FEATURES):
+            song[feature] = float(self.features[row, j])
+        return song
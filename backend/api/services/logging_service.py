@@ -0,0 +1,209 @@
+"""
+Request Logging
+
+Request ids and an optional queue-based logging mode for the API.
+
+Every request gets an id (taken from a well-formed incoming X-Request-ID
+header, otherwise generated) that is echoed in the X-Request-ID response
+header and attached to its log records.
+
+With LOG_QUEUE enabled, the root logger's handlers are replaced by a
+QueueHandler: request threads only enqueue records, and a background
+QueueListener formats and writes them. The queue is bounded; when the
+writer falls behind, records are dropped (and counted) instead of
+blocking requests. On top of that, LOG_FORMAT=json writes one JSON
+object per line with the request id.
+
+LOG_SAMPLE_RATE keeps the INFO/DEBUG records of only a fraction of
+requests (all or none of a request's records, so sampled requests stay
+complete); warnings, errors and records outside requests are always kept.
+It applies with or without LOG_QUEUE: without it, the sampling filter is
+added to the root logger's existing handlers.
+
+Usage Example:
+    from backend.api.extensions import request_logging
+    request_logging.init_app(app)   # done by create_app
+
+    # gunicorn post_fork: the listener thread doesn't survive fork
+    request_logging.start()
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from flask import Flask, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# Incoming request ids are reused only if they look like ids
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+
+
+def current_request_id() -> str:
+    """Id of the request being handled, or '-' outside requests"""
+    if has_request_context():
+        return g.get('request_id', '-')
+    return '-'
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Adds request_id to records and drops INFO/DEBUG records of unsampled
+    requests (runs on the request's thread, before the record is queued)
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id()
+        if record.levelno >= logging.WARNING or not has_request_context():
+            return True
+        return g.get('log_sampled', True)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'pid': record.process,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep the traceback separate so the listener's formatter can place it
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogging:
+    """Request ids, sampled logging, and queue-based logging when LOG_QUEUE is enabled"""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.queue_size = 10000
+        self.json_format = False
+        self.level = logging.INFO
+        self._handler = None
+        self._listener = None
+        self._pid = None
+        self._registered_exit = False
+        self._filter = RequestContextFilter()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Install request id hooks and, if LOG_QUEUE is set, the queue-based root
+        handler (otherwise sampling filters the root's direct handlers)
+        Args:
+            app: Flask app (reads LOG_QUEUE, LOG_QUEUE_SIZE, LOG_SAMPLE_RATE, LOG_FORMAT, LOG_LEVEL)
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        self.enabled = bool(app.config.get('LOG_QUEUE', False))
+        self.sample_rate = min(1.0, max(0.0, float(app.config.get('LOG_SAMPLE_RATE', 1.0))))
+        self.queue_size = int(app.config.get('LOG_QUEUE_SIZE', 10000))
+        self.json_format = app.config.get('LOG_FORMAT', 'text') == 'json'
+        self.level = logging.getLevelName(str(app.config.get('LOG_LEVEL', 'INFO')).upper())
+        if self.enabled:
+            self.start()
+            logger.info(
+                f"Queue logging enabled (sample rate {self.sample_rate:.0%}, "
+                f"{'json' if self.json_format else 'text'} format)"
+            )
+        elif self.sample_rate < 1.0:
+            for handler in logging.getLogger().handlers:
+                if self._filter not in handler.filters:
+                    handler.addFilter(self._filter)
+            logger.info(f"Request log sampling enabled (sample rate {self.sample_rate:.0%})")
+
+    @property
+    def dropped(self) -> int:
+        """Records dropped because the queue was full (this process)"""
+        return self._handler.dropped if self._handler is not None else 0
+
+    def start(self) -> None:
+        """
+        (Re)start the background listener with a fresh queue; call again in
+        forked workers, since threads and queue locks don't survive fork
+        """
+        if not self.enabled:
+            return
+        if self._listener is not None and self._pid == os.getpid():
+            self.stop()
+
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter() if self.json_format else logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.Queue(maxsize=self.queue_size)
+        handler = DroppingQueueHandler(log_queue)
+        handler.addFilter(self._filter)
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(self.level)
+
+        self._handler = handler
+        self._listener = logging.handlers.QueueListener(log_queue, output)
+        self._listener.start()
+        self._pid = os.getpid()
+
+        if not self._registered_exit:
+            atexit.register(self.stop)
+            self._registered_exit = True
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener (this process only)"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+        self._listener = None
+
+    def _before_request(self) -> None:
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+        g.log_sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def _after_request(self, response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
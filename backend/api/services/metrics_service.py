@@ -0,0 +1,192 @@
+"""
+Request Metrics
+
+Span-style stage timers, SQL statement counting and per-request latency,
+aggregated into histograms and exposed in the Prometheus text format on
+/metrics (see routes/metrics.py). Optionally adds a Server-Timing header
+to every response, so browser dev tools show where a request spent its time.
+
+Metrics:
+- djsm_http_request_seconds{endpoint,method,status}  Request latency
+- djsm_stage_seconds{stage}                          Time per pipeline stage (see Metrics.timed)
+- djsm_db_query_seconds                              SQL statement latency
+- djsm_db_queries_total{endpoint}                    SQL statements executed by requests
+
+Metrics are kept per process; with several gunicorn workers each scrape
+sees the worker that answered it.
+
+Usage Example:
+    from backend.api.extensions import metrics
+    with metrics.timed('search'):
+        distances, rows = index.search(query, k)
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Bucketed histogram with labels"""
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Labels -> [count per bucket (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    labels = _format_labels(self.label_names, label_values, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, label_values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Metrics:
+    """Process-wide metrics registry and Flask/SQLAlchemy instrumentation"""
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            'djsm_http_request_seconds', 'HTTP request latency', ('endpoint', 'method', 'status'))
+        self.stage_seconds = Histogram(
+            'djsm_stage_seconds', 'Time spent in each request pipeline stage', ('stage',))
+        self.db_query_seconds = Histogram(
+            'djsm_db_query_seconds', 'SQL statement latency')
+        self.db_queries = Counter(
+            'djsm_db_queries_total', 'SQL statements executed while handling requests', ('endpoint',))
+        self.server_timing = False
+        self._listening = False
+
+    def init_app(self, app: Flask) -> None:
+        """Install request hooks and SQL statement listeners (SERVER_TIMING enables the header)"""
+        self.server_timing = bool(app.config.get('SERVER_TIMING', False))
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        # Listen on every engine once, however many apps are created
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """
+        Time a block as a pipeline stage
+        Args:
+            stage: Stage name (e.g., 'search'); repeated stages in one request add up
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_seconds.observe(elapsed, stage)
+            if has_request_context() and 'metrics_stages' in g:
+                g.metrics_stages[stage] = g.metrics_stages.get(stage, 0.0) + elapsed
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in (self.request_seconds, self.stage_seconds, self.db_query_seconds, self.db_queries):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def _before_request(self) -> None:
+        g.metrics_start = time.perf_counter()
+        g.metrics_stages = {}
+        g.metrics_db = [0, 0.0]  # Statements, seconds
+
+    def _after_request(self, response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        self.request_seconds.observe(elapsed, endpoint, request.method, str(response.status_code))
+        queries, db_seconds = g.metrics_db
+        if queries:
+            self.db_queries.inc(queries, endpoint)
+
+        if self.server_timing:
+            entries = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in g.metrics_stages.items()]
+            entries.append(f'db;dur={db_seconds * 1000:.3f};desc="{queries} queries"')
+            entries.append(f"total;dur={elapsed * 1000:.3f}")
+            response.headers['Server-Timing'] = ', '.join(entries)
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        self.db_query_seconds.observe(elapsed)
+        if has_request_context() and 'metrics_db' in g:
+            g.metrics_db[0] += 1
+            g.metrics_db[1] += elapsed
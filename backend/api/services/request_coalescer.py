@@ -0,0 +1,90 @@
+"""
+Request Coalescer
+
+Merges calls that arrive within a short window into one batched call, so
+concurrent single-seed recommendation requests share a single multi-row
+FAISS search instead of each paying for its own.
+
+The first caller of a window becomes its leader: it waits up to `window`
+seconds (or until `max_batch` calls have joined), runs the batch function
+once for everyone, and hands each caller its own result. No background
+thread is involved.
+
+Usage Example:
+    coalescer = RequestCoalescer(search_batch, window=0.002, max_batch=32)
+    result = coalescer.submit({'base_song_id': 5, 'limit': 50})
+"""
+
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    """Calls collected during one window"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.results: List[Any] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class RequestCoalescer:
+    """Runs concurrent calls as one batch call"""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], window: float, max_batch: int = 32):
+        """
+        Args:
+            batch_fn: Takes a list of items and returns one result per item, in order;
+                      an Exception instance as a result is raised to that item's caller
+            window: Seconds the first call of a batch waits for others to join
+            max_batch: Batch size that triggers the call without waiting out the window
+        """
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._open: Optional[_Batch] = None
+
+    def submit(self, item: Any) -> Any:
+        """
+        Add an item to the open batch and wait for its result
+        Args:
+            item: Argument for batch_fn
+        Returns:
+            The item's result from batch_fn
+        """
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            slot = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch:
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            # Close the batch after the window (unless it filled up first), then run it
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            try:
+                batch.results = self.batch_fn(batch.items)
+            except Exception as e:
+                batch.results = [e] * len(batch.items)
+            if len(batch.items) > 1:
+                logger.debug(f"Coalesced {len(batch.items)} requests into one batch")
+            batch.done.set()
+        else:
+            batch.done.wait()
+
+        result = batch.results[slot]
+        if isinstance(result, Exception):
+            raise result
+        return result
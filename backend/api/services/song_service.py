@@ -5,7 +5,8 @@ Provides DJ-focused song recommendations using vector similarity search
 with FAISS, plus music theory rules for harmonic mixing.
 
 Features:
-- Fast approximate nearest neighbor search
+- Fast approximate nearest neighbor search, or exact NumPy search
+- Per-request overrides and weights for every audio feature
 - Camelot wheel harmonic compatibility
 - DJ-friendly tempo matching for smooth transitions
 """
@@ -14,66 +15,109 @@ import faiss
 import numpy as np
 import pickle
 import logging
-from typing import List, Dict, Any, Optional, Union
+import threading
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
+from sqlalchemy import select
+from sqlalchemy.engine import Row
 
+from backend.api.extensions import db, metrics, recommendation_cache
 from backend.api.database.models import Song
-from backend.api.services.camelot_keys_service import CamelotKeysService
+from backend.api.services.asset_bundle import AssetBundle
+from backend.api.services.camelot_keys_service import CamelotKeysService, COMPATIBILITY_TYPES
+from backend.api.services.exact_search import ExactIndex
+from backend.api.services.catalog_service import (
+    SongCatalog,
+    build_row_lookup,
+    ids_version,
+    is_row_lookup_for
+)
+from backend.api.services.index_factory import (
+    apply_search_params,
+    create_weighted_index,
+    describe_index,
+    weighted_query
+)
+from backend.api.services.request_coalescer import RequestCoalescer
 from backend.constants import (
     AUDIO_FEATURES,
     FAISS_INDEX_PATH,
     FAISS_IDS_PATH,
+    FAISS_ROWS_PATH,
     FEATURE_STATS_PATH
 )
 
 logger = logging.getLogger(__name__)
 
-# Feature weights (sum to 1.0) - Can implement later if desired
-# These weights can be adjusted based on DJ preferences or specific use cases
-# FEATURE_WEIGHTS = {
-#     'danceability': 0.25,
-#     'energy': 0.25,
-#     'loudness': 0.1,
-#     'speechiness': 0.05,
-#     'acousticness': 0.05,
-#     'instrumentalness': 0.1,
-#     'liveness': 0.05,
-#     'valence': 0.15
-# }
+# Columns read by SongService.serialize_song; listing endpoints select only these
+SERIALIZED_COLUMNS = [
+    Song.song_id, Song.title, Song.artist, Song.year, Song.tempo,
+    Song.camelot_key_id, Song.genre, Song.popularity, Song.duration,
+    *[getattr(Song, feature.lower()) for feature in AUDIO_FEATURES]
+]
 
 class SongService:
     """Basic song data operations"""
     
     @staticmethod
-    def get_songs(limit: int = None) -> List[Song]:
+    def _song_rows_query(after: Optional[int] = None, limit: Optional[int] = None):
+        """Build the keyset-paginated select of SERIALIZED_COLUMNS, ordered by song_id"""
+        stmt = select(*SERIALIZED_COLUMNS).order_by(Song.song_id)
+        if after is not None:
+            stmt = stmt.where(Song.song_id > after)
+        if limit:
+            stmt = stmt.limit(limit)
+        return stmt
+    
+    @staticmethod
+    def get_songs(limit: int = None, after: Optional[int] = None) -> List[Row]:
         """
-        Get all songs, optionally limited to a specific count
+        Get all songs, optionally limited to a specific count.
+        Selects only the serialized columns in one query and returns
+        lightweight row tuples instead of ORM identities.
         Args:
             limit: Maximum number of songs to return
+            after: Keyset cursor; only songs with a greater song_id are returned
         Returns:
-            List of Song objects
+            List of rows (attribute access like Song) ordered by song_id
         """
-        query = Song.query
-        if limit:
-            query = query.limit(limit)
-        return query.all()
+        return db.session.execute(SongService._song_rows_query(after, limit)).all()
     
     @staticmethod
-    def get_song(song_id: int) -> Optional[Song]:
+    def iter_songs(after: Optional[int] = None, limit: Optional[int] = None,
+                   batch_size: int = 1000) -> Iterator[Row]:
         """
-        Get a specific song by ID
+        Stream songs in song_id order without materializing them all.
+        Rows are fetched from the database `batch_size` at a time (yield_per),
+        so memory stays constant however large the catalog is.
+        Args:
+            after: Keyset cursor; only songs with a greater song_id are returned
+            limit: Maximum number of songs to return (None for all)
+            batch_size: Rows fetched per round-trip
+        Returns:
+            Iterator over rows ordered by song_id
+        """
+        stmt = SongService._song_rows_query(after, limit).execution_options(yield_per=batch_size)
+        yield from db.session.execute(stmt)
+    
+    @staticmethod
+    def get_song_row(song_id: int) -> Optional[Row]:
+        """
+        Get the serialized columns of a specific song
         Args:
             song_id: The ID of the song to retrieve
         Returns:
-            Song object if found, None otherwise
+            Row if found, None otherwise
         """
-        return Song.query.get(song_id)
+        stmt = select(*SERIALIZED_COLUMNS).where(Song.song_id == song_id)
+        return db.session.execute(stmt).first()
     
     @staticmethod
-    def serialize_song(song: Song) -> Dict[str, Any]:
+    def serialize_song(song: Union[Song, Row]) -> Dict[str, Any]:
         """
-        Convert Song model to API response format
+        Convert Song model (or a row of SERIALIZED_COLUMNS) to API response format
         Args:
-            song: Song model instance
+            song: Song model instance or row
         Returns:
             Dictionary with serialized song data
         """
@@ -84,7 +128,7 @@ class SongService:
             'year': song.year,
             'tempo': song.tempo,
             'camelotKeyId': song.camelot_key_id,
-            'camelotKeyStr': song.camelot_key.key_str if song.camelot_key else None,
+            'camelotKeyStr': CamelotKeysService.get_key_str(song.camelot_key_id),
             'genre': song.genre,
             'popularity': song.popularity,
             'duration': song.duration,
@@ -98,98 +142,599 @@ class SongService:
             'valence': song.valence
         }
 
+class RecommendationAssets:
+    """
+    Immutable snapshot of everything a recommendation request reads.
+    The service swaps whole snapshots, so a request that captured one keeps
+    a consistent index, id mapping, statistics and catalog while a reload
+    publishes the next generation.
+    """
+    
+    def __init__(self, index: faiss.Index, song_ids: np.ndarray, feature_stats: Dict[str, np.ndarray],
+                 catalog: SongCatalog, vectors: Optional[np.ndarray] = None):
+        """
+        Args:
+            index: FAISS index
+            song_ids: Song IDs in FAISS row order
+            feature_stats: 'mean' and 'std' used to normalize the features
+            catalog: SongCatalog aligned with the index
+            vectors: Normalized vectors by row (bundle only; None to reconstruct from the index)
+        """
+        self.index = index
+        self.song_ids = song_ids
+        self.feature_stats = feature_stats
+        self.catalog = catalog
+        self.vectors = vectors
+        self.loaded_at = time.time()
+        self._weighted_index: Optional[faiss.Index] = None
+        self._exact_index: Optional[ExactIndex] = None
+        self._derived_lock = threading.Lock()
+    
+    @property
+    def generation(self) -> str:
+        """Bundle version (or id mapping version for legacy assets) of this snapshot"""
+        return self.catalog.version
+    
+    def stored_vector(self, row: int) -> np.ndarray:
+        """Writable copy of the normalized vector stored at a FAISS row"""
+        if self.vectors is not None:
+            return np.array(self.vectors[row], dtype=np.float32)
+        return self.index.reconstruct(row)
+    
+    def all_vectors(self) -> np.ndarray:
+        """Normalized vectors of every row (reconstructed in one call for legacy assets)"""
+        if self.vectors is not None:
+            return self.vectors
+        return self.index.reconstruct_n(0, self.index.ntotal)
+    
+    def weighted_index(self) -> faiss.Index:
+        """
+        Inner-product index for feature-weighted queries (see
+        index_factory.create_weighted_index), built once per snapshot on first use
+        """
+        if self._weighted_index is None:
+            with self._derived_lock:
+                if self._weighted_index is None:
+                    self._weighted_index = create_weighted_index(self.all_vectors())
+                    logger.info(f"Built the weighted search index for generation {self.generation}")
+        return self._weighted_index
+    
+    def exact_index(self) -> ExactIndex:
+        """Matrix for the exact NumPy search engine, built once per snapshot on first use"""
+        if self._exact_index is None:
+            with self._derived_lock:
+                if self._exact_index is None:
+                    self._exact_index = ExactIndex(self.all_vectors())
+        return self._exact_index
+
+
 class RecommendationService:
     """Service for DJ-oriented song recommendations"""
     
-    # Lazy-loaded index and related data
-    _index = None
-    _song_ids = None
-    _feature_stats = None
+    # Lazy-loaded index and related data, replaced as a whole on reload
+    _assets: Optional[RecommendationAssets] = None
+    
+    # Single-flight guard for loads and reloads; requests only take it while nothing is loaded
+    _load_lock = threading.Lock()
+    
+    # FAISS OpenMP threads per search (0 keeps the FAISS default). OpenMP
+    # settings are per thread, so each request thread applies it once.
+    _omp_threads = 0
+    _thread_state = threading.local()
+    
+    # Optional coalescing of concurrent single-seed searches (see init_app)
+    _coalescer: Optional[RequestCoalescer] = None
+    
+    # Search engine: 'faiss' (the asset index) or 'numpy' (exact search over the vectors)
+    ENGINES = ('faiss', 'numpy')
+    _engine = 'faiss'
+    
+    # Neighbours fetched per requested result by the shared batch search
+    BATCH_OVERFETCH = 20
+    
+    # Candidates fetched per requested result by weighted FAISS searches, before the exact re-rank
+    WEIGHTED_OVERFETCH = 2
+    
+    @classmethod
+    def init_app(cls, app) -> None:
+        """Configure the search engine, threading and request coalescing from the Flask app config"""
+        engine = app.config.get('RECOMMENDATION_ENGINE', 'faiss')
+        if engine not in cls.ENGINES:
+            raise ValueError(f"Unknown RECOMMENDATION_ENGINE '{engine}' (expected one of {', '.join(cls.ENGINES)})")
+        cls._engine = engine
+        cls._omp_threads = int(app.config.get('FAISS_OMP_THREADS', 0))
+        window_ms = float(app.config.get('RECOMMENDATION_COALESCE_WINDOW_MS', 0))
+        cls._coalescer = None
+        if window_ms > 0:
+            cls._coalescer = RequestCoalescer(
+                cls._search_coalesced, window_ms / 1000.0,
+                int(app.config.get('RECOMMENDATION_COALESCE_MAX_BATCH', 32))
+            )
     
     @classmethod
-    def _load_assets(cls):
-        """Load FAISS index and related data if not already loaded"""
-        if cls._index is None:
-            try:
-                # Load FAISS index
-                cls._index = faiss.read_index(str(FAISS_INDEX_PATH))
-                
-                # Load song IDs mapping
-                with open(FAISS_IDS_PATH, 'rb') as f:
-                    cls._song_ids = pickle.load(f)
-                
-                # Load feature statistics for normalization
-                with open(FEATURE_STATS_PATH, 'rb') as f:
-                    cls._feature_stats = pickle.load(f)
-                    
-                # # Create weighted index if it doesn't exist
-                # if not hasattr(cls._index, 'is_weighted'):
-                #     cls._apply_feature_weights()
-                    
-                logger.info(f"Loaded FAISS index with {len(cls._song_ids)} songs")
-            except Exception as e:
-                logger.error(f"Failed to load FAISS index: {e}")
-                raise
+    def _apply_omp_threads(cls) -> None:
+        """Apply the configured FAISS OpenMP thread count to the calling thread"""
+        if cls._omp_threads > 0 and getattr(cls._thread_state, 'omp_threads', None) != cls._omp_threads:
+            faiss.omp_set_num_threads(cls._omp_threads)
+            cls._thread_state.omp_threads = cls._omp_threads
     
-    # @classmethod
-    # def _apply_feature_weights(cls):
-    #     """Apply DJ-specific feature weights to the index"""
-    #     # Extract the vectors
-    #     d = cls._index.d
-    #     n = cls._index.ntotal
-        
-    #     # Get the raw vectors
-    #     vectors = np.zeros((n, d), dtype=np.float32)
-    #     for i in range(n):
-    #         cls._index.reconstruct(i, vectors[i])
-        
-    #     # Apply weights
-    #     weights = np.array([FEATURE_WEIGHTS.get(feature.lower(), 1.0) 
-    #                       for feature in AUDIO_FEATURES], dtype=np.float32)
-    #     weighted_vectors = vectors * weights
-        
-    #     # Create new index with weighted vectors
-    #     new_index = faiss.IndexFlatL2(d)
-    #     new_index.add(weighted_vectors)
-    #     new_index.is_weighted = True
-        
-    #     # Replace old index
-    #     cls._index = new_index
+    @classmethod
+    def _load_assets(cls) -> RecommendationAssets:
+        """
+        Load FAISS index, related data and the song catalog if not already loaded
+        Returns:
+            The current assets snapshot
+        """
+        assets = cls._assets
+        if assets is not None:
+            return assets
+        
+        # Only one thread loads; the others wait for it and reuse its snapshot
+        with cls._load_lock:
+            assets = cls._assets
+            if assets is None:
+                try:
+                    assets = cls._read_assets()
+                except Exception as e:
+                    logger.error(f"Failed to load FAISS index: {e}")
+                    raise
+                cls._assets = assets
+                logger.info(f"Loaded {describe_index(assets.index)} with {len(assets.song_ids)} songs "
+                            f"(generation {assets.generation})")
+        return assets
+
+    @classmethod
+    def _read_assets(cls) -> RecommendationAssets:
+        """
+        Read and validate a new assets snapshot without touching the one in service
+        Returns:
+            RecommendationAssets from the active bundle, or the legacy pickle assets
+        """
+        # Prefer the memory-mapped bundle; fall back to the legacy pickle assets
+        bundle = AssetBundle.current()
+        if bundle is not None:
+            assets = cls._load_bundle(bundle)
+        else:
+            assets = cls._load_legacy_assets()
+        
+        cls._validate_assets(assets)
+        return assets
+
+    @classmethod
+    def _load_bundle(cls, bundle: AssetBundle) -> RecommendationAssets:
+        """Map the index, id mapping, statistics, vectors and catalog from an asset bundle"""
+        index = bundle.read_index()
+        apply_search_params(index, bundle.manifest.get('search_params'))
+        return RecommendationAssets(
+            index=index,
+            song_ids=bundle.array('song_ids'),
+            feature_stats={
+                'mean': bundle.array('feature_mean'),
+                'std': bundle.array('feature_std')
+            },
+            catalog=SongCatalog.from_bundle(bundle),
+            vectors=bundle.array('vectors')
+        )
+
+    @classmethod
+    def _load_legacy_assets(cls) -> RecommendationAssets:
+        """Load faiss_index.bin and the pickled id mapping and statistics; catalog from the database"""
+        # Load FAISS index
+        index = faiss.read_index(str(FAISS_INDEX_PATH))
+        
+        # IVF indexes need a direct map to reconstruct stored vectors
+        try:
+            faiss.extract_index_ivf(index).make_direct_map()
+        except RuntimeError:
+            pass
+        
+        # Load song IDs mapping
+        with open(FAISS_IDS_PATH, 'rb') as f:
+            song_ids = pickle.load(f)
+        
+        # Load the song_id -> row reverse index, rebuilding it if stale or missing
+        id_to_row = None
+        if FAISS_ROWS_PATH.exists():
+            with open(FAISS_ROWS_PATH, 'rb') as f:
+                id_to_row = pickle.load(f)
+            if not is_row_lookup_for(id_to_row, song_ids):
+                logger.warning(f"{FAISS_ROWS_PATH} does not match {FAISS_IDS_PATH}, rebuilding it")
+                id_to_row = None
+        if id_to_row is None:
+            id_to_row = build_row_lookup(song_ids)
+        
+        # Load feature statistics for normalization
+        with open(FEATURE_STATS_PATH, 'rb') as f:
+            feature_stats = pickle.load(f)
+        
+        # Snapshot the songs table in FAISS row order
+        catalog = SongCatalog.from_database(song_ids, id_to_row)
+        return RecommendationAssets(index, song_ids, feature_stats, catalog)
+
+    @staticmethod
+    def _validate_assets(assets: RecommendationAssets) -> None:
+        """
+        Check that a snapshot is internally consistent and searchable
+        Raises:
+            ValueError: If the pieces disagree or a stored vector can't find itself
+        """
+        n = len(assets.song_ids)
+        d = len(AUDIO_FEATURES)
+        if assets.index.ntotal != n or len(assets.catalog) != n:
+            raise ValueError(f"Index holds {assets.index.ntotal} vectors, id mapping {n} "
+                             f"and catalog {len(assets.catalog)} rows")
+        if assets.index.d != d:
+            raise ValueError(f"Index dimension {assets.index.d} does not match {d} audio features")
+        for name in ('mean', 'std'):
+            if np.shape(assets.feature_stats[name]) != (d,):
+                raise ValueError(f"Feature {name} has shape {np.shape(assets.feature_stats[name])}, expected ({d},)")
+        if assets.vectors is not None and assets.vectors.shape != (n, d):
+            raise ValueError(f"Stored vectors have shape {assets.vectors.shape}, expected ({n}, {d})")
+        
+        valid_rows = np.flatnonzero(assets.catalog.valid)
+        if n and not len(valid_rows):
+            raise ValueError("No song in the index exists in the catalog")
+        
+        # Smoke-test search: a stored vector must find itself (or an exact duplicate);
+        # approximate indexes only need to rank it among the nearest few
+        if len(valid_rows):
+            row = int(valid_rows[0])
+            distances, indices = assets.index.search(assets.stored_vector(row).reshape(1, -1), 10)
+            if row not in indices[0] and not distances[0, 0] <= 1e-3:
+                raise ValueError(f"Test search did not find the stored vector of row {row}")
+
+    @classmethod
+    def _assets_version_on_disk(cls) -> str:
+        """Version of the assets a fresh load would produce"""
+        version = AssetBundle.current_version()
+        if version is not None:
+            return version
+        with open(FAISS_IDS_PATH, 'rb') as f:
+            return ids_version(pickle.load(f))
+
+    @classmethod
+    def reload_assets(cls, force: bool = False) -> bool:
+        """
+        Load the assets on disk as a new generation and swap it in.
+        The new snapshot is read and validated while requests keep using the
+        current one, then replaces it in a single assignment; requests that
+        already captured the old snapshot finish on it. A failed load leaves
+        the current generation in service.
+        Skipped when the assets on disk (the active bundle, or the legacy
+        faiss_song_ids.pkl) match the loaded generation.
+        Args:
+            force: Reload even if the assets are unchanged
+        Returns:
+            True if a new generation was swapped in, False if already up to date
+        """
+        with cls._load_lock:
+            current = cls._assets
+            if not force and current is not None:
+                if cls._assets_version_on_disk() == current.generation:
+                    return False
+            
+            assets = cls._read_assets()
+            cls._assets = assets
+        
+        previous = current.generation if current is not None else None
+        logger.info(f"Swapped recommendation assets: generation {previous} -> {assets.generation} "
+                    f"({len(assets.song_ids)} songs)")
+        recommendation_cache.retain_version(assets.catalog.version)
+        return True
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        """
+        Check whether assets are loaded, without triggering a load
+        Returns:
+            True if the index and catalog are in memory
+        """
+        return cls._assets is not None
+
+    @classmethod
+    def get_assets(cls) -> RecommendationAssets:
+        """
+        Get the current assets snapshot, loading assets if needed
+        Returns:
+            RecommendationAssets in service
+        """
+        return cls._load_assets()
 
     @classmethod
-    def _is_compatible_tempo(cls, base_tempo: float, 
-                             candidate_tempo: float, 
-                             direct_tolerance: float = 4.0,
-                             half_double_tolerance: float = 2.0
-                             ) -> bool:
+    def get_catalog(cls) -> SongCatalog:
+        """
+        Get the loaded song catalog, loading assets if needed
+        Returns:
+            SongCatalog aligned with the FAISS index
+        """
+        return cls._load_assets().catalog
+    
+    @staticmethod
+    def _compatibility(
+        base_tempo: Union[float, np.ndarray],
+        key_codes: np.ndarray,
+        tempos: np.ndarray,
+        keys: np.ndarray,
+        years: np.ndarray,
+        tempo_tolerance: Union[float, np.ndarray] = 4.0,
+        start_year: Union[int, np.ndarray] = 0,
+        end_year: Union[int, np.ndarray] = 3000,
+        half_double_tolerance: float = 2.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Check if the candidate tempo is compatible with the base tempo,
-        considering normal, half-time, and double-time matches.
+        Vectorized harmonic, tempo and year compatibility check.
+        
+        Tempos are compatible on a direct match (within tempo_tolerance) or a
+        half-time/double-time match (within half_double_tolerance).
+        Works on any broadcastable shapes: a single seed against the whole
+        catalog (scalars and 1-D key_codes), or B seeds against their (B, k)
+        search hits (per-seed values as (B, 1) columns and (B, 25) key_codes).
         
         Args:
-            base_tempo: The reference tempo in BPM
-            candidate_tempo: The tempo to check for compatibility
-            direct_tolerance: Allowable BPM difference for direct match
+            base_tempo: The reference tempo(s) in BPM
+            key_codes: Compatibility code per Camelot key ID (see CamelotKeysService)
+            tempos/keys/years: Candidate tempos, Camelot key IDs and years
+            tempo_tolerance: Allowable BPM difference for direct match
+            start_year/end_year: Inclusive year range
             half_double_tolerance: Allowable BPM difference for half/double match
             
         Returns:
-            True if tempos are compatible, False otherwise
+            (mask, types): boolean compatibility mask and the int8
+            compatibility type code of each candidate (0 where incompatible)
+        """
+        if key_codes.ndim == 1:
+            types = key_codes[keys]
+        else:
+            types = np.take_along_axis(key_codes, keys.astype(np.intp), axis=-1)
+        
+        mask = (
+            (types != 0)
+            & ((years >= start_year) & (years <= end_year))
+            & (
+                (np.abs(tempos - base_tempo) <= tempo_tolerance)               # Direct
+                | (np.abs(tempos - base_tempo / 2) <= half_double_tolerance)   # Half-time
+                | (np.abs(tempos - base_tempo * 2) <= half_double_tolerance)   # Double-time
+            )
+        )
+        return mask, np.where(mask, types, 0).astype(np.int8)
+
+    @classmethod
+    def _compatible_rows(cls, catalog: SongCatalog, query: Dict[str, Any]) -> np.ndarray:
         """
-        # Direct tempo match (within tolerance)
-        if abs(base_tempo - candidate_tempo) <= direct_tolerance:
-            return True
+        Build a mask of catalog rows that can be mixed with a prepared query's seed
+        
+        Args:
+            catalog: Catalog the query was prepared against
+            query: Prepared query from _prepare_query
             
-        # Half-time match (within tolerance)
-        half_tempo = base_tempo / 2
-        if abs(half_tempo - candidate_tempo) <= half_double_tolerance:
-            return True
+        Returns:
+            Boolean array over FAISS rows; True for harmonically, rhythmically
+            and temporally compatible songs (never the seed itself)
+        """
+        mask, _ = cls._compatibility(
+            query['base_tempo'], query['key_codes'],
+            catalog.tempo, catalog.camelot_key_id, catalog.year,
+            query['tempo_tolerance'], query['start_year'], query['end_year']
+        )
+        mask &= catalog.valid
+        mask[query['base_row']] = False
+        return mask
+
+    @classmethod
+    def _filtered_search(cls, index: faiss.Index, query_vector: np.ndarray, mask: np.ndarray, limit: int):
+        """
+        Search the index, visiting only the rows allowed by the mask.
+        IVF indexes only see the rows in their probed clusters and HNSW only
+        the rows its candidate list reaches, so nprobe (or efSearch) is
+        doubled until `limit` hits are found or the whole index is covered.
+        
+        Args:
+            index: FAISS index to search
+            query_vector: Normalized query of shape (1, d)
+            mask: Boolean array over FAISS rows; True for rows that may be returned
+            limit: Maximum number of neighbours to return
             
-        # Double-time match (within tolerance)
-        double_tempo = base_tempo * 2
-        if abs(double_tempo - candidate_tempo) <= half_double_tolerance:
-            return True
+        Returns:
+            (distances, rows) of the hits found, nearest first
+        """
+        k = min(limit, int(mask.sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        # Bit i of the bitmap is set when FAISS row i may be returned
+        bitmap = np.packbits(mask, bitorder='little')
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+
+        try:
+            ivf = faiss.extract_index_ivf(index)
+        except RuntimeError:
+            ivf = None
+        hnsw = getattr(faiss.downcast_index(index), 'hnsw', None) if ivf is None else None
+        # Otherwise a flat index: the filtered search is already exhaustive
+
+        nprobe = ivf.nprobe if ivf is not None else 0
+        ef_search = max(hnsw.efSearch, k) if hnsw is not None else 0
+        while True:
+            if ivf is not None:
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+            elif hnsw is not None:
+                params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+            distances, indices = index.search(query_vector, k, params=params)
+            found = indices[0] >= 0
+            if found.all():
+                break
+            if ivf is not None and nprobe < ivf.nlist:
+                nprobe = min(nprobe * 2, ivf.nlist)
+                logger.debug(f"Only {int(found.sum())}/{k} compatible hits, widening nprobe to {nprobe}")
+            elif hnsw is not None and ef_search < index.ntotal:
+                ef_search = min(ef_search * 2, index.ntotal)
+                logger.debug(f"Only {int(found.sum())}/{k} compatible hits, widening efSearch to {ef_search}")
+            else:
+                break
+
+        return distances[0][found], indices[0][found]
+    
+    @classmethod
+    def _prepare_query(
+        cls,
+        assets: RecommendationAssets,
+        base_song_id: int,
+        tempo_tolerance: float = 4.0,
+        start_year: int = 0,
+        end_year: int = 3000,
+        danceability: Optional[float] = None,
+        energy: Optional[float] = None,
+        loudness: Optional[float] = None,
+        speechiness: Optional[float] = None,
+        acousticness: Optional[float] = None,
+        instrumentalness: Optional[float] = None,
+        liveness: Optional[float] = None,
+        valence: Optional[float] = None,
+        extended_mixing: bool = False,
+        weights: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the query vector and compatibility mask for one seed song
+        
+        Args:
+            assets: Assets snapshot to query
+            base_song_id: Reference song ID
+            tempo_tolerance: BPM range (+/-) for mixing compatibility
+            start_year/end_year: Filter by year range
+            danceability ... valence: Override feature values in the query
+            extended_mixing: Also accept energy boost and diagonal key changes
+            weights: Weight per audio feature in the distance (missing features weigh 1.0)
+            
+        Returns:
+            Dict with the seed's row, tempo and Camelot 'key_codes', the
+            filter parameters, the normalized query 'vector' and the feature
+            'weights' (None when unweighted)
             
-        return False
+        Raises:
+            ValueError: If the song is unknown or the weights are invalid
+        """
+        catalog = assets.catalog
+        
+        # Find the song in the FAISS index
+        base_row = catalog.row_of(base_song_id)
+        if base_row is None:
+            raise ValueError(f"Song ID {base_song_id} not found in FAISS index")
+        
+        # Compatibility type of every Camelot key relative to the seed
+        key_codes = CamelotKeysService.get_compatibility_codes(
+            int(catalog.camelot_key_id[base_row]), extended_mixing
+        )
+        
+        # Start from the song's stored (already normalized) vector
+        query_vector = assets.stored_vector(base_row)
+        
+        # Apply overrides, normalized with the stored statistics
+        overrides = {
+            'danceability': danceability,
+            'energy': energy,
+            'loudness': loudness,
+            'speechiness': speechiness,
+            'acousticness': acousticness,
+            'instrumentalness': instrumentalness,
+            'liveness': liveness,
+            'valence': valence
+        }
+        for j, feature in enumerate(AUDIO_FEATURES):
+            value = overrides.get(feature.lower())
+            if value is not None:
+                query_vector[j] = (
+                    (value - assets.feature_stats['mean'][j]) / assets.feature_stats['std'][j]
+                )
+        
+        return {
+            'base_row': base_row,
+            'base_tempo': float(catalog.tempo[base_row]),
+            'key_codes': key_codes,
+            'tempo_tolerance': tempo_tolerance,
+            'start_year': start_year,
+            'end_year': end_year,
+            'vector': query_vector,
+            'weights': cls._weight_vector(weights)
+        }
+
+    @staticmethod
+    def _weight_vector(weights: Optional[Dict[str, float]]) -> Optional[np.ndarray]:
+        """
+        Validate per-feature weights and order them as AUDIO_FEATURES
+        Args:
+            weights: Weight per feature name; missing features weigh 1.0
+        Returns:
+            float32 weight vector, or None when every weight is 1.0 (plain L2 search)
+        Raises:
+            ValueError: On unknown features, negative weights or all-zero weights
+        """
+        if not weights:
+            return None
+        unknown = set(weights) - set(AUDIO_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown feature weights: {', '.join(sorted(unknown))}")
+        vector = np.array([weights.get(feature, 1.0) for feature in AUDIO_FEATURES], dtype=np.float32)
+        if not np.isfinite(vector).all() or (vector < 0).any():
+            raise ValueError("Feature weights must be non-negative numbers")
+        if not vector.any():
+            raise ValueError("At least one feature weight must be positive")
+        return None if (vector == 1.0).all() else vector
+
+    @classmethod
+    def _search_query(cls, assets: RecommendationAssets, query: Dict[str, Any], mask: np.ndarray,
+                      limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Filtered search for a prepared query with the configured engine
+        (on the FAISS weighted index if it has weights)
+        
+        Weighted FAISS scores are inner products, and recovering a distance as
+        offset - score cancels in float32 for close neighbours, reordering
+        near-ties. The weighted search therefore over-fetches candidates and
+        re-ranks them by their exact weighted distance, as the NumPy engine does.
+        Returns:
+            (distances, rows): squared L2 distances (weighted if applicable), nearest first
+        """
+        if cls._engine == 'numpy':
+            weights = None if query['weights'] is None else query['weights'][None, :]
+            return assets.exact_index().search(query['vector'][None, :], mask[None, :], limit, weights)[0]
+        
+        if query['weights'] is None:
+            return cls._filtered_search(assets.index, query['vector'].reshape(1, -1), mask, limit)
+        
+        augmented, _ = weighted_query(query['vector'], query['weights'])
+        _, rows = cls._filtered_search(assets.weighted_index(), augmented, mask, limit * cls.WEIGHTED_OVERFETCH)
+        diff = assets.all_vectors()[rows] - query['vector']
+        distances = (diff * diff) @ query['weights']
+        order = np.lexsort((rows, distances))[:limit]
+        return distances[order].astype(np.float32), rows[order]
+
+    @classmethod
+    def _format_results(cls, catalog: SongCatalog, distances: np.ndarray, rows: np.ndarray,
+                        key_codes: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Turn search hits into recommendation dicts
+        
+        Args:
+            catalog: Catalog the hits refer to
+            distances: L2 distances of the hits, nearest first
+            rows: FAISS rows of the hits
+            key_codes: Compatibility code per Camelot key ID for the seed
+            
+        Returns:
+            List of recommendations in hit order
+        """
+        similarities = 1.0 / (1.0 + distances)
+        types = key_codes[catalog.camelot_key_id[rows]]
+        return [
+            {
+                'song': catalog.serialize(int(row)),
+                'similarity': float(sim),
+                'compatibility_type': COMPATIBILITY_TYPES.get(int(code))
+            }
+            for sim, row, code in zip(similarities, rows, types)
+        ]
     
     @classmethod
     def get_similar_songs(
@@ -201,104 +746,229 @@ class RecommendationService:
         danceability: Optional[float] = None,
         energy: Optional[float] = None,
         loudness: Optional[float] = None,
-        limit: int = 100
+        speechiness: Optional[float] = None,
+        acousticness: Optional[float] = None,
+        instrumentalness: Optional[float] = None,
+        liveness: Optional[float] = None,
+        valence: Optional[float] = None,
+        limit: int = 100,
+        extended_mixing: bool = False,
+        weights: Optional[Dict[str, float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get DJ-optimized song recommendations using FAISS similarity search
         
         Args:
             base_song_id: Reference song ID
-            tempo_range: BPM range (+/-) for mixing compatibility
+            tempo_tolerance: BPM range (+/-) for mixing compatibility
             start_year/end_year: Filter by year range
-            danceability/energy/loudness: Override feature values in the query
+            danceability ... valence: Override feature values in the query
             limit: Maximum results to return
+            extended_mixing: Also accept energy boost and diagonal key changes
+            weights: Weight per audio feature in the distance (e.g., {'energy': 2.0});
+                     missing features weigh 1.0
             
         Returns:
-            List of song recommendations with similarity scores and metadata
+            List of song recommendations, each holding the serialized song
+            (see SongCatalog.serialize), its similarity score and compatibility type
         """
-        # Load index if needed
-        cls._load_assets()
+        # Merge with concurrent requests into one batched search, if enabled
+        if cls._coalescer is not None:
+            return cls._coalescer.submit({
+                'base_song_id': base_song_id,
+                'tempo_tolerance': tempo_tolerance,
+                'start_year': start_year,
+                'end_year': end_year,
+                'danceability': danceability,
+                'energy': energy,
+                'loudness': loudness,
+                'speechiness': speechiness,
+                'acousticness': acousticness,
+                'instrumentalness': instrumentalness,
+                'liveness': liveness,
+                'valence': valence,
+                'limit': limit,
+                'extended_mixing': extended_mixing,
+                'weights': weights
+            })
         
-        # Get base song from database
-        base_song =  SongService.get_song(base_song_id)
-        if not base_song:
-            raise ValueError(f"Song with ID {base_song_id} not found")
+        # Load index and catalog if needed; the whole request uses this snapshot
+        assets = cls._load_assets()
+        cls._apply_omp_threads()
         
-        # Find the song in the FAISS index
-        song_index = np.where(cls._song_ids == base_song_id)[0]
-        if len(song_index) == 0:
-            raise ValueError(f"Song ID {base_song_id} not found in FAISS index")
+        with metrics.timed('prepare'):
+            query = cls._prepare_query(
+                assets, base_song_id, tempo_tolerance, start_year, end_year,
+                danceability=danceability, energy=energy, loudness=loudness,
+                speechiness=speechiness, acousticness=acousticness,
+                instrumentalness=instrumentalness, liveness=liveness, valence=valence,
+                extended_mixing=extended_mixing, weights=weights
+            )
         
-        # Get compatible keys and their compatibility types
-        compatible_keys = CamelotKeysService.get_compatible_keys(
-            base_song.camelot_key_id, as_dict=True
-        )
-        compatible_key_ids = set(key['id'] for key in compatible_keys)
-        key_compatibility_types = {
-            key['id']: key['compatibility_type']
-            for key in compatible_keys
-        }
+        # Every hit is compatible; results are already nearest first
+        with metrics.timed('filter'):
+            mask = cls._compatible_rows(assets.catalog, query)
+        with metrics.timed('search'):
+            distances, rows = cls._search_query(assets, query, mask, limit)
+        with metrics.timed('format'):
+            return cls._format_results(assets.catalog, distances, rows, query['key_codes'])
+
+    @classmethod
+    def get_similar_songs_batch(
+        cls,
+        seeds: List[Dict[str, Any]]
+    ) -> Tuple[Dict[int, List[Dict[str, Any]]], Dict[int, str]]:
+        """
+        Get recommendations for several seed songs with one FAISS search.
+        
+        All query vectors are stacked and searched together; each seed then
+        keeps the compatible hits among its neighbours. Seeds left with fewer
+        than `limit` results fall back to the filtered single-seed search.
+        Seeds with feature weights are searched one at a time on the
+        weighted index.
+        
+        Args:
+            seeds: One dict per seed with 'base_song_id' plus any other
+                   get_similar_songs keyword arguments (overrides, limit, ...)
+            
+        Returns:
+            (results, errors): recommendations keyed by seed song ID, and an
+            error message for every seed that could not be served
+        """
+        assets = cls._load_assets()
+        cls._apply_omp_threads()
         
-        # Create query vector - either from song or with overrides
-        query_features = []
-        for feature in AUDIO_FEATURES:
-            feature = feature.lower()
-            if feature == 'danceability' and danceability is not None:
-                query_features.append(danceability)
-            elif feature == 'energy' and energy is not None:
-                query_features.append(energy)
-            elif feature == 'loudness' and loudness is not None:
-                query_features.append(loudness)
+        results, errors = {}, {}
+        for seed, outcome in zip(seeds, cls._search_batch(assets, seeds)):
+            if isinstance(outcome, ValueError):
+                errors[seed['base_song_id']] = str(outcome)
             else:
-                query_features.append(getattr(base_song, feature))
-        
-        # Normalize the query vector using stored statistics
-        query_vector = np.array([query_features], dtype=np.float32)
-        query_vector = (query_vector - cls._feature_stats['mean']) / cls._feature_stats['std']
-        
-        # Apply weights to query
-        # weights = np.array([FEATURE_WEIGHTS.get(feature.lower(), 1.0) 
-        #                   for feature in AUDIO_FEATURES], dtype=np.float32)
-        # query_vector = query_vector * weights
-        
-
-        # Search with FAISS – overfetch then filter in bulk
-        search_k = min(limit * 20, len(cls._song_ids))
-        distances, indices = cls._index.search(query_vector, search_k)
-        similarities = 1.0 / (1.0 + distances[0])
-
-        # Build list of (song_id, similarity), exclude base song
-        raw = [
-            (int(cls._song_ids[idx]), similarities[i])
-            for i, idx in enumerate(indices[0])
-            if int(cls._song_ids[idx]) != base_song_id
-        ][:search_k]
-
-        # Bulk-fetch songs from DB
-        ids = [sid for sid, _ in raw]
-        songs = Song.query.filter(Song.song_id.in_(ids)).all()
-        song_map = {s.song_id: s for s in songs}
-
-        # Filter and collect results
-        candidates = []
-        for song_id, sim in raw:
-            song = song_map.get(song_id)
-            if not song:
-                continue
-            if song.camelot_key_id not in compatible_key_ids:
-                continue
-            if not cls._is_compatible_tempo(base_song.tempo, song.tempo, tempo_tolerance):
-                continue
-            if song.year < start_year or song.year > end_year:
-                continue
-            candidates.append({
-                'song': song,
-                'similarity': float(sim),
-                'compatibility_type': key_compatibility_types.get(song.camelot_key_id)
-            })
-            if len(candidates) >= limit:
-                break
+                results[seed['base_song_id']] = outcome
+        return results, errors
 
-        # Final sort and return
-        candidates.sort(key=lambda x: x['similarity'], reverse=True)
-        return candidates
\ No newline at end of file
+    @classmethod
+    def _search_coalesced(cls, seeds: List[Dict[str, Any]]) -> List[Any]:
+        """Batch function for the request coalescer (runs on the batch leader's thread)"""
+        assets = cls._load_assets()
+        cls._apply_omp_threads()
+        return cls._search_batch(assets, seeds)
+
+    @classmethod
+    def _search_batch(
+        cls,
+        assets: RecommendationAssets,
+        seeds: List[Dict[str, Any]]
+    ) -> List[Union[List[Dict[str, Any]], ValueError]]:
+        """
+        Shared multi-seed search behind get_similar_songs_batch and request coalescing
+        
+        Args:
+            assets: Assets snapshot to query
+            seeds: get_similar_songs keyword arguments, one dict per seed
+                   (the same seed may appear more than once)
+            
+        Returns:
+            One entry per seed, in order: its recommendations, or the
+            ValueError raised while preparing its query
+        """
+        outcomes: List[Any] = [None] * len(seeds)
+        prepared = []
+        with metrics.timed('prepare'):
+            for i, seed in enumerate(seeds):
+                params = dict(seed)
+                seed_id = params.pop('base_song_id')
+                limit = params.pop('limit', 100)
+                try:
+                    prepared.append((i, limit, cls._prepare_query(assets, seed_id, **params)))
+                except ValueError as e:
+                    outcomes[i] = e
+        
+        catalog = assets.catalog
+        if cls._engine == 'numpy':
+            return cls._search_batch_exact(assets, prepared, outcomes)
+        
+        # Feature-weighted seeds search the weighted index one at a time
+        for slot, limit, query in prepared:
+            if query['weights'] is not None:
+                with metrics.timed('search'):
+                    seed_distances, seed_rows = cls._search_query(
+                        assets, query, cls._compatible_rows(catalog, query), limit
+                    )
+                with metrics.timed('format'):
+                    outcomes[slot] = cls._format_results(catalog, seed_distances, seed_rows, query['key_codes'])
+        prepared = [entry for entry in prepared if entry[2]['weights'] is None]
+        
+        if not prepared:
+            return outcomes
+        
+        # Single multi-row search over the stacked query matrix
+        with metrics.timed('search'):
+            queries = np.stack([query['vector'] for _, _, query in prepared])
+            k = min(max(limit for _, limit, _ in prepared) * cls.BATCH_OVERFETCH, len(assets.song_ids))
+            distances, indices = assets.index.search(queries, max(k, 1))
+        
+        # Check every hit of every seed in one vectorized pass
+        def column(name):
+            return np.array([query[name] for _, _, query in prepared])[:, None]
+        
+        with metrics.timed('filter'):
+            found = indices >= 0
+            hits = np.where(found, indices, 0)
+            keep, _ = cls._compatibility(
+                column('base_tempo'),
+                np.stack([query['key_codes'] for _, _, query in prepared]),
+                catalog.tempo[hits], catalog.camelot_key_id[hits], catalog.year[hits],
+                column('tempo_tolerance'), column('start_year'), column('end_year')
+            )
+            keep &= found & catalog.valid[hits] & (hits != column('base_row'))
+        
+        for i, (slot, limit, query) in enumerate(prepared):
+            seed_distances = distances[i][keep[i]][:limit]
+            seed_rows = indices[i][keep[i]][:limit]
+            
+            # Too few compatible songs among the shared neighbours
+            if len(seed_rows) < limit:
+                with metrics.timed('fallback_search'):
+                    seed_distances, seed_rows = cls._filtered_search(
+                        assets.index, query['vector'].reshape(1, -1), cls._compatible_rows(catalog, query), limit
+                    )
+            with metrics.timed('format'):
+                outcomes[slot] = cls._format_results(catalog, seed_distances, seed_rows, query['key_codes'])
+        
+        return outcomes
+
+    @classmethod
+    def _search_batch_exact(cls, assets: RecommendationAssets, prepared: List[Tuple[int, int, Dict[str, Any]]],
+                            outcomes: List[Any]) -> List[Any]:
+        """
+        _search_batch for the NumPy engine: one exact search of all seeds with their own masks
+        Args:
+            assets: Assets snapshot to query
+            prepared: (slot, limit, prepared query) per seed
+            outcomes: Outcomes list to fill in at each seed's slot
+        Returns:
+            The filled outcomes
+        """
+        if not prepared:
+            return outcomes
+        
+        catalog = assets.catalog
+        queries = [query for _, _, query in prepared]
+        with metrics.timed('filter'):
+            masks = np.stack([cls._compatible_rows(catalog, query) for query in queries])
+        
+        weights = None
+        if any(query['weights'] is not None for query in queries):
+            ones = np.ones(len(AUDIO_FEATURES), dtype=np.float32)
+            weights = np.stack([ones if query['weights'] is None else query['weights'] for query in queries])
+        
+        with metrics.timed('search'):
+            hits = assets.exact_index().search(
+                np.stack([query['vector'] for query in queries]), masks,
+                max(limit for _, limit, _ in prepared), weights
+            )
+        
+        for (slot, limit, query), (distances, rows) in zip(prepared, hits):
+            with metrics.timed('format'):
+                outcomes[slot] = cls._format_results(catalog, distances[:limit], rows[:limit], query['key_codes'])
+        return outcomes
@@ -0,0 +1,49 @@
+"""
+Production WSGI Entry Point
+
+Creates the application and loads the FAISS index, id mapping, feature
+statistics and song catalog at import time. Run with a preloading server
+so this happens once in the master process before workers are forked:
+the read-only NumPy arrays and index are then shared copy-on-write
+instead of being loaded by every worker on its first request.
+
+The master validates the assets with a single OpenMP thread, so it never
+starts libgomp's thread pool: the pool doesn't survive fork, and workers
+forked after it started can deadlock in their first parallel search.
+post_fork (gunicorn.conf.py) restores the thread count in each worker.
+
+Usage:
+    gunicorn -c backend/gunicorn.conf.py backend.api.wsgi:app
+"""
+
+import gc
+import logging
+
+import faiss
+
+from backend.api import create_app
+from backend.api.services.song_service import RecommendationService
+
+logger = logging.getLogger(__name__)
+
+app = create_app()
+
+# OpenMP threads to restore in forked workers (see restore_omp_threads)
+preload_omp_threads = faiss.omp_get_max_threads()
+faiss.omp_set_num_threads(1)
+
+with app.app_context():
+    try:
+        RecommendationService._load_assets()
+    except Exception as e:
+        # Keep serving; /api/health/ready reports 503 and requests retry the load
+        logger.error(f"Failed to preload recommendation assets: {e}")
+
+# Move everything allocated so far out of the garbage collector's view, so
+# collections in the workers don't write to (and un-share) these pages
+gc.freeze()
+
+
+def restore_omp_threads() -> None:
+    """Give a forked worker back the OpenMP thread count the master started with"""
+    faiss.omp_set_num_threads(preload_omp_threads)
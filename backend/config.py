@@ -40,10 +40,53 @@ class Config:
     Attributes:
         SQLALCHEMY_DATABASE_URI (str): Database connection string
         SQLALCHEMY_TRACK_MODIFICATIONS (bool): Disable SQLAlchemy event system
+        RECOMMENDATION_CACHE_* : Recommendation response cache settings
+        ADMIN_TOKEN (str): Token required by /api/admin (admin endpoints disabled if unset)
+        ASSET_WATCH_INTERVAL (float): Seconds between checks for new asset generations (0 disables)
+        RECOMMENDATION_ENGINE (str): 'faiss' (asset index) or 'numpy' (exact search over the vectors)
+        FAISS_OMP_THREADS (int): OpenMP threads per FAISS search (0 keeps the FAISS default)
+        RECOMMENDATION_COALESCE_* : Merging of concurrent recommendation searches
+        SERVER_TIMING (bool): Add a Server-Timing header with per-stage timings to responses
+        LOG_* : Queue-based, sampled logging (see services/logging_service.py)
     """
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Recommendation response cache (size 0 disables it)
+    # Backend "file" shares entries between worker processes through RECOMMENDATION_CACHE_DIR,
+    # keeping at most RECOMMENDATION_CACHE_FILE_SIZE files there
+    RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024"))
+    RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))
+    RECOMMENDATION_CACHE_QUANTUM = float(os.getenv("RECOMMENDATION_CACHE_QUANTUM", "0.01"))
+    RECOMMENDATION_CACHE_BACKEND = os.getenv("RECOMMENDATION_CACHE_BACKEND", "memory")
+    RECOMMENDATION_CACHE_DIR = os.getenv("RECOMMENDATION_CACHE_DIR", "/tmp/djsongmatch-cache")
+    RECOMMENDATION_CACHE_FILE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_FILE_SIZE", "10000"))
+
+    # Hot-reload of recommendation assets (see routes/admin.py and services/asset_watcher.py)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+    ASSET_WATCH_INTERVAL = float(os.getenv("ASSET_WATCH_INTERVAL", "0"))
+
+    # Search engine: 'faiss' searches the asset bundle's index; 'numpy' runs an exact
+    # matrix search over the normalized vectors (see services/exact_search.py)
+    RECOMMENDATION_ENGINE = os.getenv("RECOMMENDATION_ENGINE", "faiss")
+
+    # Search concurrency: concurrent single-seed searches arriving within the
+    # window (milliseconds, 0 disables) are run as one batched FAISS search
+    FAISS_OMP_THREADS = int(os.getenv("FAISS_OMP_THREADS", "0"))
+    RECOMMENDATION_COALESCE_WINDOW_MS = float(os.getenv("RECOMMENDATION_COALESCE_WINDOW_MS", "0"))
+    RECOMMENDATION_COALESCE_MAX_BATCH = int(os.getenv("RECOMMENDATION_COALESCE_MAX_BATCH", "32"))
+
+    # Per-stage timings in a Server-Timing response header (metrics are always served on /metrics)
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+    # Logging: with LOG_QUEUE, request threads only enqueue records and a background
+    # thread writes them; LOG_SAMPLE_RATE keeps INFO/DEBUG logs of that share of requests
+    LOG_QUEUE = os.getenv("LOG_QUEUE", "false").lower() in ("1", "true", "yes")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
 class DevelopmentConfig(Config):
     """
     Development configuration
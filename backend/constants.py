@@ -17,7 +17,43 @@ AUDIO_FEATURES = [
     'valence'
 ]
 
+# Standard Camelot wheel keys as (id, key, mode, key_str)
+# IDs are mapped using the Camelot wheel numbering system:
+#   minors (Camelot wheel 1-12A) : 1-12
+#   majors (Camelot wheel 1-12B) : 13-24
+# Keys are mapped 0-11 in Alphabetical order starting at C
+# Mode is mapped as:
+#   minor : 0
+#   major : 1
+CAMELOT_KEYS = [
+    (1, 8, 0, "G#/Ab min"),
+    (2, 3, 0, "D#/Eb min"),
+    (3, 10, 0, "A#/Bb min"),
+    (4, 5, 0, "F min"),
+    (5, 0, 0, "C min"),
+    (6, 7, 0, "G min"),
+    (7, 2, 0, "D min"),
+    (8, 9, 0, "A min"),
+    (9, 4, 0, "E min"),
+    (10, 11, 0, "B min"),
+    (11, 6, 0, "F#/Gb min"),
+    (12, 1, 0, "C#/Db min"),
+    (13, 11, 1, "B Maj"),
+    (14, 6, 1, "F#/Gb Maj"),
+    (15, 1, 1, "C#/Db Maj"),
+    (16, 8, 1, "G#/Ab Maj"),
+    (17, 3, 1, "D#/Eb Maj"),
+    (18, 10, 1, "A#/Bb Maj"),
+    (19, 5, 1, "F Maj"),
+    (20, 0, 1, "C Maj"),
+    (21, 7, 1, "G Maj"),
+    (22, 2, 1, "D Maj"),
+    (23, 9, 1, "A Maj"),
+    (24, 4, 1, "E Maj"),
+]
+
 # Path configurations
+import os
 from pathlib import Path
 
 # Base paths
@@ -32,4 +68,11 @@ PROCESSED_CSV_PATH = ASSETS_DIR / "Processed_ClassicHit.csv"
 KMEANS_MODEL_PATH = ASSETS_DIR / "kmeans_model.pkl"
 FAISS_INDEX_PATH = ASSETS_DIR / "faiss_index.bin"
 FAISS_IDS_PATH = ASSETS_DIR / "faiss_song_ids.pkl"
-FEATURE_STATS_PATH = ASSETS_DIR / "feature_stats.pkl"
\ No newline at end of file
+FAISS_ROWS_PATH = ASSETS_DIR / "faiss_song_rows.pkl"
+FEATURE_STATS_PATH = ASSETS_DIR / "feature_stats.pkl"
+# Fitted quantile scaling of the raw audio features (see scripts/operations/pre_process.py)
+QUANTILE_TRANSFORM_PATH = ASSETS_DIR / "quantile_transform.npz"
+
+# Versioned, memory-mapped recommendation asset bundles (see api/services/asset_bundle.py)
+# ASSET_BUNDLES_DIR points the app and the index builder elsewhere (e.g., a synthetic catalog)
+BUNDLES_DIR = Path(os.getenv("ASSET_BUNDLES_DIR", ASSETS_DIR / "bundles"))
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Gunicorn configuration for production serving
+
+Usage:
+    gunicorn -c backend/gunicorn.conf.py backend.api.wsgi:app
+
+Settings can be overridden with environment variables:
+    PORT             Port to bind (default 5001)
+    WEB_CONCURRENCY  Number of worker processes (default: CPU count)
+    WEB_THREADS      Threads per worker (default 4)
+    FAISS_OMP_THREADS  OpenMP threads per FAISS search (default 1 here: requests
+                       already run in parallel across workers and threads)
+    LOG_QUEUE        Write logs from a background thread (default on here, see config.py)
+
+Set ASSET_WATCH_INTERVAL (see config.py) to have every worker pick up new
+asset generations without a restart.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.getenv("WEB_THREADS", "4"))
+worker_class = "gthread"
+timeout = 60
+
+# One OpenMP thread per search unless overridden, so workers x threads don't oversubscribe the CPUs
+os.environ.setdefault("FAISS_OMP_THREADS", "1")
+
+# Keep log I/O off the request threads
+os.environ.setdefault("LOG_QUEUE", "1")
+
+# Import the app (and load recommendation assets) once in the master, then fork
+preload_app = True
+
+
+def post_fork(server, worker):
+    """
+    Give each worker its own database connections instead of the master's,
+    its own asset watcher and log listener (threads don't survive fork), and
+    the OpenMP thread count the master held at 1 while preloading
+    """
+    from backend.api.extensions import db, request_logging
+    from backend.api.services.asset_watcher import AssetWatcher
+    from backend.api.wsgi import app, restore_omp_threads
+
+    restore_omp_threads()
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    request_logging.start()
+
+    interval = app.config.get('ASSET_WATCH_INTERVAL', 0)
+    if interval > 0:
+        AssetWatcher(app, interval).start()
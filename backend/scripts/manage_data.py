@@ -10,47 +10,130 @@ Commands:
     process     Transform raw CSV data into normalized format
     seed        Initialize a fresh database with data
     update      Update existing database records
+    migrate     Add columns and indexes missing from an existing database
     index       Build the FAISS similarity index
+    benchmark   Compare FAISS index types and the NumPy engine (recall and latency)
+    generate    Generate a synthetic raw catalog of any size (CSV or Parquet)
+    loadtest    Load test the songs API (throughput, latency, DB queries)
     all         Process, seed and build index in one step
 """
 
 import argparse
 import logging
-from backend.constants import RAW_CSV_PATH, PROCESSED_CSV_PATH
+from backend.constants import RAW_CSV_PATH, PROCESSED_CSV_PATH, BUNDLES_DIR
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Import operations from the operations subfolder
-from backend.scripts.operations.pre_process import process_data
+from backend.scripts.operations.pre_process import process_data, process_data_chunked, process_new_songs
 from backend.scripts.operations.seed import seed_database
 from backend.scripts.operations.update import update_existing_songs
-from backend.scripts.operations.index import build_faiss_index
+from backend.scripts.operations.migrate import migrate_database
+from backend.scripts.operations.index import DEFAULT_DRIFT_THRESHOLD, build_faiss_index
+from backend.scripts.operations.benchmark import BENCHMARK_TYPES, benchmark_indexes
+from backend.scripts.operations.synthesize import write_synthetic_catalog
+from backend.scripts.operations.loadtest import run_load_test, save_results, compare_results
+from backend.api.services.index_factory import DEFAULT_INDEX_TYPE, INDEX_TYPES
 
 # Create Flask app context for database operations
 from backend.api import create_app
 
+def add_index_arguments(parser):
+    """Index parameters shared by the index and benchmark commands (defaults in index_factory.py)"""
+    parser.add_argument('--nlist', type=int, help='IVF: number of cells')
+    parser.add_argument('--nprobe', type=int, help='IVF: cells searched per query')
+    parser.add_argument('--pq-m', type=int, help='IVFPQ: sub-quantizers (must divide the dimension)')
+    parser.add_argument('--pq-bits', type=int, help='IVFPQ: bits per sub-quantizer code')
+    parser.add_argument('--m', type=int, help='HNSW: neighbours per node')
+    parser.add_argument('--ef-construction', type=int, help='HNSW: build-time candidate list size')
+    parser.add_argument('--ef-search', type=int, help='HNSW: search-time candidate list size')
+
+def index_params(args) -> dict:
+    """Index parameters given on the command line"""
+    names = ['nlist', 'nprobe', 'pq_m', 'pq_bits', 'm', 'ef_construction', 'ef_search']
+    return {name: getattr(args, name) for name in names if getattr(args, name) is not None}
+
 def main():
     parser = argparse.ArgumentParser(description="DJ Song Match Data Management Tool")
     subparsers = parser.add_subparsers(dest='command', help='Command to run')
     
     # Process command
     process_parser = subparsers.add_parser('process', help='Process raw data into normalized format')
-    process_parser.add_argument('--input', default=str(RAW_CSV_PATH), help='Input CSV path')
-    process_parser.add_argument('--output', default=str(PROCESSED_CSV_PATH), help='Output CSV path')
+    process_parser.add_argument('--input', default=str(RAW_CSV_PATH), help='Input path (.csv or .parquet)')
+    process_parser.add_argument('--output', default=str(PROCESSED_CSV_PATH), help='Output path (.csv or .parquet)')
+    process_parser.add_argument('--chunk-size', type=int,
+                                help='Process in chunks of this many songs on a process pool (bounded memory)')
+    process_parser.add_argument('--workers', type=int,
+                                help='Worker processes for chunked processing (default: CPU count)')
+    process_parser.add_argument('--incremental', action='store_true',
+                                help='Input holds only new songs: scale them with the saved quantile transform '
+                                     'and append them to the output')
+    process_parser.add_argument('--transform-path',
+                                help='Quantile transform to save (full runs) or apply (--incremental); defaults to '
+                                     'the asset for the default output, otherwise a file next to the output')
     
     # Seed command
     seed_parser = subparsers.add_parser('seed', help='Initialize database with song data')
     seed_parser.add_argument('--no-refresh', action='store_true', help='Don\'t drop existing tables')
-    seed_parser.add_argument('--csv', help='Custom CSV path to import from')
+    seed_parser.add_argument('--csv', help='Custom CSV or Parquet path to import from')
     
     # Update command
     update_parser = subparsers.add_parser('update', help='Update existing database records')
     update_parser.add_argument('--retry', action='store_true', help='Only retry previously failed updates')
+    update_parser.add_argument('--csv', help='Custom CSV or Parquet path to update from')
     
     # Index command  
     index_parser = subparsers.add_parser('index', help='Build FAISS similarity index')
+    index_parser.add_argument('--type', choices=INDEX_TYPES, default=DEFAULT_INDEX_TYPE, help='Index type')
+    index_parser.add_argument('--bundle-dir', default=str(BUNDLES_DIR), help='Directory to publish the asset bundle to')
+    index_parser.add_argument('--incremental', action='store_true',
+                              help='Update the active bundle with the songs changed since it was built')
+    index_parser.add_argument('--drift-threshold', type=float, default=DEFAULT_DRIFT_THRESHOLD,
+                              help='Fraction of songs changed since the last full build that triggers a full build')
+    add_index_arguments(index_parser)
+    
+    # Benchmark command
+    benchmark_parser = subparsers.add_parser('benchmark', help='Compare FAISS index types and the NumPy engine (recall and latency)')
+    benchmark_parser.add_argument('--csv', default=str(PROCESSED_CSV_PATH), help='Processed CSV or Parquet path')
+    benchmark_parser.add_argument('--types', nargs='+', choices=BENCHMARK_TYPES, default=list(BENCHMARK_TYPES),
+                                  help='Index types to compare')
+    benchmark_parser.add_argument('--k', type=int, default=50, help='Neighbours per query')
+    benchmark_parser.add_argument('--queries', type=int, default=500, help='Number of queries')
+    benchmark_parser.add_argument('--selectivity', type=float, default=0.1,
+                                  help='Fraction of songs each filtered query may return')
+    benchmark_parser.add_argument('--threads', type=int, default=1, help='FAISS OpenMP threads')
+    add_index_arguments(benchmark_parser)
+    
+    # Generate command
+    generate_parser = subparsers.add_parser('generate', help='Generate a synthetic raw catalog for scaling tests')
+    generate_parser.add_argument('--rows', type=int, required=True, help='Number of songs to generate')
+    generate_parser.add_argument('--output', required=True, help='Output path (.csv or .parquet)')
+    generate_parser.add_argument('--source', default=str(RAW_CSV_PATH), help='Raw CSV whose distributions are reproduced')
+    generate_parser.add_argument('--chunk-size', type=int, default=1_000_000, help='Songs generated per chunk')
+    generate_parser.add_argument('--jitter', type=float, default=0.05,
+                                 help='Noise as a fraction of each column\'s standard deviation')
+    generate_parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    
+    # Load test command
+    loadtest_parser = subparsers.add_parser('loadtest', help='Load test the songs API')
+    loadtest_parser.add_argument('--requests', type=int, default=2000, help='Measured requests')
+    loadtest_parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+    loadtest_parser.add_argument('--warmup', type=int, default=50, help='Unmeasured warm-up requests')
+    loadtest_parser.add_argument('--random-seed', type=int, default=0, help='Random seed for the request mix')
+    loadtest_parser.add_argument('--base-url', help='Drive a running server instead of an in-process app')
+    loadtest_parser.add_argument('--database-url', help='Database to test against (default: DATABASE_URL)')
+    loadtest_parser.add_argument('--seed', nargs='?', const=True, metavar='CSV',
+                                 help='Seed the database first (optionally from a processed CSV)')
+    loadtest_parser.add_argument('--no-cache', action='store_true', help='Disable the recommendation cache')
+    loadtest_parser.add_argument('--engine', choices=['faiss', 'numpy'],
+                                 help='Recommendation search engine (default: RECOMMENDATION_ENGINE)')
+    loadtest_parser.add_argument('--output', help='Results JSON path (default: loadtest-<commit>.json)')
+    loadtest_parser.add_argument('--compare', help='Earlier results JSON to compare with')
+    
+    # Migrate command
+    subparsers.add_parser('migrate', help='Add columns and indexes missing from an existing database')
     
     # All command
     all_parser = subparsers.add_parser('all', help='Process, seed and build index')
@@ -59,7 +142,14 @@ def main():
     args = parser.parse_args()
     
     if args.command == 'process':
-        process_data(input_path=args.input, output_path=args.output)
+        if args.incremental:
+            process_new_songs(input_path=args.input, output_path=args.output, transform_path=args.transform_path)
+        elif args.chunk_size or args.workers:
+            process_data_chunked(input_path=args.input, output_path=args.output,
+                                 chunk_size=args.chunk_size or 500_000, workers=args.workers,
+                                 transform_path=args.transform_path)
+        else:
+            process_data(input_path=args.input, output_path=args.output, transform_path=args.transform_path)
     elif args.command == 'seed':
         app = create_app()
         with app.app_context():
@@ -67,9 +157,40 @@ def main():
     elif args.command == 'update':
         app = create_app()
         with app.app_context():
-            update_existing_songs(retry_only=args.retry)
+            update_existing_songs(csv_path=args.csv, retry_only=args.retry)
+    elif args.command == 'migrate':
+        app = create_app()
+        with app.app_context():
+            migrate_database()
     elif args.command == 'index':
-        build_faiss_index()
+        build_faiss_index(args.type, bundle_dir=args.bundle_dir, incremental=args.incremental,
+                          drift_threshold=args.drift_threshold, **index_params(args))
+    elif args.command == 'benchmark':
+        benchmark_indexes(
+            csv_path=args.csv, index_types=args.types, k=args.k, num_queries=args.queries,
+            selectivity=args.selectivity, threads=args.threads, **index_params(args)
+        )
+    elif args.command == 'generate':
+        write_synthetic_catalog(
+            args.rows, args.output, source_path=args.source,
+            chunk_size=args.chunk_size, jitter=args.jitter, seed=args.seed
+        )
+    elif args.command == 'loadtest':
+        overrides = {}
+        if args.database_url:
+            overrides['SQLALCHEMY_DATABASE_URI'] = args.database_url
+        if args.no_cache:
+            overrides['RECOMMENDATION_CACHE_SIZE'] = 0
+        if args.engine:
+            overrides['RECOMMENDATION_ENGINE'] = args.engine
+        results = run_load_test(
+            num_requests=args.requests, concurrency=args.concurrency, warmup=args.warmup,
+            seed=args.random_seed, base_url=args.base_url, config_overrides=overrides,
+            seed_database_from=args.seed
+        )
+        save_results(results, args.output)
+        if args.compare:
+            compare_results(results, args.compare)
     elif args.command == 'all':
         # Process the data
         process_data()
@@ -0,0 +1,157 @@
+"""
+FAISS Index Benchmark
+
+Compares the supported index types on the processed song features:
+recall@k against an exact IndexFlatL2 baseline, and single-query latency
+(p50/p99). Both plain k-NN search and the filtered search used for
+recommendations (a bitmap of allowed rows, see
+RecommendationService._filtered_search) are measured.
+
+Type 'numpy' measures the exact NumPy engine (RECOMMENDATION_ENGINE=numpy,
+see services/exact_search.py) the same way, with the mask applied before
+selection.
+
+Usage:
+    python -m backend.scripts.manage_data benchmark
+    python -m backend.scripts.manage_data benchmark --types flat hnsw --k 50 --ef-search 128
+    python -m backend.scripts.manage_data benchmark --types flat ivfflat numpy
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import faiss
+import numpy as np
+
+from backend.api.services.exact_search import ExactIndex
+from backend.api.services.index_factory import INDEX_TYPES, create_index, describe_index
+from backend.api.services.song_service import RecommendationService
+from backend.constants import AUDIO_FEATURES, PROCESSED_CSV_PATH
+from backend.scripts.operations.data_files import read_table
+from backend.scripts.operations.index import normalize_features
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Index types plus the exact NumPy engine
+BENCHMARK_TYPES = INDEX_TYPES + ('numpy',)
+
+def load_feature_matrix(csv_path: Union[str, Path] = PROCESSED_CSV_PATH) -> np.ndarray:
+    """
+    Read the audio features from the processed CSV or Parquet file
+    Args:
+        csv_path: Processed CSV or Parquet file (columns named as capitalized AUDIO_FEATURES)
+    Returns:
+        float32 matrix ordered as AUDIO_FEATURES
+    """
+    columns = [feature.capitalize() for feature in AUDIO_FEATURES]
+    return read_table(csv_path, columns=columns)[columns].to_numpy(dtype='float32')
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of each query's true neighbours that were found"""
+    hits = [
+        len(np.intersect1d(f[f >= 0], t[t >= 0])) / max(1, int((t >= 0).sum()))
+        for f, t in zip(found, truth)
+    ]
+    return float(np.mean(hits))
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+def _run_queries(index: Union[faiss.Index, ExactIndex], queries: np.ndarray, k: int,
+                 masks: Optional[np.ndarray] = None):
+    """
+    Search one query at a time, timing each call
+    Returns:
+        (rows, latencies): (num_queries, k) rows padded with -1, and milliseconds per query
+    """
+    rows = np.full((len(queries), k), -1, dtype=np.int64)
+    latencies = []
+    for i in range(len(queries)):
+        query = queries[i:i + 1]
+        start = time.perf_counter()
+        if isinstance(index, ExactIndex):
+            _, found = index.search(query, None if masks is None else masks[i:i + 1], k)[0]
+        elif masks is None:
+            _, found = index.search(query, k)
+            found = found[0]
+        else:
+            _, found = RecommendationService._filtered_search(index, query, masks[i], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        rows[i, :len(found)] = found
+    return rows, latencies
+
+def benchmark_indexes(
+    csv_path: Union[str, Path] = PROCESSED_CSV_PATH,
+    index_types: Sequence[str] = BENCHMARK_TYPES,
+    k: int = 50,
+    num_queries: int = 500,
+    selectivity: float = 0.1,
+    threads: int = 1,
+    seed: int = 0,
+    **index_params
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark index types against exact search
+    Args:
+        csv_path: Processed CSV with the song features
+        index_types: Index types to measure (index_factory.INDEX_TYPES, or 'numpy')
+        k: Neighbours per query
+        num_queries: Queries sampled from the songs themselves
+        selectivity: Fraction of rows each filtered query may return
+        threads: FAISS OpenMP threads (1 matches the gunicorn default)
+        seed: Random seed for query and filter sampling
+        **index_params: Overrides for index_factory.DEFAULT_INDEX_PARAMS
+    Returns:
+        One dict of measurements per index type
+    """
+    faiss.omp_set_num_threads(threads)
+
+    logger.info(f"Loading features from {csv_path}...")
+    X_normalized, _ = normalize_features(load_feature_matrix(csv_path))
+    n = len(X_normalized)
+
+    rng = np.random.default_rng(seed)
+    queries = X_normalized[rng.choice(n, size=min(num_queries, n), replace=False)]
+    masks = rng.random((len(queries), n)) < selectivity
+    logger.info(f"{n} songs, {len(queries)} queries, k={k}, filters keep {selectivity:.0%} of songs")
+
+    # Ground truth from exact search
+    exact, _ = create_index(X_normalized, 'flat')
+    truth, _ = _run_queries(exact, queries, k)
+    truth_filtered, _ = _run_queries(exact, queries, k, masks)
+
+    results = []
+    for index_type in index_types:
+        start = time.perf_counter()
+        if index_type == 'numpy':
+            index = ExactIndex(X_normalized)
+        else:
+            index, _ = create_index(X_normalized, index_type, **index_params)
+        build_seconds = time.perf_counter() - start
+
+        rows, latencies = _run_queries(index, queries, k)
+        filtered_rows, filtered_latencies = _run_queries(index, queries, k, masks)
+
+        result = {
+            'index': 'ExactIndex(numpy)' if index_type == 'numpy' else describe_index(index),
+            'build_s': build_seconds,
+            'recall': _recall(rows, truth),
+            **_percentiles(latencies),
+            'filtered_recall': _recall(filtered_rows, truth_filtered),
+            **{f"filtered_{name}": value for name, value in _percentiles(filtered_latencies).items()},
+        }
+        results.append(result)
+        logger.info(
+            f"{result['index']:<40} build {result['build_s']:6.2f}s | "
+            f"recall@{k} {result['recall']:.3f} p50 {result['p50_ms']:.3f}ms p99 {result['p99_ms']:.3f}ms | "
+            f"filtered recall {result['filtered_recall']:.3f} "
+            f"p50 {result['filtered_p50_ms']:.3f}ms p99 {result['filtered_p99_ms']:.3f}ms"
+        )
+
+    return results
@@ -0,0 +1,206 @@
+"""
+Tabular Data Files
+
+Reading and writing the pipeline's song tables as CSV or Parquet, chosen
+by file extension (.parquet is Parquet, anything else CSV), so every
+command accepts either format.
+
+Parquet stores typed columns: readers load only the columns they ask for
+without parsing text, and files are several times smaller. Writers apply
+explicit dtypes so every chunk of a file has the same schema. pyarrow is
+imported lazily, so CSV-only use doesn't need it.
+
+Usage:
+    from backend.scripts.operations.data_files import iter_table, read_table, TableWriter
+    features = read_table('processed.parquet', columns=['Song_ID', 'Energy'])
+    with TableWriter('processed.parquet', dtypes=PROCESSED_DTYPES) as writer:
+        for chunk in iter_table('raw.csv', chunk_size=100_000):
+            writer.write(transform(chunk))
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+def is_parquet(path: PathLike) -> bool:
+    """Whether a path is read and written as Parquet"""
+    return Path(path).suffix == '.parquet'
+
+
+def _select_dtypes(dtypes: Optional[Dict[str, object]], columns: Optional[Sequence[str]]) -> Optional[Dict[str, object]]:
+    if dtypes is None or columns is None:
+        return dtypes
+    return {column: dtype for column, dtype in dtypes.items() if column in columns}
+
+
+def read_table(
+    path: PathLike,
+    columns: Optional[Sequence[str]] = None,
+    dtypes: Optional[Dict[str, object]] = None
+) -> pd.DataFrame:
+    """
+    Read a whole table
+    Args:
+        path: CSV or Parquet file
+        columns: Columns to read, in file order (None reads all)
+        dtypes: Column dtypes to apply (CSV: while parsing)
+    Returns:
+        DataFrame with a RangeIndex
+    """
+    dtypes = _select_dtypes(dtypes, columns)
+    if not is_parquet(path):
+        return pd.read_csv(path, usecols=columns, dtype=dtypes)
+
+    import pyarrow.parquet as pq
+    df = pq.read_table(path, columns=list(columns) if columns is not None else None).to_pandas()
+    return df.astype(dtypes) if dtypes else df
+
+
+def iter_table(
+    path: PathLike,
+    chunk_size: int,
+    columns: Optional[Sequence[str]] = None,
+    dtypes: Optional[Dict[str, object]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a table in chunks
+    Args:
+        path: CSV or Parquet file
+        chunk_size: Rows per chunk
+        columns: Columns to read, in file order (None reads all)
+        dtypes: Column dtypes to apply (CSV: while parsing)
+    Yields:
+        DataFrames indexed by row number in the file (the index continues across chunks)
+    """
+    dtypes = _select_dtypes(dtypes, columns)
+    if not is_parquet(path):
+        yield from pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_size)
+        return
+
+    import pyarrow.parquet as pq
+    offset = 0
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(columns) if columns is not None else None):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk.astype(dtypes) if dtypes else chunk
+
+
+class TableWriter:
+    """
+    Writes a table chunk by chunk (use as a context manager)
+
+    Rows are written to a new file, <name>.tmp, that replaces the original
+    on close. With append=True, rows are added after those of an existing
+    file: CSV files are appended to in place instead, while Parquet files
+    can't be, so their rows are first copied, batch by batch, into the new
+    file.
+
+    If an exception leaves the with block, the new file is discarded and
+    the original is kept unchanged. A CSV append has no rollback: the rows
+    written before the failure stay in the file.
+    """
+
+    def __init__(self, path: PathLike, dtypes: Optional[Dict[str, object]] = None, append: bool = False):
+        """
+        Args:
+            path: CSV or Parquet file
+            dtypes: Column dtypes applied to every chunk (the Parquet schema)
+            append: Keep the rows of an existing file
+        """
+        self.path = Path(path)
+        self.dtypes = dtypes
+        self.parquet = is_parquet(path)
+        self.append = append and self.path.exists()
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        # Only CSV appends write to the file itself
+        in_place = self.append and not self.parquet
+        self._target = self.path if in_place else self.path.with_name(self.path.name + '.tmp')
+
+        if self.parquet and self.append:
+            # Copy the existing rows into the new file
+            import pyarrow.parquet as pq
+            try:
+                for batch in pq.ParquetFile(self.path).iter_batches():
+                    self.write(batch.to_pandas())
+            except BaseException:
+                self.close(discard=True)
+                raise
+            self.rows = 0
+        elif not self.parquet:
+            self._file = open(self._target, 'a' if self.append else 'w', newline='')
+
+    def write(self, chunk: Union[pd.DataFrame, str]) -> None:
+        """
+        Write rows
+        Args:
+            chunk: DataFrame, or CSV text already formatted with a header
+                   only for a new file's first chunk (CSV files only)
+        """
+        if isinstance(chunk, str):
+            if self.parquet:
+                raise ValueError("CSV text can only be written to CSV files")
+            self._file.write(chunk)
+            return
+
+        if self.dtypes:
+            chunk = chunk.astype(self.dtypes)
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._target, table.schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self._file, header=self.rows == 0 and not self.append, index=False)
+        self.rows += len(chunk)
+
+    def close(self, discard: bool = False) -> None:
+        """
+        Finish the file
+        Args:
+            discard: Drop the new file instead of replacing the original
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._target != self.path and self._target.exists():
+            if discard:
+                self._target.unlink()
+            else:
+                os.replace(self._target, self.path)
+
+    def __enter__(self) -> 'TableWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close(discard=exc_type is not None)
+
+
+def write_table(df: pd.DataFrame, path: PathLike, dtypes: Optional[Dict[str, object]] = None,
+                append: bool = False) -> None:
+    """
+    Write a whole table (see TableWriter)
+    Args:
+        df: Rows to write
+        path: CSV or Parquet file
+        dtypes: Column dtypes to apply
+        append: Keep the rows of an existing file
+    """
+    with TableWriter(path, dtypes=dtypes, append=append) as writer:
+        writer.write(df)
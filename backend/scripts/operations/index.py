@@ -4,88 +4,274 @@ FAISS Index Builder
 Builds a vector similarity search index for all songs in the database,
 enabling fast nearest-neighbor searches based on audio features.
 
+The index, id mapping, feature statistics, normalized vectors and song
+catalog columns are published together as a versioned asset bundle
+(see backend/api/services/asset_bundle.py).
+
+The index type and its parameters are configurable (see
+backend/api/services/index_factory.py); the chosen search parameters are
+recorded in the bundle manifest. Use the `benchmark` command to compare
+the options before changing them.
+
+Incremental builds (--incremental) start from the active bundle and
+re-read only the songs whose updated_at is newer than the bundle's
+watermark, plus the list of song IDs to find deletions. Rows keep their
+numbers, which the service's filters, catalog and vectors are aligned to:
+changed songs are updated in place, new songs appended and deleted songs
+marked invalid (their rows stay, but are never returned). The feature
+statistics and any trained IVF quantizer are reused:
+- IVF: changed rows are removed (remove_ids) and re-added under their row
+  number (add_with_ids), so the quantizer isn't retrained
+- HNSW: new rows are appended to the graph; changed vectors need a full
+  build, since the graph can't move a node
+- Flat: refilled from the stored vectors (nothing to train)
+Once the songs changed since the last full build exceed the drift
+threshold (a fraction of the songs it indexed), a full build runs instead,
+as it does when the database lacks songs.updated_at (run the `migrate`
+command). updated_at only changes on inserts and ORM updates: raw SQL or
+COPY-based updates must set it, or incremental builds miss those rows.
+updated_at is the start time of the writing transaction (now() on
+PostgreSQL), so a row can commit after a build with an updated_at before
+it: the watermark is set WATERMARK_MARGIN before the build read the
+database, and songs re-read without a real change are ignored. Writes in
+transactions running longer than the margin can still be missed.
+
 Usage:
     python -m backend.scripts.manage_data index
+    python -m backend.scripts.manage_data index --type ivfflat --nlist 100 --nprobe 10
+    python -m backend.scripts.manage_data index --incremental --drift-threshold 0.2
 """
 
 import faiss
 import numpy as np
-from pathlib import Path
-import pickle
-import os
 import logging
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+from sqlalchemy import func, select
 
 from backend.api import create_app
 from backend.api.database.models import Song
-from backend.constants import (
-    AUDIO_FEATURES,
-    FAISS_INDEX_PATH,
-    FAISS_IDS_PATH,
-    FEATURE_STATS_PATH
-)
+from backend.api.extensions import db
+from backend.api.services.asset_bundle import AssetBundle
+from backend.api.services.catalog_service import SongCatalog, build_row_lookup
+from backend.api.services.index_factory import DEFAULT_INDEX_TYPE, create_index, describe_index
+from backend.constants import AUDIO_FEATURES, BUNDLES_DIR
+from backend.scripts.operations.migrate import has_updated_at
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def build_faiss_index():
-    """Build and save FAISS index for all songs in the database"""
+# Fraction of the songs indexed by the last full build that may change before
+# an incremental build retrains from scratch
+DEFAULT_DRIFT_THRESHOLD = 0.2
+
+# How long before a build the next incremental build starts re-reading songs:
+# covers transactions that set updated_at before the build and committed after it
+WATERMARK_MARGIN = timedelta(minutes=5)
+
+
+def normalize_features(X: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Standardize feature vectors for L2 search
+    Args:
+        X: Raw float32 feature matrix ordered as AUDIO_FEATURES
+    Returns:
+        (X_normalized, feature_stats): standardized float32 matrix and the
+        'mean'/'std' needed to normalize queries the same way
+    """
+    feature_stats = {
+        'mean': X.mean(axis=0),
+        'std': X.std(axis=0)
+    }
+    X_normalized = (X - feature_stats['mean']) / feature_stats['std']
+    return X_normalized.astype('float32'), feature_stats
+
+def _watermark() -> datetime:
+    """
+    Where the next incremental build starts re-reading songs: the database's clock (which
+    sets updated_at) less WATERMARK_MARGIN. now() is the transaction start time on
+    PostgreSQL, so the current time is read with clock_timestamp() there
+    """
+    clock = func.clock_timestamp() if db.engine.dialect.name == 'postgresql' else func.now()
+    return db.session.execute(select(clock)).scalar() - WATERMARK_MARGIN
+
+def _index_metadata(search_params, watermark: datetime, trained_count: int,
+                    changed_since_training: int = 0, **extra) -> dict:
+    """Manifest entries of a bundle, including the state incremental builds continue from"""
+    return {
+        'search_params': search_params,
+        'updated_watermark': watermark.isoformat(),
+        'trained_count': int(trained_count),
+        'changed_since_training': int(changed_since_training),
+        **extra,
+    }
+
+def build_faiss_index(index_type: str = DEFAULT_INDEX_TYPE, bundle_dir=BUNDLES_DIR, incremental: bool = False,
+                      drift_threshold: float = DEFAULT_DRIFT_THRESHOLD, **index_params):
+    """
+    Build and save FAISS index for all songs in the database
+    Args:
+        index_type: Index type from index_factory.INDEX_TYPES (full builds)
+        bundle_dir: Directory the asset bundle is published to
+        incremental: Update the active bundle with the songs changed since it was built
+        drift_threshold: Fraction of changed songs that makes an incremental build a full one
+        **index_params: Overrides for index_factory.DEFAULT_INDEX_PARAMS (full builds)
+    """
     logger.info("Starting FAISS index building process")
     
     app = create_app()
     with app.app_context():
-        # Query all songs
-        logger.info("Loading songs from database...")
-        songs = Song.query.all()
-        logger.info(f"Found {len(songs)} songs")
+        if incremental:
+            previous = AssetBundle.current(bundle_dir)
+            if previous is None or 'trained_count' not in previous.manifest:
+                logger.info("No bundle with incremental build state found, running a full build")
+            elif not has_updated_at():
+                logger.warning("songs.updated_at is missing, so changed songs can't be found: running a full "
+                               "build (run 'python -m backend.scripts.manage_data migrate' to enable incremental builds)")
+            elif update_faiss_index(previous, bundle_dir, drift_threshold):
+                return
         
-        # Extract features and IDs
-        feature_matrix = []
-        song_ids = []
+        # Taken first, so songs changed while building are picked up by the next incremental build
+        watermark = _watermark()
         
-        logger.info("Extracting feature vectors...")
-        for song in songs:
-            # Create feature vector
-            features = [getattr(song, col.lower()) for col in AUDIO_FEATURES]
-            feature_matrix.append(features)
-            song_ids.append(song.song_id)
+        # Query the IDs and feature columns of all songs (no ORM objects)
+        logger.info("Loading song features from database...")
+        feature_columns = [getattr(Song, feature.lower()) for feature in AUDIO_FEATURES]
+        rows = db.session.execute(select(Song.song_id, *feature_columns)).all()
+        logger.info(f"Found {len(rows)} songs")
         
-        # Convert to numpy array and ensure float32 type for FAISS
-        X = np.array(feature_matrix).astype('float32')
-        song_ids = np.array(song_ids)
+        # Convert to numpy arrays, float32 for FAISS
+        table = np.array(rows, dtype=np.float64).reshape(len(rows), len(AUDIO_FEATURES) + 1)
+        song_ids = table[:, 0].astype(np.int64)
+        X = table[:, 1:].astype('float32')
         
-        # Calculate and save feature statistics for normalization during search
-        feature_stats = {
-            'mean': X.mean(axis=0),
-            'std': X.std(axis=0)
-        }
+        # Calculate feature statistics and normalize features (saved for query normalization)
+        X_normalized, feature_stats = normalize_features(X)
         
-        # Normalize features for cosine similarity
-        X_normalized = (X - feature_stats['mean']) / feature_stats['std']
+        # Build, train and fill the index
+        logger.info(f"Building {index_type} index...")
+        index, search_params = create_index(X_normalized, index_type, **index_params)
         
-        # Choose a quantizer and cluster count
-        quantizer = faiss.IndexFlatL2(dimension)
-        nlist = 100   
-        dimension = len(AUDIO_FEATURES)
-
-        # Build the index & train
-        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_L2)
-        index.train(X_normalized) 
+        # Snapshot the catalog columns in index row order
+        logger.info("Building song catalog...")
+        catalog = SongCatalog.from_database(song_ids)
+        arrays, strings = catalog.to_columns()
+        arrays.update({
+            'feature_mean': feature_stats['mean'],
+            'feature_std': feature_stats['std'],
+            'vectors': X_normalized,
+        })
         
-        # Add vectors to the index and tune search speed/accuracy
-        index.add(X_normalized)
-        index.nprobe = 10              # how many clusters to search (lower = faster)
-        
-        # Save the index, song IDs, and feature statistics
-        logger.info(f"Saving index to {FAISS_INDEX_PATH}")
-        os.makedirs(os.path.dirname(FAISS_INDEX_PATH), exist_ok=True)
-        faiss.write_index(index, str(FAISS_INDEX_PATH))
-        
-        logger.info(f"Saving song IDs to {FAISS_IDS_PATH}")
-        with open(FAISS_IDS_PATH, 'wb') as f:
-            pickle.dump(song_ids, f)
-            
-        logger.info(f"Saving feature statistics to {FEATURE_STATS_PATH}")
-        with open(FEATURE_STATS_PATH, 'wb') as f:
-            pickle.dump(feature_stats, f)
+        # Publish the index, song IDs, feature statistics and catalog as one bundle
+        bundle = AssetBundle.write(
+            arrays, strings, index,
+            metadata=_index_metadata(search_params, watermark, len(song_ids)),
+            root=bundle_dir
+        )
             
-        logger.info(f"✅ FAISS index built successfully with {len(song_ids)} songs")
\ No newline at end of file
+        logger.info(f"✅ {describe_index(index)} built successfully with {len(song_ids)} songs "
+                    f"(bundle {bundle.version})")
+
+def _unchanged_rows(old: SongCatalog, new: SongCatalog, rows: np.ndarray) -> np.ndarray:
+    """Which of the given rows hold the same, valid song in both catalogs"""
+    if not len(rows):
+        return np.zeros(0, dtype=bool)
+    same = np.asarray(old.valid)[rows] & new.valid[rows]
+    for name in SongCatalog.NUMERIC_COLUMNS:
+        equal = np.asarray(getattr(old, name))[rows] == getattr(new, name)[rows]
+        same &= equal.reshape(len(rows), -1).all(axis=1)
+    for name in SongCatalog.STRING_COLUMNS:
+        same &= np.array([getattr(old, name)[row] == (getattr(new, name)[row] or '') for row in rows], dtype=bool)
+    return same
+
+def update_faiss_index(previous: AssetBundle, bundle_dir=BUNDLES_DIR,
+                       drift_threshold: float = DEFAULT_DRIFT_THRESHOLD) -> bool:
+    """
+    Publish a bundle updated with the songs changed since `previous` was built (requires app context)
+    Args:
+        previous: Bundle to start from (written by build_faiss_index)
+        bundle_dir: Directory the asset bundle is published to
+        drift_threshold: Fraction of the songs of the last full build that may change
+    Returns:
+        True if the bundle is up to date, False if a full build is needed instead
+    """
+    manifest = previous.manifest
+    watermark = _watermark()
+    
+    # Songs changed since the previous build, and every current song ID (to find deletions)
+    changed = select(Song.song_id).where(Song.updated_at >= datetime.fromisoformat(manifest['updated_watermark']))
+    changed_ids = np.array(db.session.execute(changed).scalars().all(), dtype=np.int64)
+    current_ids = np.array(db.session.execute(select(Song.song_id)).scalars().all(), dtype=np.int64)
+    
+    old_catalog = SongCatalog.from_bundle(previous)
+    old_ids = np.array(previous.array('song_ids'), dtype=np.int64)
+    known = np.isin(changed_ids, old_ids)
+    new_ids = changed_ids[~known]
+    changed_rows = old_catalog.id_to_row[changed_ids[known]]
+    deleted_rows = np.flatnonzero(np.asarray(old_catalog.valid) & ~np.isin(old_ids, current_ids))
+    
+    # Grow the id mapping and catalog; new songs get the next rows
+    song_ids = np.concatenate([old_ids, new_ids])
+    new_rows = np.arange(len(old_ids), len(song_ids), dtype=np.int64)
+    id_to_row = build_row_lookup(song_ids)
+    catalog = old_catalog.updated(song_ids, id_to_row, np.concatenate([changed_rows, new_rows]), deleted_rows)
+    
+    # Songs re-read without a real change (e.g., within the watermark margin) don't count
+    changed_rows = changed_rows[~_unchanged_rows(old_catalog, catalog, changed_rows)]
+    changes = len(changed_rows) + len(new_ids) + len(deleted_rows)
+    if changes == 0:
+        logger.info(f"✅ Bundle {previous.version} is up to date")
+        return True
+    logger.info(f"{len(changed_rows)} changed, {len(new_ids)} new and {len(deleted_rows)} deleted songs "
+                f"since bundle {previous.version}")
+    
+    changed_since_training = manifest['changed_since_training'] + changes
+    if changed_since_training > drift_threshold * max(manifest['trained_count'], 1):
+        logger.info(f"{changed_since_training} songs changed since the last full build "
+                    f"(more than {drift_threshold:.0%} of {manifest['trained_count']}), running a full build")
+        return False
+    
+    index = previous.read_index(writable=True)
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    hnsw = getattr(faiss.downcast_index(index), 'hnsw', None) if ivf is None else None
+    if hnsw is not None and catalog.valid[changed_rows].any():
+        logger.info("HNSW graphs can't update vectors in place, running a full build")
+        return False
+    touched = np.concatenate([changed_rows, new_rows])
+    touched = touched[catalog.valid[touched]]
+    
+    # Normalize the re-read features with the statistics of the last full build
+    mean = previous.array('feature_mean')
+    std = previous.array('feature_std')
+    vectors = np.zeros((len(song_ids), index.d), dtype=np.float32)
+    vectors[:len(old_ids)] = previous.array('vectors')
+    vectors[touched] = (catalog.features[touched].astype('float32') - mean) / std
+    
+    if ivf is not None:
+        # Labels are row numbers: replace the changed rows' vectors and add the new rows
+        if len(changed_rows):
+            index.remove_ids(changed_rows)
+        update_rows = np.concatenate([changed_rows, new_rows])
+        index.add_with_ids(vectors[update_rows], update_rows)
+    elif hnsw is not None:
+        index.add(vectors[new_rows])
+    else:
+        index.reset()
+        index.add(vectors)
+    
+    arrays, strings = catalog.to_columns()
+    arrays.update({'feature_mean': mean, 'feature_std': std, 'vectors': vectors})
+    bundle = AssetBundle.write(
+        arrays, strings, index,
+        metadata=_index_metadata(
+            manifest.get('search_params'), watermark,
+            manifest['trained_count'], changed_since_training, base_version=previous.version
+        ),
+        root=bundle_dir
+    )
+    logger.info(f"✅ {describe_index(index)} updated incrementally to {len(song_ids)} rows "
+                f"({int(catalog.valid.sum())} songs, bundle {bundle.version})")
+    return True
@@ -0,0 +1,318 @@
+"""
+HTTP Load Test
+
+Replays a reproducible mix of requests against the songs blueprint and
+reports throughput, latency percentiles and database queries per endpoint:
+    songs.list             GET /api/songs/?after=...&limit=...
+    songs.get              GET /api/songs/<id>
+    songs.recommendations  GET /api/songs/<id>/recommendations?...
+
+Recommendation parameters follow the frontend's FlaskParams
+(frontend/app/actions.ts): either no overrides, or all eight feature
+sliders (0-1, step 0.01), optionally with a start/end year window.
+
+By default the app runs in-process (create_app() and one Flask test client
+per thread) so every SQL statement can be counted per request. With a base
+URL, a running server (e.g., gunicorn) is driven over HTTP instead and
+query counts are not available.
+
+Results are saved as JSON (with the git commit) and can be compared with
+an earlier run to spot regressions.
+
+Usage:
+    python -m backend.scripts.manage_data loadtest --requests 2000 --concurrency 8
+    python -m backend.scripts.manage_data loadtest --database-url sqlite:////tmp/loadtest.db --seed
+    python -m backend.scripts.manage_data loadtest --base-url http://localhost:5001 --compare baseline.json
+
+    # Compare the search engines (in-process, without the response cache)
+    python -m backend.scripts.manage_data loadtest --no-cache --engine faiss --output faiss.json
+    python -m backend.scripts.manage_data loadtest --no-cache --engine numpy --compare faiss.json
+"""
+
+import json
+import logging
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+import numpy as np
+from sqlalchemy import event, select
+
+from backend.api import create_app
+from backend.api.extensions import db
+from backend.api.database.models import Song
+from backend.constants import AUDIO_FEATURES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Share of requests per endpoint
+ENDPOINT_WEIGHTS = {
+    'songs.list': 0.1,
+    'songs.get': 0.2,
+    'songs.recommendations': 0.7,
+}
+
+# Share of recommendation requests where the user moved the sliders / set a year window
+SLIDER_SHARE = 0.6
+YEAR_FILTER_SHARE = 0.5
+
+
+class _QueryCounter:
+    """Counts SQL statements executed by the calling thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, *args, **kwargs):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self) -> None:
+        self._local.count = 0
+
+    @property
+    def count(self) -> int:
+        return getattr(self._local, 'count', 0)
+
+
+def recommendation_params(rng: random.Random) -> Dict[str, Any]:
+    """
+    Query parameters as sent by getSongRecommendations in frontend/app/actions.ts
+    Args:
+        rng: Random generator
+    Returns:
+        Dict of query parameters (unset FlaskParams are omitted, as the frontend does)
+    """
+    params = {}
+    if rng.random() < SLIDER_SHARE:
+        for feature in AUDIO_FEATURES:
+            params[feature] = round(rng.random(), 2)
+    if rng.random() < YEAR_FILTER_SHARE:
+        start_year = rng.randint(1950, 2010)
+        params['start_year'] = start_year
+        params['end_year'] = start_year + rng.randint(5, 30)
+    return params
+
+
+def build_requests(song_ids: List[int], num_requests: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    Build a reproducible request mix
+    Args:
+        song_ids: Song IDs to draw seeds and lookups from
+        num_requests: Number of requests
+        seed: Random seed
+    Returns:
+        List of (endpoint name, URL path with query string)
+    """
+    rng = random.Random(seed)
+    endpoints = list(ENDPOINT_WEIGHTS)
+    weights = list(ENDPOINT_WEIGHTS.values())
+    requests = []
+    for _ in range(num_requests):
+        endpoint = rng.choices(endpoints, weights)[0]
+        song_id = rng.choice(song_ids)
+        if endpoint == 'songs.list':
+            params = {'limit': rng.choice([50, 100, 500])}
+            if rng.random() < 0.8:
+                params['after'] = song_id
+            url = f"/api/songs/?{urlencode(params)}"
+        elif endpoint == 'songs.get':
+            url = f"/api/songs/{song_id}"
+        else:
+            params = recommendation_params(rng)
+            url = f"/api/songs/{song_id}/recommendations"
+            if params:
+                url += f"?{urlencode(params)}"
+        requests.append((endpoint, url))
+    return requests
+
+
+def _summarize(samples: List[Tuple[str, float, int, Optional[int]]], wall_seconds: float) -> Dict[str, Any]:
+    """Aggregate (endpoint, latency_ms, status, queries) samples per endpoint and overall"""
+    groups: Dict[str, list] = {'all': samples}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+
+    summary = {}
+    for name, group in groups.items():
+        latencies = np.array([s[1] for s in group])
+        queries = [s[3] for s in group if s[3] is not None]
+        summary[name] = {
+            'requests': len(group),
+            'errors': sum(1 for s in group if s[2] >= 400),
+            'throughput_rps': len(group) / wall_seconds if wall_seconds else 0.0,
+            'mean_ms': float(latencies.mean()),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p90_ms': float(np.percentile(latencies, 90)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'max_ms': float(latencies.max()),
+            'queries_per_request': float(np.mean(queries)) if queries else None,
+        }
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(
+    num_requests: int = 2000,
+    concurrency: int = 8,
+    warmup: int = 50,
+    seed: int = 0,
+    base_url: Optional[str] = None,
+    config_overrides: Optional[Dict[str, Any]] = None,
+    seed_database_from: Optional[Union[str, bool]] = None
+) -> Dict[str, Any]:
+    """
+    Run the load test
+    Args:
+        num_requests: Measured requests
+        concurrency: Client threads
+        warmup: Unmeasured requests sent first (loads assets, warms caches)
+        seed: Random seed for the request mix
+        base_url: Drive a running server over HTTP instead of an in-process app
+        config_overrides: App settings for the in-process app and for reading
+                          song IDs (e.g., SQLALCHEMY_DATABASE_URI)
+        seed_database_from: Seed the database first with seed_database
+                            (True for the default CSV, or a CSV path)
+    Returns:
+        Results dict: metadata, and per-endpoint stats under 'endpoints'
+    """
+    app = create_app(config_overrides)
+    counter = _QueryCounter()
+    with app.app_context():
+        if seed_database_from:
+            from backend.scripts.operations.seed import seed_database
+            seed_database(csv_path=None if seed_database_from is True else seed_database_from)
+        song_ids = list(db.session.execute(select(Song.song_id)).scalars())
+        if base_url is None:
+            event.listen(db.engine, 'before_cursor_execute', counter)
+    if not song_ids:
+        raise ValueError("The database has no songs; seed it first (--seed)")
+
+    requests = build_requests(song_ids, warmup + num_requests, seed)
+    warmup_requests, requests = requests[:warmup], requests[warmup:]
+
+    local = threading.local()
+
+    def send(request: Tuple[str, str]) -> Tuple[str, float, int, Optional[int]]:
+        endpoint, url = request
+        start = time.perf_counter()
+        if base_url is None:
+            if not hasattr(local, 'client'):
+                local.client = app.test_client()
+            counter.reset()
+            status = local.client.get(url).status_code
+            queries = counter.count
+        else:
+            try:
+                with urllib.request.urlopen(f"{base_url.rstrip('/')}{url}") as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            queries = None
+        return endpoint, (time.perf_counter() - start) * 1000, status, queries
+
+    target = base_url or 'in-process app'
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        logger.info(f"Warming up with {len(warmup_requests)} requests against {target}...")
+        list(pool.map(send, warmup_requests))
+
+        logger.info(f"Sending {len(requests)} requests with {concurrency} threads...")
+        start = time.perf_counter()
+        samples = list(pool.map(send, requests))
+        wall_seconds = time.perf_counter() - start
+
+    if base_url is None:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', counter)
+
+    results = {
+        'commit': _git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'target': target,
+        'engine': app.config.get('RECOMMENDATION_ENGINE') if base_url is None else None,
+        'python': platform.python_version(),
+        'songs': len(song_ids),
+        'requests': num_requests,
+        'concurrency': concurrency,
+        'seed': seed,
+        'wall_seconds': wall_seconds,
+        'endpoints': _summarize(samples, wall_seconds),
+    }
+    log_results(results)
+    return results
+
+
+def log_results(results: Dict[str, Any]) -> None:
+    """Log one line per endpoint"""
+    for name, stats in results['endpoints'].items():
+        queries = stats['queries_per_request']
+        logger.info(
+            f"{name:<22} {stats['requests']:>6} req {stats['errors']:>4} err "
+            f"{stats['throughput_rps']:>8.1f} req/s | p50 {stats['p50_ms']:7.2f}ms "
+            f"p90 {stats['p90_ms']:7.2f}ms p99 {stats['p99_ms']:7.2f}ms | "
+            f"queries/req {'-' if queries is None else f'{queries:.2f}'}"
+        )
+
+
+def save_results(results: Dict[str, Any], output_path: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Write results as JSON
+    Args:
+        results: Results from run_load_test
+        output_path: Destination (default: loadtest-<commit>.json in the working directory)
+    Returns:
+        Path written
+    """
+    path = Path(output_path or f"loadtest-{results['commit'] or 'unknown'}.json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Results saved to {path}")
+    return path
+
+
+def compare_results(results: Dict[str, Any], baseline_path: Union[str, Path]) -> Dict[str, Dict[str, float]]:
+    """
+    Compare results with an earlier run
+    Args:
+        results: Results from run_load_test
+        baseline_path: JSON saved by an earlier run
+    Returns:
+        Relative change (current / baseline - 1) of throughput and latency per endpoint
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+
+    changes = {}
+    for name, stats in results['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if not before:
+            continue
+        changes[name] = {
+            metric: stats[metric] / before[metric] - 1
+            for metric in ('throughput_rps', 'p50_ms', 'p99_ms')
+            if before.get(metric)
+        }
+        logger.info(
+            f"{name:<22} vs {baseline.get('commit')}: "
+            + ", ".join(f"{metric} {change:+.1%}" for metric, change in changes[name].items())
+        )
+    return changes
@@ -0,0 +1,94 @@
+"""
+Database Migrations
+
+Idempotent, in-place schema upgrades for databases created before a column
+was added to the models, so existing data is kept:
+    - songs.updated_at (NOT NULL, defaulting to the time a row is inserted)
+      and its index ix_songs_updated_at, used by incremental index builds
+
+Seeding with refresh recreates the tables from the models and needs no
+migration; seeding with --no-refresh and updating run it first.
+
+updated_at is set by the database on insert and by ORM updates (the
+column's onupdate). Raw SQL UPDATEs and COPY-based loads that rewrite
+existing rows must set updated_at = now() themselves, or incremental index
+builds will silently miss those rows.
+
+Usage:
+    python -m backend.scripts.manage_data migrate
+
+    from backend.scripts.operations.migrate import migrate_database
+    migrate_database()  # inside an app context
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import inspect
+
+from backend.api.extensions import db
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+UPDATED_AT_INDEX = 'ix_songs_updated_at'
+
+# SQLite can't add a column whose default is CURRENT_TIMESTAMP: it gets this
+# constant instead, and a trigger stamps rows inserted without a value
+SQLITE_UNSET_TIMESTAMP = '1970-01-01 00:00:00'
+
+
+def has_updated_at() -> bool:
+    """
+    Check whether the songs table has the updated_at column
+    Returns:
+        True if the table exists with the column
+    """
+    inspector = inspect(db.engine)
+    return inspector.has_table('songs') and 'updated_at' in {
+        column['name'] for column in inspector.get_columns('songs')
+    }
+
+
+def migrate_database() -> List[str]:
+    """
+    Bring an existing database up to the current models (safe to run repeatedly)
+    Returns:
+        Names of the columns and indexes that were added
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table('songs'):
+        logger.info("No songs table yet, nothing to migrate")
+        return []
+
+    applied = []
+    columns = {column['name'] for column in inspector.get_columns('songs')}
+    indexes = {index['name'] for index in inspector.get_indexes('songs')}
+    with db.engine.begin() as conn:
+        if 'updated_at' not in columns:
+            logger.info("Adding songs.updated_at...")
+            if db.engine.dialect.name == 'sqlite':
+                conn.exec_driver_sql(
+                    f"ALTER TABLE songs ADD COLUMN updated_at DATETIME NOT NULL DEFAULT '{SQLITE_UNSET_TIMESTAMP}'"
+                )
+                conn.exec_driver_sql("UPDATE songs SET updated_at = CURRENT_TIMESTAMP")
+                conn.exec_driver_sql(
+                    f"CREATE TRIGGER IF NOT EXISTS songs_updated_at_on_insert AFTER INSERT ON songs "
+                    f"WHEN NEW.updated_at = '{SQLITE_UNSET_TIMESTAMP}' BEGIN "
+                    f"UPDATE songs SET updated_at = CURRENT_TIMESTAMP WHERE song_id = NEW.song_id; END"
+                )
+            else:
+                conn.exec_driver_sql(
+                    "ALTER TABLE songs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now()"
+                )
+            applied.append('songs.updated_at')
+        if UPDATED_AT_INDEX not in indexes:
+            logger.info(f"Creating index {UPDATED_AT_INDEX}...")
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {UPDATED_AT_INDEX} ON songs (updated_at)")
+            applied.append(UPDATED_AT_INDEX)
+
+    if applied:
+        logger.info(f"✅ Migrated database: added {', '.join(applied)}")
+    else:
+        logger.info("Database schema is up to date")
+    return applied
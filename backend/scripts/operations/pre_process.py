@@ -7,6 +7,27 @@ This module handles:
     - Musical key mappings to Camelot wheel notation
     - Human-readable key notation
 
+Catalogs larger than memory can be processed in chunks (process_data_chunked):
+a first pass reads only the audio feature columns and computes their global
+quantile scaling, then chunks of the raw file are transformed in parallel
+across a process pool and appended to the output in order. The output is
+the same as process_data's.
+
+Input and output can be CSV or Parquet (by file extension, see
+data_files.py); Parquet output is written with the explicit column types
+of PROCESSED_DTYPES.
+
+Both save the fitted quantile scaling (per feature, the raw values at the
+edges of the quantile bins and their scaled values), so songs added later
+can be scaled by interpolation without re-ranking the whole catalog
+(process_new_songs). New values land within half a quantile bin of where
+re-ranking would put them; a raw value that ties across several bins
+(e.g., Instrumentalness 0) gets the mean of their scaled values. The
+transform of the default processed file is the quantile_transform.npz
+asset (plain arrays, loaded without pickle); any other output gets its own file next to it (see
+default_transform_path), so processing a synthetic or benchmark catalog
+never replaces the asset.
+
 This module is primarily used by the manage_data.py CLI, but the core
 functions can also be imported and used programmatically.
 
@@ -14,18 +35,38 @@ Usage:
     # From manage_data.py
     from backend.scripts.operations.pre_process import process_data
     process_data(input_path='input.csv', output_path='output.csv')
+
+    # Chunked, on 4 processes
+    python -m backend.scripts.manage_data process --input songs_10m.csv --output processed.csv --chunk-size 500000 --workers 4
+
+    # Parquet output, read by seed, update and benchmark without parsing text
+    python -m backend.scripts.manage_data process --output backend/assets/Processed_ClassicHit.parquet
+
+    # New songs only, scaled like the existing catalog, then inserted and updated
+    python -m backend.scripts.manage_data process --incremental --input new_songs.csv --output new_processed.csv \
+        --transform-path backend/assets/quantile_transform.npz
+    python -m backend.scripts.manage_data seed --no-refresh --csv new_processed.csv
 """
 
+import io
+import os
+import numpy as np
 import pandas as pd
 import logging
-from typing import Optional
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Union
 from pathlib import Path
 
+from backend.scripts.operations.data_files import TableWriter, is_parquet, iter_table, read_table, write_table
+
 # Import project constants
 from backend.constants import (
     AUDIO_FEATURES, 
     RAW_CSV_PATH,
-    PROCESSED_CSV_PATH
+    PROCESSED_CSV_PATH,
+    QUANTILE_TRANSFORM_PATH
 )
 
 # Configure logging
@@ -34,6 +75,17 @@ logger = logging.getLogger(__name__)
 # Convert lowercase feature names to title case for CSV columns
 FEATURES = [feature.capitalize() for feature in AUDIO_FEATURES]
 
+# Columns of the processed data, in order, with their types
+PROCESSED_DTYPES = {
+    'Song_ID': 'int64', 'Track': str, 'Artist': str, 'Year': 'int64', 'Duration': 'int64',
+    'Time_Signature': 'int64', 'Key': 'int64', 'Mode': 'int64', 'Key_String': str,
+    'Camelot_Key': 'int64', 'Tempo': 'float64', 'Danceability': 'float64', 'Energy': 'float64',
+    'Loudness': 'float64', 'Loudness_dB': 'float64', 'Speechiness': 'float64',
+    'Acousticness': 'float64', 'Instrumentalness': 'float64', 'Liveness': 'float64',
+    'Valence': 'float64', 'Popularity': 'int64', 'Genre': str
+}
+OUTPUT_COLUMNS = list(PROCESSED_DTYPES)
+
 def uniform_quantile_scale(df: pd.DataFrame) -> pd.DataFrame:
     '''
     Transforms numerical features to have a uniform distribution in the range [0, 1] using rank-based quantile scaling.
@@ -59,6 +111,95 @@ def uniform_quantile_scale(df: pd.DataFrame) -> pd.DataFrame:
 
     return df_rank_q
 
+def fit_quantile_transform(raw: pd.DataFrame, scaled: pd.DataFrame) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Fit the interpolation points that reproduce uniform_quantile_scale
+    Args:
+        raw: Original FEATURES
+        scaled: The same rows after uniform_quantile_scale
+    Returns:
+        Per feature, increasing raw 'values' and their 'scaled' values: the
+        smallest and largest raw value of every quantile bin (a value shared
+        by several bins gets their mean)
+    """
+    transform = {}
+    for feature in FEATURES:
+        bins = raw[feature].groupby(scaled[feature].to_numpy()).agg(['min', 'max'])
+        points = pd.Series(
+            np.tile(bins.index.to_numpy(dtype=float), 2),
+            index=np.concatenate([bins['min'].to_numpy(dtype=float), bins['max'].to_numpy(dtype=float)])
+        )
+        points = points.groupby(level=0).mean()
+        transform[feature] = {'values': points.index.to_numpy(), 'scaled': points.to_numpy()}
+    return transform
+
+def apply_quantile_transform(df: pd.DataFrame, transform: Dict[str, Dict[str, np.ndarray]]) -> pd.DataFrame:
+    """
+    Scale FEATURES with a fitted transform instead of ranking
+    Args:
+        df: Songs with the original FEATURES
+        transform: Output of fit_quantile_transform
+    Returns:
+        A new DataFrame; values outside the fitted range are clamped to [0, 1]
+    """
+    df = df.copy()
+    for feature in FEATURES:
+        points = transform[feature]
+        df[feature] = np.interp(df[feature].to_numpy(dtype=float), points['values'], points['scaled'])
+    return df
+
+def default_transform_path(output_path: Union[str, Path]) -> Path:
+    """
+    Where the quantile transform of a processed file is kept
+    Args:
+        output_path: Processed CSV or Parquet file
+    Returns:
+        QUANTILE_TRANSFORM_PATH for the default processed file (CSV or
+        Parquet), otherwise <output stem>.quantile_transform.npz beside it
+    """
+    output_path = Path(output_path)
+    if output_path.resolve() in (PROCESSED_CSV_PATH.resolve(), PROCESSED_CSV_PATH.with_suffix('.parquet').resolve()):
+        return QUANTILE_TRANSFORM_PATH
+    return output_path.with_name(f"{output_path.stem}.quantile_transform.npz")
+
+def save_quantile_transform(transform: Dict[str, Dict[str, np.ndarray]], next_song_id: int,
+                            path: Optional[Union[str, Path]] = None) -> None:
+    """
+    Persist a fitted transform with the Song_ID the next new song gets.
+    Stored as an .npz of plain arrays: '<feature>.values' and
+    '<feature>.scaled' per feature, and the 'next_song_id' scalar.
+    Args:
+        transform: Output of fit_quantile_transform
+        next_song_id: First unused Song_ID
+        path: Asset path (uses QUANTILE_TRANSFORM_PATH if None)
+    """
+    path = path or QUANTILE_TRANSFORM_PATH
+    arrays = {'next_song_id': np.int64(next_song_id)}
+    for feature, points in transform.items():
+        arrays[f"{feature}.values"] = np.asarray(points['values'], dtype=np.float64)
+        arrays[f"{feature}.scaled"] = np.asarray(points['scaled'], dtype=np.float64)
+    # A file object keeps np.savez from appending .npz to other names
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+    logger.info(f"Saved quantile transform to {path}")
+
+def load_quantile_transform(path: Optional[Union[str, Path]] = None) -> Dict:
+    """
+    Load a persisted transform
+    Args:
+        path: Asset path (uses QUANTILE_TRANSFORM_PATH if None)
+    Returns:
+        Dict with 'features' (see fit_quantile_transform) and 'next_song_id'
+    """
+    with np.load(path or QUANTILE_TRANSFORM_PATH, allow_pickle=False) as data:
+        return {
+            'features': {
+                feature: {'values': data[f"{feature}.values"], 'scaled': data[f"{feature}.scaled"]}
+                for feature in FEATURES
+            },
+            'next_song_id': int(data['next_song_id']),
+        }
+
 
 def add_camelot_key(df: pd.DataFrame) -> pd.DataFrame:
     '''
@@ -157,13 +298,15 @@ def add_key_string(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-def process_data(input_path: Optional[str] = None, output_path: Optional[str] = None) -> pd.DataFrame:
+def process_data(input_path: Optional[str] = None, output_path: Optional[str] = None,
+                 transform_path: Optional[Union[str, Path]] = None) -> pd.DataFrame:
     """
     Process raw CSV data into a normalized format suitable for database loading and model training.
     
     Args:
-        input_path: Path to input CSV file (uses default from constants if None)
-        output_path: Path to output processed CSV file (uses default from constants if None)
+        input_path: Path to input CSV or Parquet file (uses default from constants if None)
+        output_path: Path to output processed CSV or Parquet file (uses default from constants if None)
+        transform_path: Where to save the quantile transform (default_transform_path(output_path) if None)
     Returns:
         The processed DataFrame
     """
@@ -175,36 +318,168 @@ def process_data(input_path: Optional[str] = None, output_path: Optional[str] =
         
     logger.info(f"Processing data from {input_path}")
     
-    # Read the CSV file
-    df = pd.read_csv(input_path)
-    logger.info(f"Loaded {len(df)} songs from CSV")
+    # Read the raw data
+    raw = read_table(input_path)
+    logger.info(f"Loaded {len(raw)} songs from {input_path}")
 
     # Keep the original Loudness column, which is in dB, but rename it
-    df['Loudness_dB'] = df['Loudness']
+    raw['Loudness_dB'] = raw['Loudness']
 
-    # Apply quantile scale transformation
+    # Apply quantile scale transformation and keep it for songs added later
     logger.info("Applying uniform quantile scaling to audio features")
-    df = uniform_quantile_scale(df)
+    df = uniform_quantile_scale(raw)
+    save_quantile_transform(fit_quantile_transform(raw, df), next_song_id=len(df),
+                            path=transform_path or default_transform_path(output_path))
+    del raw
 
-    # Add the Camelot key
-    logger.info("Adding Camelot wheel key notation")
-    df = add_camelot_key(df)
+    # Add the Camelot key, key notation, Song_ID and final column order
+    logger.info("Adding Camelot wheel and human-readable key notation")
+    df = _finalize(df)
+    
+    # Save the processed DataFrame to CSV or Parquet
+    write_table(df, output_path, dtypes=PROCESSED_DTYPES)
+    logger.info(f"Processed data saved to {output_path} ({len(df)} songs)")
+    
+    return df
 
-    # Add the Key_String column
-    logger.info("Adding human-readable key notation")
+def _finalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the key columns and Song_ID (the row's index in the raw file) to scaled songs
+    Args:
+        df: Songs with scaled features and Loudness_dB, indexed by raw row number
+    Returns:
+        DataFrame with OUTPUT_COLUMNS
+    """
+    df = add_camelot_key(df)
     df = add_key_string(df)
-
-    # Add Song_ID column
     df = df.reset_index().rename(columns={'index': 'Song_ID'})
+    return df[OUTPUT_COLUMNS]
 
-    # Reorder DataFrame columns
-    df = df[['Song_ID', 'Track', 'Artist', 'Year', 'Duration', 'Time_Signature', 'Key', 'Mode', 
-             'Key_String', 'Camelot_Key', 'Tempo', 'Danceability', 'Energy', 'Loudness', 
-             'Loudness_dB', 'Speechiness', 'Acousticness', 'Instrumentalness', 'Liveness', 'Valence', 
-             'Popularity', 'Genre']]
+def _process_chunk(chunk: pd.DataFrame, scaled: pd.DataFrame, header: Optional[bool]) -> Union[str, pd.DataFrame]:
+    """
+    Transform one chunk of raw songs (runs in a worker process)
+    Args:
+        chunk: Raw songs, indexed by raw row number
+        scaled: Globally scaled FEATURES for the same rows
+        header: Whether to include the CSV header (first chunk only), or None for Parquet output
+    Returns:
+        The chunk's processed rows as CSV text, or as a DataFrame for Parquet output
+    """
+    chunk['Loudness_dB'] = chunk['Loudness']
+    chunk[FEATURES] = scaled.to_numpy()
+    processed = _finalize(chunk)
+    if header is None:
+        return processed.astype(PROCESSED_DTYPES)
+    buffer = io.StringIO()
+    processed.to_csv(buffer, index=False, header=header)
+    return buffer.getvalue()
+
+def process_data_chunked(
+    input_path: Optional[Union[str, Path]] = None,
+    output_path: Optional[Union[str, Path]] = None,
+    chunk_size: int = 500_000,
+    workers: Optional[int] = None,
+    transform_path: Optional[Union[str, Path]] = None
+) -> int:
+    """
+    Process raw CSV data in chunks on a process pool, with the same output as process_data.
     
-    # Save the processed DataFrame to CSV
-    df.to_csv(output_path, index=False)
-    logger.info(f"Processed data saved to {output_path} ({len(df)} songs)")
+    Quantile scaling is global, so a first pass reads only the FEATURES
+    columns and scales them over the whole file (8 floats per song). The
+    second pass streams the raw file, transforms chunks in parallel and
+    appends them in order; at most two chunks per worker are in flight.
     
-    return df
\ No newline at end of file
+    Args:
+        input_path: Path to input CSV or Parquet file (uses default from constants if None)
+        output_path: Path to output processed CSV or Parquet file (uses default from constants if None)
+        chunk_size: Songs per chunk
+        workers: Worker processes (default: CPU count)
+        transform_path: Where to save the quantile transform (default_transform_path(output_path) if None)
+    Returns:
+        Number of songs written
+    """
+    input_path = input_path or RAW_CSV_PATH
+    output_path = output_path or PROCESSED_CSV_PATH
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    
+    # Pass 1: global quantile scaling of the audio features
+    logger.info(f"Scaling audio features from {input_path}")
+    features = pd.concat(
+        iter_table(input_path, chunk_size, columns=FEATURES), ignore_index=True
+    )
+    scaled = uniform_quantile_scale(features)
+    save_quantile_transform(fit_quantile_transform(features, scaled), next_song_id=len(scaled),
+                            path=transform_path or default_transform_path(output_path))
+    del features
+    logger.info(f"Scaled {len(scaled)} songs in {time.perf_counter() - start:.1f}s")
+    
+    # Pass 2: transform chunks in parallel, written in file order (CSV text is formatted by the workers)
+    written = 0
+    parquet = is_parquet(output_path)
+    with ProcessPoolExecutor(max_workers=workers) as pool, TableWriter(output_path, dtypes=PROCESSED_DTYPES) as output:
+        pending = deque()
+        for chunk in iter_table(input_path, chunk_size):
+            rows = scaled.iloc[chunk.index[0]:chunk.index[-1] + 1]
+            header = None if parquet else chunk.index[0] == 0
+            pending.append((len(chunk), pool.submit(_process_chunk, chunk, rows, header)))
+            while len(pending) >= 2 * workers or (pending and pending[0][1].done()):
+                count, future = pending.popleft()
+                output.write(future.result())
+                written += count
+                logger.info(f"Progress: {written}/{len(scaled)} songs processed")
+        while pending:
+            count, future = pending.popleft()
+            output.write(future.result())
+            written += count
+            logger.info(f"Progress: {written}/{len(scaled)} songs processed")
+    
+    logger.info(f"Processed data saved to {output_path} ({written} songs, "
+                f"{time.perf_counter() - start:.1f}s on {workers} processes)")
+    return written
+
+def process_new_songs(
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    transform_path: Optional[Union[str, Path]] = None
+) -> pd.DataFrame:
+    """
+    Process raw songs that are not in the catalog yet, scaled with the persisted transform.
+    
+    The new songs get the next unused Song_IDs (recorded in the transform
+    asset), so the cost is proportional to the new songs, not the catalog.
+    Rows are appended to output_path if it exists (e.g., the processed
+    catalog), otherwise a new file is written.
+    
+    Args:
+        input_path: Raw CSV or Parquet file with only the new songs
+        output_path: Processed CSV or Parquet file to append to or create
+        transform_path: Transform of the catalog the songs join (if None, the
+                        one saved for output_path, see default_transform_path)
+    Returns:
+        The processed new songs
+    Raises:
+        FileNotFoundError: If there is no saved transform for the output
+    """
+    transform_path = transform_path or default_transform_path(output_path)
+    if not Path(transform_path).exists():
+        raise FileNotFoundError(f"No quantile transform at {transform_path}: process the full catalog first, "
+                                f"or pass the transform path of the catalog the new songs join")
+    state = load_quantile_transform(transform_path)
+    df = read_table(input_path)
+    logger.info(f"Loaded {len(df)} new songs from {input_path}")
+    
+    if df.empty:
+        return df
+    
+    df['Loudness_dB'] = df['Loudness']
+    df = apply_quantile_transform(df, state['features'])
+    df.index = pd.RangeIndex(state['next_song_id'], state['next_song_id'] + len(df))
+    df = _finalize(df)
+    
+    exists = Path(output_path).exists()
+    write_table(df, output_path, dtypes=PROCESSED_DTYPES, append=exists)
+    save_quantile_transform(state['features'], state['next_song_id'] + len(df), transform_path)
+    logger.info(f"{'Appended' if exists else 'Saved'} {len(df)} new songs to {output_path} "
+                f"(Song_ID {state['next_song_id']}-{state['next_song_id'] + len(df) - 1})")
+    return df
@@ -3,15 +3,18 @@ Database Seeding Operations
 
 Provides functions for initializing and populating the music database with:
 1. Standard Camelot wheel key notations
-2. Song data from CSV files
+2. Song data from processed CSV or Parquet files
 
 This module is primarily used by the manage_data.py CLI, but the core
 functions can also be imported and used programmatically if needed.
 
 Key Features:
 - Atomic operations with automatic rollback on failure
-- Bulk insert with duplicate detection
-- Fallback to individual inserts when needed
+- Songs streamed from the file in chunks, reading only the songs table's
+  columns, converted column-wise (no ORM objects)
+- PostgreSQL: COPY FROM STDIN into a staging table; other databases:
+  executemany batches of a compiled Core insert
+- Duplicate song IDs skipped by the database (ON CONFLICT DO NOTHING)
 - Progress tracking and detailed error reporting
 
 Usage:
@@ -20,57 +23,69 @@ Usage:
     seed_database(refresh=True)  # refresh=False keeps existing tables
 """
 
+import io
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence, Union
 import logging
-import sys
-from sqlalchemy.exc import IntegrityError
+import time
+from sqlalchemy import bindparam, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from backend.api import create_app
 from backend.api.extensions import db
 from backend.api.database.models import Song, CamelotKey
-from backend.constants import PROCESSED_CSV_PATH
+from backend.scripts.operations.data_files import iter_table
+from backend.scripts.operations.migrate import migrate_database
+from backend.constants import PROCESSED_CSV_PATH, CAMELOT_KEYS as CAMELOT_KEY_DATA
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Standard Camelot data
-# IDs are mapped using the Camelot wheel numbering system:
-#   minors (Camelot wheel 1-12A) : 1-12
-#   majors (Camelot wheel 1-12B) : 13-24
-# Keys are mapped 0-11 in Alphabetical order starting at C
-# Mode is mapped as:
-#   minor : 0
-#   major : 1
+# Standard Camelot data (see CAMELOT_KEYS in backend/constants.py for the numbering)
 CAMELOT_KEYS = [
-    CamelotKey(id=1, key=8, mode=0, key_str="G#/Ab min"),
-    CamelotKey(id=2, key=3, mode=0, key_str="D#/Eb min"),
-    CamelotKey(id=3, key=10, mode=0, key_str="A#/Bb min"),
-    CamelotKey(id=4, key=5, mode=0, key_str="F min"),
-    CamelotKey(id=5, key=0, mode=0, key_str="C min"),
-    CamelotKey(id=6, key=7, mode=0, key_str="G min"),
-    CamelotKey(id=7, key=2, mode=0, key_str="D min"),
-    CamelotKey(id=8, key=9, mode=0, key_str="A min"),
-    CamelotKey(id=9, key=4, mode=0, key_str="E min"),
-    CamelotKey(id=10, key=11, mode=0, key_str="B min"),
-    CamelotKey(id=11, key=6, mode=0, key_str="F#/Gb min"),
-    CamelotKey(id=12, key=1, mode=0, key_str="C#/Db min"),
-    CamelotKey(id=13, key=11, mode=1, key_str="B Maj"),
-    CamelotKey(id=14, key=6, mode=1, key_str="F#/Gb Maj"),
-    CamelotKey(id=15, key=1, mode=1, key_str="C#/Db Maj"),
-    CamelotKey(id=16, key=8, mode=1, key_str="G#/Ab Maj"),
-    CamelotKey(id=17, key=3, mode=1, key_str="D#/Eb Maj"),
-    CamelotKey(id=18, key=10, mode=1, key_str="A#/Bb Maj"),
-    CamelotKey(id=19, key=5, mode=1, key_str="F Maj"),
-    CamelotKey(id=20, key=0, mode=1, key_str="C Maj"),
-    CamelotKey(id=21, key=7, mode=1, key_str="G Maj"),
-    CamelotKey(id=22, key=2, mode=1, key_str="D Maj"),
-    CamelotKey(id=23, key=9, mode=1, key_str="A Maj"),
-    CamelotKey(id=24, key=4, mode=1, key_str="E Maj"),
+    CamelotKey(id=key_id, key=key, mode=mode, key_str=key_str)
+    for key_id, key, mode, key_str in CAMELOT_KEY_DATA
 ]
 
+# Processed data column -> songs table column
+SONG_COLUMNS = {
+    'Song_ID': 'song_id',
+    'Track': 'title',
+    'Artist': 'artist',
+    'Year': 'year',
+    'Duration': 'duration',
+    'Time_Signature': 'time_signature',
+    'Camelot_Key': 'camelot_key_id',
+    'Tempo': 'tempo',
+    'Danceability': 'danceability',
+    'Energy': 'energy',
+    'Loudness': 'loudness',
+    'Loudness_dB': 'loudness_dB',
+    'Speechiness': 'speechiness',
+    'Acousticness': 'acousticness',
+    'Instrumentalness': 'instrumentalness',
+    'Liveness': 'liveness',
+    'Valence': 'valence',
+    'Popularity': 'popularity',
+    'Genre': 'genre'
+}
+
+# Column types (the rest are floats), so every chunk parses the same way
+# (e.g., numeric titles stay strings)
+TEXT_COLUMNS = ('Track', 'Artist', 'Genre')
+INTEGER_COLUMNS = ('Song_ID', 'Year', 'Duration', 'Time_Signature', 'Camelot_Key', 'Popularity')
+SONG_DTYPES = {
+    column: str if column in TEXT_COLUMNS else 'int64' if column in INTEGER_COLUMNS else 'float64'
+    for column in SONG_COLUMNS
+}
+
+# Rows read and written per chunk
+SEED_CHUNK_SIZE = 100_000
+
 def seed_camelot_keys() -> int:
     """
     Initializes the Camelot keys table with standard music theory notations.
@@ -95,109 +110,136 @@ def seed_camelot_keys() -> int:
         return 0
         
         
-def seed_songs_from_csv(csv_path: str) -> int:
+def _iter_song_chunks(csv_path: Union[str, Path], chunk_size: int) -> Iterator[pd.DataFrame]:
     """
-    Bulk insert songs from CSV file matching the expected schema.
-    Automatically skips duplicates.
+    Stream songs from the processed CSV or Parquet file, keeping the first
+    song of every (Artist, Track) pair across the whole file
     Args:
-        csv_path: Path to CSV file with song data
-    Returns: Number of successfully inserted songs
+        csv_path: Processed CSV or Parquet file
+        chunk_size: Rows read per chunk
+    Yields:
+        DataFrames with the songs table columns (SONG_COLUMNS), typed for insertion
     """
-    logger.info(f"Reading songs from {csv_path}")
-    df = pd.read_csv(csv_path)
-    logger.info(f"Found {len(df)} songs in CSV file")
-
-    df = df.drop_duplicates(subset=["Artist", "Track"])
-    logger.info(f"After de-duplication: {len(df)} songs")
-
-    songs = [
-        Song(
-            song_id=row['Song_ID'],
-            title=row['Track'],
-            artist=row['Artist'],
-            year=row['Year'],
-            duration=row['Duration'],
-            time_signature=row['Time_Signature'],
-            camelot_key_id=row['Camelot_Key'],
-            tempo=row['Tempo'],
-            danceability=row['Danceability'],
-            energy=row['Energy'],
-            loudness=row['Loudness'],
-            loudness_dB=row['Loudness_dB'],
-            speechiness=row['Speechiness'],
-            acousticness=row['Acousticness'],
-            instrumentalness=row['Instrumentalness'],
-            liveness=row['Liveness'],
-            valence=row['Valence'],
-            popularity=row['Popularity'],
-            genre=row['Genre']
-        )
-        for _, row in df.iterrows()
-    ]
-    return _bulk_insert_songs(songs)
+    # Sorted 64-bit hashes of the pairs kept so far (8 bytes per song, no Python objects)
+    seen = np.empty(0, dtype=np.uint64)
+    total = 0
+    for chunk in iter_table(csv_path, chunk_size, columns=list(SONG_COLUMNS), dtypes=SONG_DTYPES):
+        hashes = pd.util.hash_pandas_object(chunk[['Artist', 'Track']], index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(seen):
+            positions = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+            keep &= seen[positions] != hashes
+        seen = np.concatenate([seen, hashes[keep]])
+        seen.sort(kind='stable')  # Merges the new run into the sorted one
+
+        total += len(chunk)
+        yield chunk.loc[keep, list(SONG_COLUMNS)].rename(columns=SONG_COLUMNS)
+    logger.info(f"Found {total} songs in {csv_path}, {len(seen)} after de-duplication")
 
 
-def _bulk_insert_songs(songs: List['Song']) -> int:
+def _typed_rows(chunk: pd.DataFrame, columns: Sequence[str]) -> List[tuple]:
+    """Rows as tuples of native Python values, converted column by column"""
+    return list(zip(*(chunk[column].tolist() for column in columns)))
+
+
+def _copy_songs_postgres(chunks: Iterator[pd.DataFrame]) -> None:
     """
-    Bulk insert songs with duplicate prevention and fallback logic
-    Args:
-        songs: List of Song model instances
-    Returns:
-        Number of successfully inserted songs
+    Load songs with COPY FROM STDIN into a staging table, then insert them
+    into songs in one statement that skips existing song IDs
     """
-    if not songs:
-        return 0
+    columns = ', '.join(SONG_COLUMNS.values())
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TEMP TABLE songs_staging (LIKE songs INCLUDING DEFAULTS) ON COMMIT DROP")
+        cursor = conn.connection.driver_connection.cursor()
+        copy_sql = f"COPY songs_staging ({columns}) FROM STDIN WITH (FORMAT csv)"
+        staged = 0
+        for chunk in chunks:
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, header=False, index=False)
+            buffer.seek(0)
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+            staged += len(chunk)
+            logger.info(f"Progress: {staged} songs staged")
+        conn.exec_driver_sql(
+            f"INSERT INTO songs ({columns}) SELECT {columns} FROM songs_staging "
+            f"ON CONFLICT (song_id) DO NOTHING"
+        )
 
-    # Get existing song IDs
-    existing_ids = {s[0] for s in db.session.query(Song.song_id).all()}
-    new_songs = [s for s in songs if s.song_id not in existing_ids]
 
-    if not new_songs:
-        logger.info("No new songs to insert (all already exist)")
-        return 0
+def _insert_songs_core(chunks: Iterator[pd.DataFrame]) -> None:
+    """
+    Insert songs with executemany batches of a compiled Core insert, skipping
+    existing song IDs (ON CONFLICT DO NOTHING where the dialect supports it)
+    """
+    table = Song.__table__
+    columns = list(SONG_COLUMNS.values())
+    values = {column: bindparam(column) for column in columns}
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        statement = sqlite_insert(table).values(values).on_conflict_do_nothing(index_elements=['song_id'])
+    elif dialect == 'postgresql':
+        statement = postgresql_insert(table).values(values).on_conflict_do_nothing(index_elements=['song_id'])
+    else:
+        statement = insert(table).values(values)
+    on_conflict = dialect in ('sqlite', 'postgresql')
 
-    # Attempt bulk insert
-    try:
-        db.session.bulk_save_objects(new_songs)
-        db.session.commit()
-        logger.info(f"Successfully bulk inserted {len(new_songs)} songs")
-        return len(new_songs)
-    except IntegrityError:
-        db.session.rollback()
-        logger.warning("Bulk insert failed, falling back to individual inserts")
-        return _insert_songs_individually(new_songs)
+    written = 0
+    with db.engine.begin() as conn:
+        compiled = statement.compile(dialect=conn.dialect)
+        for chunk in chunks:
+            if not on_conflict:
+                # No ON CONFLICT: drop this chunk's songs that already exist
+                existing = conn.execute(
+                    select(table.c.song_id).where(table.c.song_id.in_(chunk['song_id'].tolist()))
+                ).scalars().all()
+                chunk = chunk[~chunk['song_id'].isin(existing)]
+            if len(chunk):
+                # Straight to the driver's executemany, skipping per-row ORM/Core processing
+                if compiled.positional:
+                    rows = _typed_rows(chunk, compiled.positiontup)
+                else:
+                    rows = [dict(zip(columns, row)) for row in _typed_rows(chunk, columns)]
+                conn.exec_driver_sql(str(compiled), rows)
+            written += len(chunk)
+            logger.info(f"Progress: {written} songs written")
 
 
-def _insert_songs_individually(songs: List['Song']) -> int:
+def seed_songs_from_csv(csv_path: Union[str, Path], chunk_size: int = SEED_CHUNK_SIZE) -> int:
     """
-    Fallback for individual song insertion
+    Bulk insert songs from a processed CSV or Parquet file, streamed in chunks.
+    Songs repeating an (Artist, Track) pair and song IDs already in the
+    table are skipped.
     Args:
-        songs: List of Song model instances
-    Returns:
-        Number of successfully inserted songs
+        csv_path: Path to CSV or Parquet file with song data
+        chunk_size: Rows read and written per chunk
+    Returns: Number of successfully inserted songs
     """
-    success = 0
-    total = len(songs)
-    for i, song in enumerate(songs, 1):
-        try:
-            db.session.merge(song)
-            success += 1
-            if i % 100 == 0:  # Periodic commit
-                db.session.commit()
-                logger.info(f"Progress: {i}/{total} songs processed")
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error inserting song {song.song_id}: {str(e)}")
-    
+    logger.info(f"Reading songs from {csv_path}")
+    count = select(func.count()).select_from(Song.__table__)
+    before = db.session.execute(count).scalar_one()
+    db.session.commit()
+
+    start = time.perf_counter()
+    chunks = _iter_song_chunks(csv_path, chunk_size)
+    if db.engine.dialect.name == 'postgresql':
+        _copy_songs_postgres(chunks)
+    else:
+        _insert_songs_core(chunks)
+
+    inserted = db.session.execute(count).scalar_one() - before
     db.session.commit()
-    logger.info(f"Individual insert complete: {success}/{total} songs succeeded")
-    return success
+    logger.info(f"Successfully bulk inserted {inserted} songs in {time.perf_counter() - start:.1f}s")
+    return inserted
 
 def seed_database(csv_path: Optional[str] = None, refresh: bool = True) -> int:
     """
     Initialize the database with Camelot keys and songs
     Args:
-        csv_path: Path to CSV file with song data (if None, uses default)
+        csv_path: Path to CSV or Parquet file with song data (if None, uses default)
         refresh: Whether to drop and recreate all tables (True) or preserve existing (False)
     Returns:
         Number of songs added
@@ -206,9 +248,9 @@ def seed_database(csv_path: Optional[str] = None, refresh: bool = True) -> int:
     if csv_path is None:
         csv_path = PROCESSED_CSV_PATH
     
-    # Ensure the CSV file exists
+    # Ensure the data file exists
     if not Path(csv_path).exists():
-        logger.error(f"CSV file not found: {csv_path}")
+        logger.error(f"Data file not found: {csv_path}")
         return 0
 
     logger.info(f"Starting database seeding process (refresh={refresh})")
@@ -217,6 +259,9 @@ def seed_database(csv_path: Optional[str] = None, refresh: bool = True) -> int:
         logger.info("Dropping all tables...")
         db.drop_all()
         db.create_all()
+    else:
+        # Existing tables may predate columns the inserts rely on
+        migrate_database()
 
     # Seed the Camelot keys
     logger.info("Seeding Camelot keys...")
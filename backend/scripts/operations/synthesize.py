@@ -0,0 +1,145 @@
+"""
+Synthetic Catalog Generator
+
+Generates raw song data shaped like ClassicHit.csv at any scale, for load
+and scaling tests of process, seed, index and the recommendation API.
+
+Rows are drawn with a smoothed bootstrap: each synthetic song copies a
+random real song's year, genre, key, mode and time signature, and jitters
+its continuous columns (audio features, tempo, loudness, duration,
+popularity) with noise proportional to the column's spread, clipped to
+the observed range. Column distributions and the relationships between
+columns (e.g., genre and energy) carry over without copying exact rows.
+
+Titles are unique and every real artist is split into several synthetic
+artists, so songs per artist keep the source's skew and seeding's
+(Artist, Track) de-duplication keeps every row.
+
+The output has the raw CSV columns, written as CSV or Parquet (by file
+extension) in chunks, so 10M rows fit in memory on a laptop.
+
+Usage:
+    python -m backend.scripts.manage_data generate --rows 1000000 --output /tmp/songs_1m.csv
+    python -m backend.scripts.manage_data process --input /tmp/songs_1m.csv --output /tmp/songs_1m_processed.csv
+    DATABASE_URL=sqlite:////tmp/songs_1m.db python -m backend.scripts.manage_data seed --csv /tmp/songs_1m_processed.csv
+    DATABASE_URL=sqlite:////tmp/songs_1m.db python -m backend.scripts.manage_data index --bundle-dir /tmp/songs_1m_bundles
+    python -m backend.scripts.manage_data benchmark --csv /tmp/songs_1m_processed.csv
+
+    # Serve the synthetic catalog
+    DATABASE_URL=sqlite:////tmp/songs_1m.db ASSET_BUNDLES_DIR=/tmp/songs_1m_bundles python -m backend.api
+"""
+
+import logging
+import math
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.constants import RAW_CSV_PATH
+from backend.scripts.operations.data_files import TableWriter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Raw CSV columns, in file order
+RAW_COLUMNS = [
+    'Track', 'Artist', 'Year', 'Duration', 'Time_Signature', 'Danceability', 'Energy', 'Key',
+    'Loudness', 'Mode', 'Speechiness', 'Acousticness', 'Instrumentalness', 'Liveness',
+    'Valence', 'Tempo', 'Popularity', 'Genre'
+]
+
+# Columns copied unchanged from the sampled song
+COPIED_COLUMNS = ['Year', 'Time_Signature', 'Key', 'Mode', 'Genre']
+
+# Jittered columns and the decimals they are written with (0 = integer)
+JITTERED_COLUMNS = {
+    'Danceability': 4,
+    'Energy': 4,
+    'Loudness': 3,
+    'Speechiness': 4,
+    'Acousticness': 4,
+    'Instrumentalness': 4,
+    'Liveness': 4,
+    'Valence': 4,
+    'Tempo': 3,
+    'Duration': 0,
+    'Popularity': 0,
+}
+
+
+def _generate_chunk(source: pd.DataFrame, artist_codes: np.ndarray, artists_per_source: int,
+                    start: int, size: int, jitter: float, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generate one chunk of synthetic songs
+    Args:
+        source: Real songs to sample from
+        artist_codes: Integer code of each source row's artist
+        artists_per_source: Synthetic artists each real artist is split into
+        start: Global index of the first song in the chunk (keeps titles unique)
+        size: Number of songs to generate
+        jitter: Noise standard deviation as a fraction of each column's standard deviation
+        rng: Random generator
+    Returns:
+        DataFrame with RAW_COLUMNS
+    """
+    picks = rng.integers(0, len(source), size=size)
+    sample = source.iloc[picks]
+    chunk = {}
+
+    chunk['Track'] = [f"Track {i}" for i in range(start, start + size)]
+    artists = artist_codes[picks] * artists_per_source + rng.integers(0, artists_per_source, size=size)
+    chunk['Artist'] = [f"Artist {code}" for code in artists]
+
+    for column in COPIED_COLUMNS:
+        chunk[column] = sample[column].to_numpy()
+
+    for column, decimals in JITTERED_COLUMNS.items():
+        values = source[column]
+        noisy = sample[column].to_numpy(dtype=np.float64) + rng.normal(0, jitter * values.std(), size=size)
+        noisy = np.clip(noisy, values.min(), values.max()).round(decimals)
+        chunk[column] = noisy.astype(np.int64) if decimals == 0 else noisy
+
+    return pd.DataFrame(chunk, columns=RAW_COLUMNS)
+
+
+def write_synthetic_catalog(
+    num_rows: int,
+    output_path: Union[str, Path],
+    source_path: Union[str, Path] = RAW_CSV_PATH,
+    chunk_size: int = 1_000_000,
+    jitter: float = 0.05,
+    seed: Optional[int] = 0
+) -> int:
+    """
+    Generate a synthetic raw catalog and write it to CSV or Parquet
+    Args:
+        num_rows: Number of songs to generate
+        output_path: Destination; a .parquet extension writes Parquet, anything else CSV
+        source_path: Raw CSV whose distributions are reproduced
+        chunk_size: Songs generated and written per chunk
+        jitter: Noise standard deviation as a fraction of each column's standard deviation
+        seed: Random seed (None for a different catalog every run)
+    Returns:
+        Number of songs written
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Reading source distributions from {source_path}")
+    source = pd.read_csv(source_path, usecols=RAW_COLUMNS).dropna().reset_index(drop=True)
+    artist_codes = pd.factorize(source['Artist'])[0]
+    artists_per_source = max(1, math.ceil(num_rows / len(source)))
+
+    rng = np.random.default_rng(seed)
+    written = 0
+    with TableWriter(output_path) as writer:
+        while written < num_rows:
+            size = min(chunk_size, num_rows - written)
+            writer.write(_generate_chunk(source, artist_codes, artists_per_source, written, size, jitter, rng))
+            written += size
+            logger.info(f"Progress: {written}/{num_rows} songs written")
+
+    logger.info(f"✅ Synthetic catalog saved to {output_path} ({written} songs)")
+    return written
@@ -9,6 +9,7 @@ This module is primarily used by the manage_data.py CLI, but the core
 functions can also be imported and used programmatically.
 
 Features:
+- Only songs whose feature values changed are written
 - Batch processing with automatic retry logic
 - Failure tracking for interrupted operations
 - Resume capability for previously failed updates
@@ -19,6 +20,7 @@ Usage:
     update_existing_songs(retry_only=False)
 """
 
+import numpy as np
 import pandas as pd
 import logging
 import json
@@ -28,6 +30,8 @@ from typing import List, Dict, Any, Set
 
 from backend.api.database.models import Song
 from backend.api.extensions import db
+from backend.scripts.operations.data_files import read_table
+from backend.scripts.operations.migrate import migrate_database
 from backend.constants import (
     AUDIO_FEATURES,
     PROCESSED_CSV_PATH,
@@ -48,7 +52,7 @@ def update_existing_songs(csv_path: str = None, retry_only: bool = False) -> int
     """
     Update the audio features for songs that already exist in the database.
     Args:
-        csv_path: Path to CSV file with updated song data (uses default if None)
+        csv_path: Path to CSV or Parquet file with updated song data (uses default if None)
         retry_only: If True, only retry previously failed updates
     Returns:
         Number of songs successfully updated
@@ -57,30 +61,40 @@ def update_existing_songs(csv_path: str = None, retry_only: bool = False) -> int
     if csv_path is None:
         csv_path = PROCESSED_CSV_PATH
     
-    # Ensure the CSV file exists
+    # Ensure the data file exists
     if not Path(csv_path).exists():
-        logger.error(f"CSV file not found: {csv_path}")
+        logger.error(f"Data file not found: {csv_path}")
         return 0
     
+    # ORM updates set songs.updated_at, which older databases lack
+    migrate_database()
+    
+    # Only the song ID and feature columns are needed
     logger.info(f"Loading data from {csv_path}")
-    df = pd.read_csv(csv_path)
+    df = read_table(csv_path, columns=['Song_ID'] + [f.capitalize() for f in AUDIO_FEATURES])
     
     # Convert column names to lowercase for consistency with database
     df.columns = df.columns.str.lower()
     
-    # Get existing song IDs
-    logger.info("Retrieving song IDs from database...")
-    song_ids_in_db = set(id[0] for id in db.session.query(Song.song_id).all())
-    logger.info(f"Found {len(song_ids_in_db)} songs in database")
+    # Get existing song IDs and their current feature values
+    logger.info("Retrieving songs from database...")
+    columns = [f.lower() for f in AUDIO_FEATURES]
+    stored = pd.DataFrame(
+        db.session.query(Song.song_id, *[getattr(Song, column) for column in columns]).all(),
+        columns=['song_id'] + columns
+    )
+    logger.info(f"Found {len(stored)} songs in database")
+    
+    # Keep only songs that exist in the database and whose features changed
+    merged = df[['song_id'] + columns].merge(stored, on='song_id', suffixes=('', '_stored'))
+    logger.info(f"Found {len(merged)} songs in CSV that exist in database")
+    changed = np.zeros(len(merged), dtype=bool)
+    for column in columns:
+        changed |= ~np.isclose(merged[column], merged[f'{column}_stored'], rtol=0, atol=1e-9, equal_nan=True)
     
-
     logger.info("Converting data to update format...")
-    # Convert relevant columns to a list of dictionaries
-    update_data = df[['song_id'] + [f.lower() for f in AUDIO_FEATURES]].to_dict('records')
-    
-    # Filter to only include songs that exist in the database
-    all_songs = [row for row in update_data if row['song_id'] in song_ids_in_db]
-    logger.info(f"Found {len(all_songs)} songs in CSV that exist in database")
+    all_songs = merged.loc[changed, ['song_id'] + columns].to_dict('records')
+    logger.info(f"{len(all_songs)} songs have changed feature values")
     
     # Check for failed updates from previous runs if retry mode is enabled
     failed_ids = _load_failed_ids() if retry_only else set()
@@ -0,0 +1,152 @@
+"""
+Shared fixtures for the backend tests
+
+The app reads DATABASE_URL and ASSET_BUNDLES_DIR when backend.config and
+backend.constants are imported, so both are pointed at a temporary
+directory here, before any backend module is loaded: the tests never
+touch a real database or the published assets.
+
+Usage:
+    python -m pytest backend/tests
+"""
+
+import os
+import shutil
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix='djsongmatch-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DIR, 'songs.db')}"
+os.environ['ASSET_BUNDLES_DIR'] = os.path.join(TEST_DIR, 'bundles')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.api import create_app
+from backend.api.extensions import db, recommendation_cache
+from backend.api.services.song_service import RecommendationService
+from backend.scripts.operations.index import build_faiss_index
+from backend.scripts.operations.pre_process import FEATURES, PROCESSED_DTYPES
+from backend.scripts.operations.seed import seed_database
+from backend.scripts.operations.synthesize import RAW_COLUMNS
+
+# Songs in the synthetic catalog
+CATALOG_SIZE = 400
+
+
+def make_processed_songs(count: int, first_song_id: int = 0, seed: int = 0) -> pd.DataFrame:
+    """
+    Random songs in the processed data format (PROCESSED_DTYPES columns)
+    Args:
+        count: Number of songs
+        first_song_id: Song_ID of the first song (the rest are consecutive)
+        seed: Random seed
+    Returns:
+        DataFrame with unique (Artist, Track) pairs
+    """
+    rng = np.random.default_rng(seed)
+    song_ids = np.arange(first_song_id, first_song_id + count)
+    key = rng.integers(0, 12, count)
+    mode = rng.integers(0, 2, count)
+    df = pd.DataFrame({
+        'Song_ID': song_ids,
+        'Track': [f"Track {i}" for i in song_ids],
+        'Artist': [f"Artist {i % 37}" for i in song_ids],
+        'Year': rng.integers(1960, 2020, count),
+        'Duration': rng.integers(120_000, 400_000, count),
+        'Time_Signature': 4,
+        'Key': key,
+        'Mode': mode,
+        'Key_String': 'C Maj',
+        'Camelot_Key': rng.integers(1, 25, count),
+        'Tempo': rng.uniform(70, 170, count).round(3),
+        'Popularity': rng.integers(0, 100, count),
+        'Genre': rng.choice(['Rock', 'Pop', 'Disco', 'Metal'], count),
+    })
+    for feature in ('Danceability', 'Energy', 'Loudness', 'Speechiness',
+                    'Acousticness', 'Instrumentalness', 'Liveness', 'Valence'):
+        df[feature] = rng.random(count)
+    df['Loudness_dB'] = -20 * df['Loudness']
+    return df[list(PROCESSED_DTYPES)]
+
+
+def make_raw_songs(count: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Random songs in the raw data format (the columns of ClassicHit.csv)
+    Args:
+        count: Number of songs
+        seed: Random seed
+    Returns:
+        DataFrame whose audio features have no repeated values
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Track': [f"Raw Track {seed}-{i}" for i in range(count)],
+        'Artist': [f"Raw Artist {i % 23}" for i in range(count)],
+        'Year': rng.integers(1960, 2020, count),
+        'Duration': rng.integers(120_000, 400_000, count),
+        'Time_Signature': 4,
+        'Key': rng.integers(0, 12, count),
+        'Mode': rng.integers(0, 2, count),
+        'Tempo': rng.uniform(70, 170, count).round(3),
+        'Popularity': rng.integers(0, 100, count),
+        'Genre': rng.choice(['Rock', 'Pop', 'Disco', 'Metal'], count),
+    })
+    for feature in FEATURES:
+        df[feature] = rng.random(count)
+    df['Loudness'] = -30 * df['Loudness']
+    return df[RAW_COLUMNS]
+
+
+@pytest.fixture
+def app():
+    """App bound to the empty test database"""
+    app = create_app({'RECOMMENDATION_CACHE_SIZE': 0, 'TESTING': True})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    """Processed CSV file with CATALOG_SIZE synthetic songs"""
+    path = tmp_path / 'processed.csv'
+    make_processed_songs(CATALOG_SIZE).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def seeded_app(app, catalog_csv):
+    """App whose database holds the synthetic catalog"""
+    with app.app_context():
+        seed_database(csv_path=str(catalog_csv), refresh=True)
+    return app
+
+
+@pytest.fixture
+def indexed_app(seeded_app):
+    """
+    Seeded app with a flat index of the catalog published to ASSET_BUNDLES_DIR;
+    the recommendation assets load on first use
+    """
+    shutil.rmtree(os.environ['ASSET_BUNDLES_DIR'], ignore_errors=True)
+    build_faiss_index('flat')
+    # The index build configured the services from its own app
+    recommendation_cache.init_app(seeded_app)
+    RecommendationService.init_app(seeded_app)
+    RecommendationService._assets = None
+    yield seeded_app
+    RecommendationService._assets = None
+
+
+@pytest.fixture
+def make_songs():
+    """make_processed_songs, for tests that write their own song files"""
+    return make_processed_songs
+
+
+@pytest.fixture
+def make_raw():
+    """make_raw_songs, for tests of the preprocessing pipeline"""
+    return make_raw_songs
@@ -0,0 +1,69 @@
+import faiss
+import numpy as np
+import pytest
+
+from backend.api.services.asset_bundle import CURRENT_FILE, KEEP_GENERATIONS, AssetBundle, BundleError
+
+
+def write_bundle(root, seed=0, metadata=None):
+    vectors = np.random.default_rng(seed).standard_normal((50, 8)).astype(np.float32)
+    index = faiss.IndexFlatL2(8)
+    index.add(vectors)
+    arrays = {'vectors': vectors, 'song_ids': np.arange(50, dtype=np.int64) * 3}
+    strings = {'title': [f"Song {i}" for i in range(49)] + [None]}
+    return AssetBundle.write(arrays, strings, index, metadata=metadata, root=root), vectors
+
+
+def test_round_trip(tmp_path):
+    written, vectors = write_bundle(tmp_path, metadata={'search_params': {'nprobe': 4}})
+
+    assert (tmp_path / CURRENT_FILE).read_text() == written.version
+    assert AssetBundle.current_version(tmp_path) == written.version
+
+    bundle = AssetBundle.current(tmp_path)
+    assert bundle.version == written.version
+    assert bundle.manifest['count'] == 50 and bundle.manifest['dimension'] == 8
+    assert bundle.manifest['search_params'] == {'nprobe': 4}
+    assert np.array_equal(bundle.array('vectors'), vectors)
+    assert np.array_equal(bundle.array('song_ids'), np.arange(50) * 3)
+    assert bundle.has_array('vectors') and not bundle.has_array('missing')
+
+    titles = bundle.strings('title')
+    assert len(titles) == 50
+    assert titles[7] == 'Song 7'
+    assert list(titles)[:2] == ['Song 0', 'Song 1']
+
+    index = bundle.read_index()
+    assert index.ntotal == 50
+    _, rows = index.search(vectors[10:11], 1)
+    assert rows[0, 0] == 10
+
+
+def test_no_bundle_published(tmp_path):
+    assert AssetBundle.current_version(tmp_path) is None
+    assert AssetBundle.current(tmp_path) is None
+
+
+def test_verify_detects_corruption(tmp_path):
+    bundle, _ = write_bundle(tmp_path)
+    path = bundle.directory / 'vectors.npy'
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(BundleError, match='Checksum mismatch'):
+        AssetBundle.current(tmp_path)
+    assert AssetBundle.current(tmp_path, verify=False).version == bundle.version
+
+    path.unlink()
+    with pytest.raises(BundleError, match='missing'):
+        bundle.verify()
+
+
+def test_new_generations_replace_current_and_old_ones_are_pruned(tmp_path):
+    versions = [write_bundle(tmp_path, seed=seed)[0].version for seed in range(KEEP_GENERATIONS + 2)]
+
+    assert len(set(versions)) == len(versions)
+    assert AssetBundle.current_version(tmp_path) == versions[-1]
+    kept = sorted(path.name for path in tmp_path.iterdir() if path.is_dir())
+    assert kept == sorted(versions[-KEEP_GENERATIONS:])
@@ -0,0 +1,143 @@
+import threading
+
+import faiss
+import numpy as np
+import pytest
+
+from backend.api.database.models import Song
+from backend.api.extensions import db
+from backend.api.services.asset_bundle import AssetBundle
+from backend.api.services.asset_watcher import AssetWatcher
+from backend.api.services.catalog_service import SongCatalog
+from backend.api.services.song_service import RecommendationService
+from backend.scripts.operations.index import build_faiss_index
+
+TOKEN = 'test-admin-token'
+RELOAD_URL = '/api/admin/assets/reload'
+
+
+def publish_new_generation(app) -> str:
+    """Delete a song and rebuild the index, publishing a new bundle"""
+    with app.app_context():
+        db.session.delete(db.session.get(Song, 11))
+        db.session.commit()
+    build_faiss_index('flat')
+    return AssetBundle.current_version()
+
+
+def publish_broken_generation() -> str:
+    """Publish a copy of the active bundle whose index holds too few vectors"""
+    bundle = AssetBundle.current()
+    arrays, strings = SongCatalog.from_bundle(bundle).to_columns()
+    arrays.update({name: np.asarray(bundle.array(name)) for name in ('feature_mean', 'feature_std', 'vectors')})
+    index = faiss.IndexFlatL2(arrays['vectors'].shape[1])
+    index.add(arrays['vectors'][:10])
+    return AssetBundle.write(arrays, strings, index).version
+
+
+@pytest.fixture
+def admin_app(indexed_app):
+    indexed_app.config['ADMIN_TOKEN'] = TOKEN
+    return indexed_app
+
+
+def reload(app, query=''):
+    return app.test_client().post(f"{RELOAD_URL}{query}", headers={'X-Admin-Token': TOKEN})
+
+
+def test_reload_swaps_in_the_new_generation(indexed_app):
+    old = RecommendationService.get_assets()
+    version = publish_new_generation(indexed_app)
+    assert version != old.generation
+
+    with indexed_app.app_context():
+        assert RecommendationService.reload_assets()
+    assets = RecommendationService.get_assets()
+    assert assets is not old
+    assert assets.catalog.version == assets.generation == version
+    assert assets.catalog.row_of(11) is None
+
+    # Requests that captured the old snapshot can still finish on it
+    assert old.catalog.row_of(11) is not None
+    assert old.index.search(old.stored_vector(0)[None, :], 1)[1][0, 0] == 0
+
+    with indexed_app.app_context():
+        assert not RecommendationService.reload_assets()
+        assert RecommendationService.reload_assets(force=True)
+    assert RecommendationService.get_assets() is not assets
+
+
+def test_broken_generation_leaves_the_old_one_serving(indexed_app):
+    old = RecommendationService.get_assets()
+    publish_broken_generation()
+
+    with indexed_app.app_context(), pytest.raises(ValueError, match='Index holds 10 vectors'):
+        RecommendationService.reload_assets()
+    assert RecommendationService.get_assets() is old
+
+    assert not AssetWatcher(indexed_app, interval=60).check()
+    assert RecommendationService.get_assets() is old
+    response = indexed_app.test_client().get('/api/songs/3/recommendations')
+    assert response.status_code == 200 and response.get_json()
+
+
+def test_watcher_reloads_new_generations_once(indexed_app):
+    RecommendationService.get_assets()
+    version = publish_new_generation(indexed_app)
+    watcher = AssetWatcher(indexed_app, interval=60)
+
+    assert watcher.check()
+    assert RecommendationService.get_assets().generation == version
+    assert not watcher.check()
+
+
+@pytest.mark.parametrize('configured, sent, status', [
+    (None, TOKEN, 403),
+    (TOKEN, None, 401),
+    (TOKEN, 'wrong-token', 403),
+    (TOKEN, TOKEN, 200),
+])
+def test_admin_endpoints_require_the_token(indexed_app, configured, sent, status):
+    indexed_app.config['ADMIN_TOKEN'] = configured
+    headers = {'X-Admin-Token': sent} if sent else {}
+    client = indexed_app.test_client()
+
+    assert client.get('/api/admin/assets', headers=headers).status_code == status
+    assert client.post(f"{RELOAD_URL}?wait=true", headers=headers).status_code == status
+
+
+def test_reload_with_wait_reports_the_outcome(admin_app):
+    RecommendationService.get_assets()
+    version = publish_new_generation(admin_app)
+
+    body = reload(admin_app, '?wait=true').get_json()
+    assert body['status'] == 'reloaded'
+    assert body['generation'] == body['on_disk'] == version
+
+    assert reload(admin_app, '?wait=true').get_json()['status'] == 'unchanged'
+    assert reload(admin_app, '?wait=true&force=true').get_json()['status'] == 'reloaded'
+
+
+def test_reload_with_wait_reports_failures(admin_app):
+    old = RecommendationService.get_assets()
+    publish_broken_generation()
+
+    response = reload(admin_app, '?wait=true')
+    assert response.status_code == 500
+    assert 'Index holds 10 vectors' in response.get_json()['details']
+    assert RecommendationService.get_assets() is old
+
+
+def test_reload_without_wait_runs_in_the_background(admin_app):
+    old = RecommendationService.get_assets()
+    version = publish_new_generation(admin_app)
+
+    response = reload(admin_app)
+    assert response.status_code == 202
+    assert response.get_json()['status'] == 'reloading'
+    for thread in threading.enumerate():
+        if thread.name == 'asset-reload':
+            thread.join()
+
+    assert RecommendationService.get_assets() is not old
+    assert RecommendationService.get_assets().generation == version
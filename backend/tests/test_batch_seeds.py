@@ -0,0 +1,63 @@
+import pytest
+
+from backend.api.routes.songs import BATCH_DEFAULTS, MAX_BATCH_SEEDS, _parse_batch_seed
+
+
+def test_bare_song_id_gets_the_defaults():
+    params = _parse_batch_seed(12, BATCH_DEFAULTS)
+
+    assert params == {**BATCH_DEFAULTS, 'base_song_id': 12}
+
+
+def test_seed_object_overrides_are_cast():
+    seed = {'song_id': 5, 'energy': '0.8', 'weights': {'energy': 2}, 'limit': '20', 'extended_mixing': 'true'}
+    params = _parse_batch_seed(seed, BATCH_DEFAULTS)
+
+    assert params['base_song_id'] == 5
+    assert params['energy'] == 0.8
+    assert params['weights'] == {'energy': 2.0}
+    assert params['limit'] == 20
+    assert params['extended_mixing'] is True
+    assert params['tempo_tolerance'] == BATCH_DEFAULTS['tempo_tolerance']
+
+
+def test_unset_overrides_keep_the_defaults():
+    defaults = {**BATCH_DEFAULTS, 'limit': 7}
+    params = _parse_batch_seed({'song_id': 5, 'limit': None, 'energy': None}, defaults)
+
+    assert params['limit'] == 7
+    assert 'energy' not in params
+
+
+@pytest.mark.parametrize('seed', [True, False, {'song_id': True}, {'song_id': '5'}, {'id': 5}, '5', None, 1.5])
+def test_invalid_song_ids_are_rejected(seed):
+    with pytest.raises(ValueError, match='song ID'):
+        _parse_batch_seed(seed, BATCH_DEFAULTS)
+
+
+@pytest.mark.parametrize('seed', [
+    {'song_id': 5, 'limit': 0},
+    {'song_id': 5, 'tempo_tolerance': 'nan'},
+    {'song_id': 5, 'weights': {'energy': -1}},
+    {'song_id': 5, 'weights': [1, 2]},
+    {'song_id': 5, 'start_year': 'soon'},
+])
+def test_invalid_options_are_rejected(seed):
+    with pytest.raises(ValueError):
+        _parse_batch_seed(seed, BATCH_DEFAULTS)
+
+
+def test_batch_endpoint_rejects_bad_requests(app):
+    client = app.test_client()
+
+    for body, error in [
+        ({}, "non-empty 'seeds' list"),
+        ({'seeds': []}, "non-empty 'seeds' list"),
+        ({'seeds': list(range(MAX_BATCH_SEEDS + 1))}, f"At most {MAX_BATCH_SEEDS} seeds"),
+        ({'seeds': [True]}, 'song ID'),
+        ({'seeds': [3, {'song_id': 3}]}, 'Duplicate seed'),
+        ({'seeds': [3], 'defaults': {'limit': -5}}, "'limit' must be between 1"),
+    ]:
+        response = client.post('/api/songs/recommendations/batch', json=body)
+        assert response.status_code == 400, body
+        assert error in response.get_json()['error']
@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+
+import pytest
+
+from backend.api.services import cache_service
+from backend.api.services.cache_service import MISS, FileCacheBackend, MemoryCacheBackend, RecommendationCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for the in-process backend"""
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_normalize_quantizes_floats_and_drops_unset_overrides():
+    cache = RecommendationCache(quantum=0.01)
+    params = {'base_song_id': 5, 'energy': 0.016, 'valence': None, 'limit': 50,
+              'weights': {'valence': 2.004, 'energy': 0.5}, 'extended_mixing': False}
+
+    assert cache.normalize(params) == {'base_song_id': 5, 'energy': 0.02, 'limit': 50,
+                                       'weights': {'energy': 0.5, 'valence': 2.0}, 'extended_mixing': False}
+    assert RecommendationCache(quantum=0).normalize({'energy': 0.016}) == {'energy': 0.016}
+
+
+@pytest.mark.parametrize('params', [{'energy': float('nan')}, {'weights': {'energy': float('inf')}}])
+def test_normalize_rejects_non_finite_floats(params):
+    with pytest.raises(ValueError, match='finite'):
+        RecommendationCache().normalize(params)
+
+
+def test_keys_are_stable_across_parameter_and_weight_order():
+    cache = RecommendationCache()
+
+    def key(version, **params):
+        return cache.make_key(version, cache.normalize(params))
+
+    base = key('v1', base_song_id=5, energy=0.8, weights={'energy': 2.0, 'valence': 0.5})
+    assert key('v1', weights={'valence': 0.5, 'energy': 2.0}, energy=0.8, base_song_id=5) == base
+    assert key('v1', base_song_id=5, energy=0.801, weights={'energy': 2.0, 'valence': 0.5}) == base
+    assert key('v1', base_song_id=5, energy=0.81, weights={'energy': 2.0, 'valence': 0.5}) != base
+    assert key('v1', base_song_id=6, energy=0.8, weights={'energy': 2.0, 'valence': 0.5}) != base
+
+    # The catalog version is part of the key, and its prefix
+    other = key('v2', base_song_id=5, energy=0.8, weights={'energy': 2.0, 'valence': 0.5})
+    assert other != base
+    assert other.split('-')[0] != base.split('-')[0]
+    assert base.startswith(key('v1', base_song_id=1).split('-')[0] + '-')
+
+
+def test_memory_backend_expires_entries(clock):
+    backend = MemoryCacheBackend(max_entries=10, ttl=60)
+    backend.set('a', [1])
+
+    clock[0] += 59
+    assert backend.get('a') == [1]
+    clock[0] += 2
+    assert backend.get('a') is MISS
+    assert len(backend) == 0
+
+
+def test_memory_backend_evicts_the_least_recently_used(clock):
+    backend = MemoryCacheBackend(max_entries=2, ttl=60)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    backend.get('a')
+    backend.set('c', 3)
+
+    assert backend.get('b') is MISS
+    assert (backend.get('a'), backend.get('c')) == (1, 3)
+
+
+def test_get_or_compute_computes_once_with_normalized_parameters():
+    cache = RecommendationCache(max_entries=8)
+    calls = []
+
+    def compute(**params):
+        calls.append(params)
+        return [params['energy']]
+
+    assert cache.get_or_compute(compute, version='v1', base_song_id=5, energy=0.016, valence=None) == [0.02]
+    assert cache.get_or_compute(compute, version='v1', base_song_id=5, energy=0.0201) == [0.02]
+    assert calls == [{'base_song_id': 5, 'energy': 0.02}]
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+    cache.get_or_compute(compute, version='v2', base_song_id=5, energy=0.02)
+    assert len(calls) == 2
+
+
+def test_disabled_cache_computes_with_the_original_parameters():
+    cache = RecommendationCache(max_entries=0)
+    calls = []
+    cache.get_or_compute(lambda **params: calls.append(params), version='v1', energy=0.016)
+
+    assert calls == [{'energy': 0.016}]
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'size': 0}
+
+
+def test_counters_are_exact_under_concurrent_lookups():
+    cache = RecommendationCache(max_entries=8)
+    cache.set('hit', 1)
+
+    def look_up():
+        for _ in range(500):
+            cache.get('hit')
+            cache.get('miss')
+
+    threads = [threading.Thread(target=look_up) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (cache.hits, cache.misses) == (4000, 4000)
+
+
+def test_file_backend_round_trip_and_expiry(tmp_path):
+    backend = FileCacheBackend(tmp_path, ttl=60)
+    backend.set('key', [{'songId': 1}])
+    assert backend.get('key') == [{'songId': 1}]
+    assert backend.get('other') is MISS
+
+    old = time.time() - 120
+    os.utime(tmp_path / 'key.json', (old, old))
+    assert backend.get('key') is MISS
+    assert not (tmp_path / 'key.json').exists()
+
+
+def test_file_backend_prunes_expired_then_oldest_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(FileCacheBackend, 'PRUNE_INTERVAL', 10)
+    backend = FileCacheBackend(tmp_path, ttl=60, max_entries=5)
+    now = time.time()
+    for i in range(9):
+        backend.set(f"k{i}", i)
+        # k0 and k1 expired; the rest one second apart, oldest first
+        mtime = now - 120 if i < 2 else now - 20 + i
+        os.utime(tmp_path / f"k{i}.json", (mtime, mtime))
+
+    backend.set('k9', 9)  # Tenth write prunes
+    assert sorted(path.stem for path in tmp_path.glob('*.json')) == ['k5', 'k6', 'k7', 'k8', 'k9']
+    assert backend.prune() == 0
+
+
+def test_retain_version_discards_shared_entries_of_other_versions(tmp_path):
+    cache = RecommendationCache(max_entries=8, shared_backend=FileCacheBackend(tmp_path, ttl=60))
+    old_key = cache.make_key('v1', {'base_song_id': 5})
+    new_key = cache.make_key('v2', {'base_song_id': 5})
+    cache.set(old_key, 'old')
+    cache.set(new_key, 'new')
+
+    cache.retain_version('v2')
+    assert [path.stem for path in tmp_path.glob('*.json')] == [new_key]
+
+    # Shared entries written by another process fill the local cache on a hit
+    other = RecommendationCache(max_entries=8, shared_backend=FileCacheBackend(tmp_path, ttl=60))
+    assert other.get(new_key) == 'new'
+    assert other.get(old_key) is MISS
+    assert other.local.get(new_key) == 'new'
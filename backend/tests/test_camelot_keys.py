@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from backend.api.services.camelot_keys_service import (
+    CAMELOT_COMPATIBILITY,
+    CAMELOT_COMPATIBILITY_EXTENDED,
+    DIAGONAL,
+    ENERGY_BOOST,
+    HARMONIC,
+    PARALLEL,
+    CamelotKeysService,
+)
+
+
+def camelot_id(code: str) -> int:
+    """Camelot key ID of a wheel code: 1A-12A are IDs 1-12, 1B-12B are IDs 13-24"""
+    number, letter = int(code[:-1]), code[-1]
+    return number + (0 if letter == 'A' else 12)
+
+
+def codes_of(key: str, extended: bool = False) -> dict:
+    codes = CamelotKeysService.get_compatibility_codes(camelot_id(key), extended)
+    return {int(i): int(codes[i]) for i in np.flatnonzero(codes)}
+
+
+@pytest.mark.parametrize('key, expected', [
+    ('8A', {'7A': HARMONIC, '8A': HARMONIC, '9A': HARMONIC, '8B': PARALLEL}),
+    ('1A', {'12A': HARMONIC, '1A': HARMONIC, '2A': HARMONIC, '1B': PARALLEL}),
+    ('12B', {'11B': HARMONIC, '12B': HARMONIC, '1B': HARMONIC, '12A': PARALLEL}),
+])
+def test_standard_mixes(key, expected):
+    assert codes_of(key) == {camelot_id(code): value for code, value in expected.items()}
+
+
+@pytest.mark.parametrize('key, expected', [
+    ('8A', {'7A': HARMONIC, '8A': HARMONIC, '9A': HARMONIC, '8B': PARALLEL, '10A': ENERGY_BOOST, '9B': DIAGONAL}),
+    ('8B', {'7B': HARMONIC, '8B': HARMONIC, '9B': HARMONIC, '8A': PARALLEL, '10B': ENERGY_BOOST, '7A': DIAGONAL}),
+    ('11A', {'10A': HARMONIC, '11A': HARMONIC, '12A': HARMONIC, '11B': PARALLEL, '1A': ENERGY_BOOST, '12B': DIAGONAL}),
+    ('1B', {'12B': HARMONIC, '1B': HARMONIC, '2B': HARMONIC, '1A': PARALLEL, '3B': ENERGY_BOOST, '12A': DIAGONAL}),
+])
+def test_extended_mixes(key, expected):
+    assert codes_of(key, extended=True) == {camelot_id(code): value for code, value in expected.items()}
+
+
+def test_key_ids_match_the_wheel():
+    assert CamelotKeysService.get_key_str(camelot_id('8A')) == 'A min'
+    assert CamelotKeysService.get_key_str(camelot_id('8B')) == 'C Maj'
+    assert CamelotKeysService.get_key_str(camelot_id('1A')) == 'G#/Ab min'
+    assert CamelotKeysService.get_key_str(camelot_id('1B')) == 'B Maj'
+    assert CamelotKeysService.get_key_str(0) is None
+    assert CamelotKeysService.get_key_str(25) is None
+
+
+def test_matrices_are_read_only_and_consistent():
+    for matrix in (CAMELOT_COMPATIBILITY, CAMELOT_COMPATIBILITY_EXTENDED):
+        assert not matrix.flags.writeable
+        assert not matrix[0].any() and not matrix[:, 0].any()
+    # Standard mixes are symmetric; the extended set only adds pairs
+    assert (CAMELOT_COMPATIBILITY == CAMELOT_COMPATIBILITY.T).all()
+    standard = CAMELOT_COMPATIBILITY != 0
+    assert (CAMELOT_COMPATIBILITY_EXTENDED[standard] == CAMELOT_COMPATIBILITY[standard]).all()
+    assert ((CAMELOT_COMPATIBILITY_EXTENDED != 0).sum(axis=1)[1:] == 6).all()
+
+
+@pytest.mark.parametrize('key_id', [0, -1, 25, 100])
+def test_unknown_keys_match_nothing(key_id):
+    assert not CamelotKeysService.get_compatibility_codes(key_id).any()
+    assert not CamelotKeysService.get_compatibility_codes(key_id, extended=True).any()
+
+
+def test_compatible_keys_dict_form():
+    keys = CamelotKeysService.get_compatible_keys(camelot_id('8A'), as_dict=True, extended=True)
+
+    assert {key['id']: key['compatibility_type'] for key in keys} == {
+        7: 'harmonic', 8: 'harmonic', 9: 'harmonic', 20: 'parallel', 10: 'energy_boost', 21: 'diagonal'
+    }
+    assert {key['key_str'] for key in keys if key['id'] == 20} == {'C Maj'}
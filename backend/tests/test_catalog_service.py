@@ -0,0 +1,38 @@
+import numpy as np
+from sqlalchemy import select
+
+from backend.api.database.models import Song
+from backend.api.extensions import db
+from backend.api.services.catalog_service import SongCatalog, build_row_lookup, is_row_lookup_for
+from backend.api.services.song_service import SongService
+
+
+def test_row_lookup_maps_ids_to_rows():
+    song_ids = np.array([7, 2, 11, 0])
+    id_to_row = build_row_lookup(song_ids)
+
+    assert id_to_row.tolist() == [3, -1, 1, -1, -1, -1, -1, 0, -1, -1, -1, 2]
+    assert is_row_lookup_for(id_to_row, song_ids)
+    assert not is_row_lookup_for(id_to_row, song_ids[::-1])
+
+
+def test_catalog_serializes_like_the_database(seeded_app):
+    with seeded_app.app_context():
+        song_ids = np.array(db.session.execute(select(Song.song_id)).scalars().all())
+        catalog = SongCatalog.from_database(song_ids[::-1])
+
+        assert catalog.valid.all()
+        for song_id in song_ids[::37]:
+            row = catalog.row_of(int(song_id))
+            assert catalog.song_ids[row] == song_id
+            assert catalog.serialize(row) == SongService.serialize_song(SongService.get_song_row(int(song_id)))
+
+
+def test_catalog_marks_songs_missing_from_the_database_invalid(seeded_app):
+    with seeded_app.app_context():
+        catalog = SongCatalog.from_database(np.array([3, 5_000_000, 4]))
+
+        assert catalog.valid.tolist() == [True, False, True]
+        assert catalog.row_of(4) == 2
+        assert catalog.row_of(5_000_000) is None
+        assert catalog.row_of(-1) is None
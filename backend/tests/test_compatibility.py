@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from backend.api.services.camelot_keys_service import CamelotKeysService
+from backend.api.services.song_service import RecommendationService
+
+
+@pytest.fixture(scope='module')
+def candidates():
+    rng = np.random.default_rng(3)
+    count = 5000
+    return {
+        'tempos': rng.uniform(50, 200, count),
+        'keys': rng.integers(1, 25, count),
+        'years': rng.integers(1950, 2025, count),
+    }
+
+
+def is_compatible(base_tempo, key_codes, tempo, key, year, tempo_tolerance, start_year, end_year):
+    """One candidate at a time, as the per-candidate loop did"""
+    if key_codes[key] == 0 or not start_year <= year <= end_year:
+        return False
+    return (abs(tempo - base_tempo) <= tempo_tolerance
+            or abs(tempo - base_tempo / 2) <= 2.0
+            or abs(tempo - base_tempo * 2) <= 2.0)
+
+
+@pytest.mark.parametrize('base_tempo, base_key, tempo_tolerance, start_year, end_year, extended', [
+    (120.0, 8, 4.0, 0, 3000, False),
+    (90.0, 20, 8.0, 1970, 1990, True),
+    (174.0, 1, 0.0, 2000, 2000, False),
+    (60.0, 13, 20.0, 1990, 1980, True),
+])
+def test_mask_matches_per_candidate_check(candidates, base_tempo, base_key, tempo_tolerance,
+                                          start_year, end_year, extended):
+    key_codes = CamelotKeysService.get_compatibility_codes(base_key, extended)
+
+    mask, types = RecommendationService._compatibility(
+        base_tempo, key_codes, candidates['tempos'], candidates['keys'], candidates['years'],
+        tempo_tolerance, start_year, end_year
+    )
+
+    expected = [
+        is_compatible(base_tempo, key_codes, tempo, key, year, tempo_tolerance, start_year, end_year)
+        for tempo, key, year in zip(candidates['tempos'], candidates['keys'], candidates['years'])
+    ]
+    assert mask.tolist() == expected
+    assert (types[mask] == key_codes[candidates['keys'][mask]]).all()
+    assert (types[~mask] == 0).all()
+
+
+def test_batched_seeds_match_single_seeds(candidates):
+    seeds = [(120.0, 8, 4.0, 0, 3000), (90.0, 20, 8.0, 1970, 1990), (140.0, 5, 2.0, 1980, 2020)]
+    rows = np.random.default_rng(4).integers(0, len(candidates['tempos']), (len(seeds), 50))
+    key_codes = np.stack([CamelotKeysService.get_compatibility_codes(key) for _, key, _, _, _ in seeds])
+
+    def column(i):
+        return np.array([seed[i] for seed in seeds])[:, None]
+
+    mask, types = RecommendationService._compatibility(
+        column(0), key_codes, candidates['tempos'][rows], candidates['keys'][rows], candidates['years'][rows],
+        column(2), column(3), column(4)
+    )
+
+    for i, (tempo, key, tolerance, start_year, end_year) in enumerate(seeds):
+        single_mask, single_types = RecommendationService._compatibility(
+            tempo, key_codes[i], candidates['tempos'][rows[i]], candidates['keys'][rows[i]],
+            candidates['years'][rows[i]], tolerance, start_year, end_year
+        )
+        assert mask[i].tolist() == single_mask.tolist()
+        assert types[i].tolist() == single_types.tolist()
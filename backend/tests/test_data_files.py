@@ -0,0 +1,81 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from backend.scripts.operations.data_files import TableWriter, iter_table, read_table, write_table
+from backend.scripts.operations.pre_process import PROCESSED_DTYPES
+
+
+class WriteFailed(Exception):
+    pass
+
+
+def test_parquet_append_keeps_the_rows_and_schema(tmp_path, make_songs):
+    path = tmp_path / 'songs.parquet'
+    first, second = make_songs(30), make_songs(20, first_song_id=30, seed=1)
+    write_table(first, path, dtypes=PROCESSED_DTYPES)
+    schema = pq.read_schema(path)
+
+    # Integer columns read back as floats still get the file's types
+    with TableWriter(path, dtypes=PROCESSED_DTYPES, append=True) as writer:
+        writer.write(second.head(12).astype({'Year': 'float64', 'Popularity': 'float64'}))
+        writer.write(second.tail(8))
+
+    assert pq.read_schema(path).equals(schema)
+    assert schema.names == list(PROCESSED_DTYPES)
+    assert schema.field('Year').type == pa.int64() and schema.field('Energy').type == pa.float64()
+    songs = read_table(path)
+    assert len(songs) == 50
+    assert songs['Song_ID'].tolist() == list(range(50))
+    assert songs.loc[30:, 'Track'].tolist() == second['Track'].tolist()
+    assert not (tmp_path / 'songs.parquet.tmp').exists()
+
+
+@pytest.mark.parametrize('suffix, append', [('.parquet', True), ('.parquet', False), ('.csv', False)])
+def test_failure_mid_write_keeps_the_previous_file(tmp_path, make_songs, suffix, append):
+    path = tmp_path / f"songs{suffix}"
+    write_table(make_songs(30), path, dtypes=PROCESSED_DTYPES)
+    before = path.read_bytes()
+
+    with pytest.raises(WriteFailed):
+        with TableWriter(path, dtypes=PROCESSED_DTYPES, append=append) as writer:
+            writer.write(make_songs(10, first_song_id=30))
+            raise WriteFailed()
+
+    assert path.read_bytes() == before
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_failure_writing_a_new_file_leaves_no_file(tmp_path, make_songs):
+    path = tmp_path / 'songs.parquet'
+
+    with pytest.raises(WriteFailed):
+        with TableWriter(path, dtypes=PROCESSED_DTYPES) as writer:
+            writer.write(make_songs(10))
+            raise WriteFailed()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_csv_append_writes_in_place(tmp_path, make_songs):
+    path = tmp_path / 'songs.csv'
+    write_table(make_songs(30), path, dtypes=PROCESSED_DTYPES)
+
+    # No rollback: rows written before the failure stay
+    with pytest.raises(WriteFailed):
+        with TableWriter(path, dtypes=PROCESSED_DTYPES, append=True) as writer:
+            writer.write(make_songs(10, first_song_id=30))
+            raise WriteFailed()
+
+    assert read_table(path, dtypes=PROCESSED_DTYPES)['Song_ID'].tolist() == list(range(40))
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_chunks_are_indexed_by_row_number(tmp_path, make_songs, suffix):
+    path = tmp_path / f"songs{suffix}"
+    write_table(make_songs(25), path, dtypes=PROCESSED_DTYPES)
+
+    chunks = list(iter_table(path, chunk_size=10, columns=['Song_ID', 'Energy']))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [chunk.index[0] for chunk in chunks] == [0, 10, 20]
+    assert all(list(chunk.columns) == ['Song_ID', 'Energy'] for chunk in chunks)
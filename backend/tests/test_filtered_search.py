@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from backend.api.services.index_factory import create_index
+from backend.api.services.song_service import RecommendationService
+
+DIMENSION = 8
+
+
+@pytest.fixture(scope='module')
+def vectors():
+    return np.random.default_rng(0).standard_normal((3000, DIMENSION)).astype(np.float32)
+
+
+def brute_force(vectors, query, mask, k):
+    """Squared L2 distances and rows of the k nearest allowed rows"""
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    rows = np.flatnonzero(mask)
+    order = np.lexsort((rows, distances[rows]))[:k]
+    return distances[rows[order]], rows[order]
+
+
+@pytest.mark.parametrize('selectivity', [0.5, 0.05, 0.002])
+def test_flat_search_matches_brute_force(vectors, selectivity):
+    index, _ = create_index(vectors, 'flat')
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        mask = rng.random(len(vectors)) < selectivity
+        query = rng.standard_normal(DIMENSION).astype(np.float32)
+
+        distances, rows = RecommendationService._filtered_search(index, query[None, :], mask, 20)
+        expected_distances, expected_rows = brute_force(vectors, query, mask, 20)
+
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize('index_type, params', [
+    ('ivfflat', {'nlist': 32, 'nprobe': 1}),
+    ('hnsw', {'m': 16, 'ef_search': 16}),
+])
+def test_approximate_search_widens_until_enough_hits(vectors, index_type, params):
+    index, _ = create_index(vectors, index_type, **params)
+    rng = np.random.default_rng(2)
+    recall = []
+    for _ in range(10):
+        # A few dozen allowed rows: the default nprobe/efSearch reach too few of them
+        mask = rng.random(len(vectors)) < 0.01
+        query = rng.standard_normal(DIMENSION).astype(np.float32)
+
+        distances, rows = RecommendationService._filtered_search(index, query[None, :], mask, 20)
+        _, expected_rows = brute_force(vectors, query, mask, 20)
+
+        assert len(rows) == min(20, mask.sum())
+        assert mask[rows].all()
+        assert (np.diff(distances) >= 0).all()
+        recall.append(len(set(rows.tolist()) & set(expected_rows.tolist())) / len(expected_rows))
+    assert np.mean(recall) >= 0.9
+
+
+@pytest.mark.parametrize('limit', [0, -5])
+def test_search_without_hits_to_return(vectors, limit):
+    index, _ = create_index(vectors, 'flat')
+    mask = np.ones(len(vectors), dtype=bool)
+
+    distances, rows = RecommendationService._filtered_search(index, vectors[:1], mask, limit)
+    assert len(distances) == len(rows) == 0
+
+    distances, rows = RecommendationService._filtered_search(index, vectors[:1], ~mask, 10)
+    assert len(distances) == len(rows) == 0
+
+
+@pytest.mark.parametrize('query, error', [
+    ('limit=-5', "'limit' must be between 1"),
+    ('limit=0', "'limit' must be between 1"),
+    ('limit=100000', "'limit' must be between 1"),
+    ('tempo_tolerance=nan', "'tempo_tolerance' must be a finite"),
+    ('tempo_tolerance=-1', "'tempo_tolerance' must be a finite"),
+    ('energy_weight=inf', "Weight of 'energy'"),
+    ('energy_weight=-2', "Weight of 'energy'"),
+    ('valence=nan', "'valence' must be a finite number"),
+])
+def test_recommendations_reject_invalid_parameters(app, query, error):
+    response = app.test_client().get(f'/api/songs/1/recommendations?{query}')
+
+    assert response.status_code == 400
+    assert error in response.get_json()['error']
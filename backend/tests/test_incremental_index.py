@@ -0,0 +1,172 @@
+import logging
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import delete, func, inspect, select, update
+
+from backend.api.database.models import Song
+from backend.api.extensions import db
+from backend.api.services.asset_bundle import AssetBundle
+from backend.api.services.catalog_service import SongCatalog
+from backend.constants import AUDIO_FEATURES
+from backend.scripts.operations.index import build_faiss_index
+from backend.scripts.operations.migrate import UPDATED_AT_INDEX, has_updated_at, migrate_database
+
+
+def change_songs(app, updated, deleted, new_song_ids):
+    """Update the features of `updated`, delete `deleted` and insert `new_song_ids` through the ORM"""
+    rng = np.random.default_rng(2)
+    with app.app_context():
+        for song_id in updated:
+            db.session.execute(update(Song).where(Song.song_id == song_id).values(
+                energy=float(rng.random()), valence=float(rng.random())))
+        db.session.execute(delete(Song).where(Song.song_id.in_(deleted)))
+        for song_id in new_song_ids:
+            db.session.add(Song(
+                song_id=song_id, title=f"New {song_id}", artist='Tester', year=1990, duration=200000,
+                time_signature=4, camelot_key_id=8, tempo=120.0, popularity=50, genre='Rock', loudness_dB=-5.0,
+                **{feature: float(rng.random()) for feature in AUDIO_FEATURES}
+            ))
+        db.session.commit()
+
+
+def assert_matches_database(app, bundle):
+    """The bundle's catalog and vectors hold what a fresh read of the database gives"""
+    with app.app_context():
+        song_ids = np.asarray(bundle.array('song_ids'))
+        catalog = SongCatalog.from_bundle(bundle)
+        expected = SongCatalog.from_database(song_ids)
+
+    valid = expected.valid
+    assert (np.asarray(catalog.valid) == valid).all()
+    for name in SongCatalog.NUMERIC_COLUMNS:
+        assert (np.asarray(getattr(catalog, name))[valid] == getattr(expected, name)[valid]).all(), name
+    for name in SongCatalog.STRING_COLUMNS:
+        assert all(getattr(catalog, name)[row] == getattr(expected, name)[row] for row in np.flatnonzero(valid))
+
+    vectors = np.asarray(bundle.array('vectors'))
+    normalized = (expected.features[valid].astype('float32') - bundle.array('feature_mean')) / bundle.array('feature_std')
+    assert (vectors[valid] == normalized).all()
+
+    # Every valid row finds itself
+    _, rows = bundle.read_index().search(vectors[valid], 1)
+    assert (rows[:, 0] == np.flatnonzero(valid)).all()
+    return catalog
+
+
+@pytest.mark.parametrize('index_type', ['flat', 'ivfflat'])
+def test_incremental_build_applies_inserts_updates_and_deletes(seeded_app, tmp_path, index_type):
+    build_faiss_index(index_type, bundle_dir=tmp_path, nlist=8, nprobe=8)
+    base = AssetBundle.current(tmp_path)
+    base_ids = np.asarray(base.array('song_ids'))
+
+    updated, deleted, new_song_ids = [3, 50, 222], [7, 99], [1000, 1001, 1002]
+    change_songs(seeded_app, updated, deleted, new_song_ids)
+    build_faiss_index(index_type, bundle_dir=tmp_path, incremental=True)
+
+    bundle = AssetBundle.current(tmp_path)
+    assert bundle.version != base.version
+    assert bundle.manifest['base_version'] == base.version
+    assert bundle.manifest['changed_since_training'] == len(updated) + len(deleted) + len(new_song_ids)
+
+    # Rows keep their song IDs; new songs are appended
+    song_ids = np.asarray(bundle.array('song_ids'))
+    assert (song_ids[:len(base_ids)] == base_ids).all()
+    assert song_ids[len(base_ids):].tolist() == new_song_ids
+
+    catalog = assert_matches_database(seeded_app, bundle)
+    assert not np.asarray(catalog.valid)[catalog.id_to_row[deleted]].any()
+    with seeded_app.app_context():
+        energies = dict(db.session.execute(select(Song.song_id, Song.energy).where(Song.song_id.in_(updated))).all())
+    assert [catalog.features[catalog.id_to_row[song_id]][AUDIO_FEATURES.index('energy')] for song_id in updated] == \
+        pytest.approx([energies[song_id] for song_id in updated])
+
+
+def test_incremental_build_without_changes_keeps_the_bundle(seeded_app, tmp_path):
+    build_faiss_index('flat', bundle_dir=tmp_path)
+    version = AssetBundle.current_version(tmp_path)
+
+    build_faiss_index('flat', bundle_dir=tmp_path, incremental=True)
+    assert AssetBundle.current_version(tmp_path) == version
+
+
+def test_changes_committed_after_a_build_with_an_earlier_updated_at_are_picked_up(seeded_app, tmp_path):
+    with seeded_app.app_context():
+        started = db.session.execute(select(func.now())).scalar()
+    build_faiss_index('flat', bundle_dir=tmp_path)
+    base = AssetBundle.current(tmp_path)
+
+    # A transaction that began before the build and committed after it stamps the time it began
+    with seeded_app.app_context():
+        db.session.execute(update(Song).where(Song.song_id == 3).values(
+            energy=0.123, updated_at=started - timedelta(minutes=1)))
+        db.session.commit()
+    build_faiss_index('flat', bundle_dir=tmp_path, incremental=True)
+
+    bundle = AssetBundle.current(tmp_path)
+    assert bundle.manifest['base_version'] == base.version
+    catalog = assert_matches_database(seeded_app, bundle)
+    assert catalog.features[catalog.id_to_row[3]][AUDIO_FEATURES.index('energy')] == pytest.approx(0.123)
+
+
+def test_drift_past_the_threshold_runs_a_full_build(seeded_app, tmp_path):
+    build_faiss_index('flat', bundle_dir=tmp_path)
+    change_songs(seeded_app, [1, 2], [], [])
+
+    build_faiss_index('flat', bundle_dir=tmp_path, incremental=True, drift_threshold=0.0)
+    bundle = AssetBundle.current(tmp_path)
+    assert 'base_version' not in bundle.manifest
+    assert bundle.manifest['changed_since_training'] == 0
+    assert_matches_database(seeded_app, bundle)
+
+
+def drop_updated_at(app):
+    """Turn the test database into one created before songs.updated_at existed"""
+    with app.app_context(), db.engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP INDEX {UPDATED_AT_INDEX}")
+        conn.exec_driver_sql("ALTER TABLE songs DROP COLUMN updated_at")
+
+
+def test_migration_adds_updated_at_and_is_idempotent(seeded_app):
+    drop_updated_at(seeded_app)
+
+    with seeded_app.app_context():
+        assert not has_updated_at()
+        assert migrate_database() == ['songs.updated_at', UPDATED_AT_INDEX]
+        assert migrate_database() == []
+        assert has_updated_at()
+        assert UPDATED_AT_INDEX in {index['name'] for index in inspect(db.engine).get_indexes('songs')}
+
+        # Existing rows are backfilled, and rows inserted without a value are stamped
+        assert db.session.execute(select(Song.updated_at).where(Song.updated_at.is_(None))).first() is None
+        row = db.session.execute(select(Song.__table__).where(Song.song_id == 1)).mappings().one()
+        values = {**row, 'song_id': 5000, 'title': 'Raw'}
+        del values['updated_at']
+        db.session.execute(Song.__table__.insert().values(**values))
+        db.session.commit()
+        stamped = db.session.execute(select(Song.updated_at).where(Song.song_id == 5000)).scalar_one()
+        assert stamped.year > 1970
+
+
+def test_incremental_build_before_migration_runs_a_full_build(seeded_app, tmp_path, caplog):
+    build_faiss_index('flat', bundle_dir=tmp_path)
+    base = AssetBundle.current(tmp_path)
+    drop_updated_at(seeded_app)
+    with seeded_app.app_context():
+        db.session.execute(delete(Song).where(Song.song_id == 5))
+        db.session.commit()
+
+    with caplog.at_level(logging.WARNING):
+        build_faiss_index('flat', bundle_dir=tmp_path, incremental=True)
+    assert 'updated_at is missing' in caplog.text
+
+    bundle = AssetBundle.current(tmp_path)
+    assert bundle.version != base.version and 'base_version' not in bundle.manifest
+    assert 5 not in np.asarray(bundle.array('song_ids'))
+
+    with seeded_app.app_context():
+        migrate_database()
+    change_songs(seeded_app, [], [6], [])
+    build_faiss_index('flat', bundle_dir=tmp_path, incremental=True)
+    assert AssetBundle.current(tmp_path).manifest['base_version'] == bundle.version
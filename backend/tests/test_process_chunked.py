@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.scripts.operations.data_files import read_table
+from backend.scripts.operations.pre_process import (
+    FEATURES,
+    default_transform_path,
+    load_quantile_transform,
+    process_data,
+    process_data_chunked,
+)
+
+
+@pytest.fixture
+def raw_path(tmp_path, make_raw):
+    """Raw CSV of 230 songs with repeated songs and feature values, some across chunk boundaries"""
+    raw = make_raw(230)
+    # Whole songs repeated within and across chunks of 32 (rows 31/32 and 63/64 straddle boundaries)
+    raw.loc[[32, 64, 100, 229]] = raw.loc[[31, 63, 5, 0]].to_numpy()
+    # Feature values tied across quantile bins
+    raw.loc[:60, 'Instrumentalness'] = 0.0
+    path = tmp_path / 'raw.csv'
+    raw.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_chunked_output_matches_process_data(tmp_path, raw_path, suffix):
+    whole = tmp_path / f"whole{suffix}"
+    chunked = tmp_path / f"chunked{suffix}"
+    process_data(input_path=str(raw_path), output_path=str(whole))
+
+    assert process_data_chunked(input_path=raw_path, output_path=chunked, chunk_size=32, workers=2) == 230
+
+    if suffix == '.csv':
+        assert chunked.read_bytes() == whole.read_bytes()
+    expected, actual = read_table(whole), read_table(chunked)
+    pd.testing.assert_frame_equal(actual, expected)
+    assert actual['Song_ID'].tolist() == list(range(230))
+
+    # Duplicates are kept as separate songs (seeding de-duplicates them)
+    assert (actual.loc[[31, 32], 'Track'].nunique(), actual.loc[[63, 64], 'Track'].nunique()) == (1, 1)
+
+    expected_state = load_quantile_transform(default_transform_path(whole))
+    actual_state = load_quantile_transform(default_transform_path(chunked))
+    assert actual_state['next_song_id'] == expected_state['next_song_id'] == 230
+    for feature in FEATURES:
+        for name in ('values', 'scaled'):
+            np.testing.assert_array_equal(actual_state['features'][feature][name],
+                                          expected_state['features'][feature][name])
+
+
+def test_chunk_size_and_workers_do_not_change_the_output(tmp_path, raw_path):
+    outputs = []
+    for chunk_size, workers in [(230, 1), (7, 2), (50, 3)]:
+        output = tmp_path / f"processed_{chunk_size}_{workers}.csv"
+        process_data_chunked(input_path=raw_path, output_path=output, chunk_size=chunk_size, workers=workers)
+        outputs.append(output.read_bytes())
+
+    assert outputs[1] == outputs[0] and outputs[2] == outputs[0]
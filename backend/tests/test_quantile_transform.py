@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from backend.api.database.models import Song
+from backend.api.extensions import db
+from backend.scripts.operations import update
+from backend.scripts.operations.data_files import read_table
+from backend.scripts.operations.pre_process import (
+    FEATURES,
+    apply_quantile_transform,
+    default_transform_path,
+    fit_quantile_transform,
+    load_quantile_transform,
+    process_data,
+    process_new_songs,
+    uniform_quantile_scale,
+)
+from backend.scripts.operations.seed import seed_database
+
+
+@pytest.fixture
+def catalog(tmp_path, make_raw):
+    """Raw catalog of 300 songs processed to processed.csv (transform saved beside it)"""
+    raw = make_raw(300)
+    raw_path = tmp_path / 'raw.csv'
+    raw.to_csv(raw_path, index=False)
+    output = tmp_path / 'processed.csv'
+    processed = process_data(input_path=str(raw_path), output_path=str(output))
+    return raw, processed, output
+
+
+def test_transform_is_saved_beside_the_output_as_plain_arrays(catalog, tmp_path):
+    _, _, output = catalog
+    path = default_transform_path(output)
+    assert path == tmp_path / 'processed.quantile_transform.npz'
+
+    # Loads without pickle
+    with np.load(path, allow_pickle=False) as data:
+        assert int(data['next_song_id']) == 300
+        assert {f"{feature}.values" for feature in FEATURES} <= set(data.files)
+    state = load_quantile_transform(path)
+    assert state['next_song_id'] == 300
+    assert set(state['features']) == set(FEATURES)
+
+
+def test_saved_transform_reproduces_the_scaling_of_the_training_rows(catalog):
+    raw, processed, output = catalog
+    state = load_quantile_transform(default_transform_path(output))
+
+    applied = apply_quantile_transform(raw, state['features'])
+    for feature in FEATURES:
+        np.testing.assert_allclose(applied[feature], processed[feature], rtol=0, atol=1e-12, err_msg=feature)
+
+
+def test_values_tied_across_bins_get_one_scaled_value(make_raw):
+    raw = make_raw(500)
+    raw.loc[:119, 'Instrumentalness'] = 0.0
+
+    scaled = uniform_quantile_scale(raw)
+    applied = apply_quantile_transform(raw, fit_quantile_transform(raw, scaled))
+
+    tied = raw['Instrumentalness'] == 0
+    zero = applied.loc[tied, 'Instrumentalness'].unique()
+    assert len(zero) == 1
+    assert scaled.loc[tied, 'Instrumentalness'].min() <= zero[0] <= scaled.loc[tied, 'Instrumentalness'].max()
+    np.testing.assert_allclose(applied.loc[~tied, 'Instrumentalness'], scaled.loc[~tied, 'Instrumentalness'],
+                               rtol=0, atol=1e-12)
+
+
+def test_values_outside_the_fitted_range_are_clamped(catalog):
+    raw, _, output = catalog
+    state = load_quantile_transform(default_transform_path(output))
+    extremes = raw.head(2).copy()
+    extremes.loc[:, FEATURES] = [[-1e6] * len(FEATURES), [1e6] * len(FEATURES)]
+
+    applied = apply_quantile_transform(extremes, state['features'])
+    assert (applied[FEATURES].iloc[0] == 0).all()
+    assert (applied[FEATURES].iloc[1] == 1).all()
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_new_songs_are_appended_with_the_next_song_ids(tmp_path, make_raw, suffix):
+    raw = make_raw(300)
+    raw.to_csv(tmp_path / 'raw.csv', index=False)
+    output = tmp_path / f"processed{suffix}"
+    processed = process_data(input_path=str(tmp_path / 'raw.csv'), output_path=str(output))
+
+    # New songs reusing catalog feature values are scaled like those catalog songs
+    new = make_raw(20, seed=1)
+    new[FEATURES] = raw.loc[:19, FEATURES].to_numpy()
+    new.to_csv(tmp_path / 'new.csv', index=False)
+    added = process_new_songs(tmp_path / 'new.csv', output)
+
+    assert added['Song_ID'].tolist() == list(range(300, 320))
+    np.testing.assert_allclose(added[FEATURES], processed.loc[:19, FEATURES], rtol=0, atol=1e-12)
+    assert added['Track'].tolist() == new['Track'].tolist()
+
+    combined = read_table(output)
+    assert len(combined) == 320
+    assert combined['Song_ID'].tolist() == list(range(320))
+    assert load_quantile_transform(default_transform_path(output))['next_song_id'] == 320
+
+    make_raw(5, seed=2).to_csv(tmp_path / 'more.csv', index=False)
+    assert process_new_songs(tmp_path / 'more.csv', output)['Song_ID'].tolist() == list(range(320, 325))
+
+
+def test_new_songs_need_a_saved_transform(tmp_path, make_raw):
+    make_raw(5).to_csv(tmp_path / 'new.csv', index=False)
+
+    with pytest.raises(FileNotFoundError, match='No quantile transform'):
+        process_new_songs(tmp_path / 'new.csv', tmp_path / 'processed.csv')
+    assert not (tmp_path / 'processed.csv').exists()
+
+
+def test_update_writes_only_songs_whose_features_changed(app, tmp_path, make_songs, monkeypatch):
+    monkeypatch.setattr(update, 'FAILED_UPDATES_FILE', tmp_path / 'failed_updates.json')
+    songs = make_songs(50)
+    songs.to_csv(tmp_path / 'songs.csv', index=False)
+
+    changed = songs.copy()
+    changed.loc[[3, 17, 40], 'Energy'] += 0.1
+    changed.loc[8, 'Valence'] += 1e-12  # Below the comparison tolerance
+    changed.loc[[5, 6], 'Track'] = 'Renamed'  # Not a feature
+    extra = make_songs(1, first_song_id=500)  # Not in the database
+    pd.concat([changed, extra]).to_csv(tmp_path / 'changed.csv', index=False)
+
+    written = []
+    process_batches = update._process_update_batches
+    monkeypatch.setattr(update, '_process_update_batches',
+                        lambda rows: written.extend(row['song_id'] for row in rows) or process_batches(rows))
+
+    with app.app_context():
+        seed_database(csv_path=str(tmp_path / 'songs.csv'))
+        assert update.update_existing_songs(csv_path=str(tmp_path / 'changed.csv')) == 3
+        assert sorted(written) == [3, 17, 40]
+
+        energies = dict(db.session.execute(select(Song.song_id, Song.energy)).all())
+        assert [energies[song_id] for song_id in (3, 17, 40)] == pytest.approx(changed.loc[[3, 17, 40], 'Energy'])
+        assert energies[4] == pytest.approx(songs.loc[4, 'Energy'])
+        assert db.session.get(Song, 500) is None
+
+        # Nothing left to write on a second run
+        written.clear()
+        assert update.update_existing_songs(csv_path=str(tmp_path / 'changed.csv')) == 0
+        assert written == []
@@ -0,0 +1,100 @@
+import pytest
+
+from backend.api.extensions import recommendation_cache
+from backend.api.routes.songs import MAX_BATCH_SEEDS
+from backend.api.services.song_service import RecommendationService
+
+BATCH_URL = '/api/songs/recommendations/batch'
+
+
+def enable_cache(app):
+    app.config['RECOMMENDATION_CACHE_SIZE'] = 64
+    recommendation_cache.init_app(app)
+
+
+def fail_if_called(*args, **kwargs):
+    raise AssertionError('Recommendations were recomputed instead of served from the cache')
+
+
+def test_single_seed_recommendations(indexed_app):
+    response = indexed_app.test_client().get('/api/songs/3/recommendations?tempo_tolerance=30&limit=10')
+
+    assert response.status_code == 200
+    recommendations = response.get_json()
+    assert 0 < len(recommendations) <= 10
+    assert 3 not in {song['songId'] for song in recommendations}
+    similarities = [song['similarity'] for song in recommendations]
+    assert similarities == sorted(similarities, reverse=True)
+    assert {song['compatibilityType'] for song in recommendations} <= {'harmonic', 'parallel'}
+
+
+@pytest.mark.parametrize('url, status', [
+    ('/api/songs/999999/recommendations', 404),
+    ('/api/songs/3/recommendations?limit=0', 400),
+    ('/api/songs/3/recommendations?tempo_tolerance=-1', 400),
+    ('/api/songs/3/recommendations?energy_weight=inf', 400),
+])
+def test_single_seed_rejects_bad_requests(indexed_app, url, status):
+    assert indexed_app.test_client().get(url).status_code == status
+
+
+def test_batch_reuses_single_seed_cache_entries(indexed_app, monkeypatch):
+    enable_cache(indexed_app)
+    client = indexed_app.test_client()
+
+    single = client.get('/api/songs/3/recommendations?energy=0.5&tempo_tolerance=30').get_json()
+    assert recommendation_cache.stats()['misses'] == 1
+
+    monkeypatch.setattr(RecommendationService, 'get_similar_songs_batch', fail_if_called)
+    body = {'seeds': [{'song_id': 3, 'energy': 0.5}], 'defaults': {'tempo_tolerance': 30}}
+    batch = client.post(BATCH_URL, json=body).get_json()
+
+    assert batch == {'results': {'3': single}, 'errors': {}}
+    assert recommendation_cache.stats()['hits'] == 1
+
+
+def test_single_seed_reuses_batch_cache_entries(indexed_app, monkeypatch):
+    enable_cache(indexed_app)
+    client = indexed_app.test_client()
+
+    batch = client.post(BATCH_URL, json={'seeds': [3, 4]}).get_json()
+    assert recommendation_cache.stats()['misses'] == 2
+
+    monkeypatch.setattr(RecommendationService, 'get_similar_songs', fail_if_called)
+    for seed_id in (3, 4):
+        single = client.get(f"/api/songs/{seed_id}/recommendations").get_json()
+        assert single == batch['results'][str(seed_id)]
+    assert recommendation_cache.stats()['hits'] == 2
+
+
+def test_batch_reports_unknown_seeds_per_seed(indexed_app):
+    response = indexed_app.test_client().post(BATCH_URL, json={'seeds': [3, 999999, {'song_id': 4, 'limit': 5}]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert set(body['results']) == {'3', '4'}
+    assert len(body['results']['4']) <= 5
+    assert set(body['errors']) == {'999999'}
+    assert 'not found' in body['errors']['999999']
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'seeds': [False]}, 'song ID'),
+    ({'seeds': [{'song_id': True}]}, 'song ID'),
+    ({'seeds': [3, 3]}, 'Duplicate seed'),
+    ({'seeds': [3, {'song_id': 3, 'limit': 5}]}, 'Duplicate seed'),
+    ({'seeds': list(range(MAX_BATCH_SEEDS + 1))}, f"At most {MAX_BATCH_SEEDS} seeds"),
+])
+def test_batch_rejects_bad_seeds_before_searching(indexed_app, monkeypatch, body, error):
+    monkeypatch.setattr(RecommendationService, 'get_similar_songs_batch', fail_if_called)
+
+    response = indexed_app.test_client().post(BATCH_URL, json=body)
+    assert response.status_code == 400
+    assert error in response.get_json()['error']
+
+
+def test_largest_batch_is_served(indexed_app):
+    response = indexed_app.test_client().post(BATCH_URL, json={'seeds': list(range(MAX_BATCH_SEEDS))})
+
+    assert response.status_code == 200
+    assert len(response.get_json()['results']) == MAX_BATCH_SEEDS
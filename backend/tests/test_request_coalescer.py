@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.api.services.request_coalescer import RequestCoalescer
+from backend.api.services.song_service import RecommendationService
+
+
+def call_concurrently(fn, items):
+    """Call fn on every item from its own thread, all at once; returns each result or raised exception"""
+    barrier = threading.Barrier(len(items))
+
+    def call(item):
+        barrier.wait()
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(len(items)) as pool:
+        return list(pool.map(call, items))
+
+
+class RecordingBatch:
+    """Batch function that records the batches it ran"""
+
+    def __init__(self, fn=lambda item: item * 10):
+        self.fn = fn
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return [self.fn(item) for item in items]
+
+
+def test_each_caller_gets_its_own_result():
+    batch_fn = RecordingBatch()
+    results = call_concurrently(RequestCoalescer(batch_fn, window=0.05, max_batch=8).submit, list(range(20)))
+
+    assert results == [i * 10 for i in range(20)]
+    assert sorted(item for batch in batch_fn.batches for item in batch) == list(range(20))
+    assert all(len(batch) <= 8 for batch in batch_fn.batches)
+    assert len(batch_fn.batches) < 20
+
+
+def test_an_exception_result_fails_only_its_caller():
+    batch_fn = RecordingBatch(lambda item: ValueError(f"bad {item}") if item == 3 else item)
+    results = call_concurrently(RequestCoalescer(batch_fn, window=1.0, max_batch=6).submit, list(range(6)))
+
+    assert len(batch_fn.batches) == 1
+    assert isinstance(results[3], ValueError) and str(results[3]) == 'bad 3'
+    assert results[:3] + results[4:] == [0, 1, 2, 4, 5]
+
+
+def test_a_failing_batch_fails_its_callers():
+    def batch_fn(items):
+        raise RuntimeError('search failed')
+
+    results = call_concurrently(RequestCoalescer(batch_fn, window=1.0, max_batch=3).submit, [1, 2, 3])
+    assert [str(result) for result in results] == ['search failed'] * 3
+
+
+def test_a_full_batch_runs_without_waiting_out_the_window():
+    batch_fn = RecordingBatch()
+    coalescer = RequestCoalescer(batch_fn, window=30.0, max_batch=4)
+
+    started = time.monotonic()
+    assert call_concurrently(coalescer.submit, [1, 2, 3, 4]) == [10, 20, 30, 40]
+    assert time.monotonic() - started < 10
+    assert [sorted(batch) for batch in batch_fn.batches] == [[1, 2, 3, 4]]
+
+
+def test_a_lone_call_waits_out_the_window_then_a_new_batch_opens():
+    batch_fn = RecordingBatch()
+    coalescer = RequestCoalescer(batch_fn, window=0.05, max_batch=32)
+
+    started = time.monotonic()
+    assert coalescer.submit(1) == 10
+    assert time.monotonic() - started >= 0.05
+    assert coalescer.submit(2) == 20
+    assert batch_fn.batches == [[1], [2]]
+
+
+SEEDS = [
+    {'base_song_id': 3, 'limit': 10},
+    {'base_song_id': 4, 'limit': 20, 'tempo_tolerance': 30.0},
+    {'base_song_id': 999999, 'limit': 10},
+    {'base_song_id': 5, 'limit': 10, 'energy': 0.9, 'extended_mixing': True},
+    {'base_song_id': 6, 'limit': 10, 'weights': {'energy': 3.0}},
+    {'base_song_id': 3, 'limit': 5, 'start_year': 1990, 'end_year': 2010},
+]
+
+
+@pytest.fixture
+def coalescing_app(indexed_app):
+    """indexed_app whose single-seed searches are coalesced into batches of SEEDS"""
+    indexed_app.config.update(RECOMMENDATION_COALESCE_WINDOW_MS=30000, RECOMMENDATION_COALESCE_MAX_BATCH=len(SEEDS))
+    yield indexed_app
+    RecommendationService._coalescer = None
+
+
+def test_coalesced_searches_match_direct_calls(coalescing_app, monkeypatch):
+    expected = []
+    for seed in SEEDS:
+        try:
+            expected.append(RecommendationService.get_similar_songs(**seed))
+        except ValueError as e:
+            expected.append(str(e))
+
+    RecommendationService.init_app(coalescing_app)
+    batches = []
+    search_coalesced = RecommendationService._search_coalesced
+    monkeypatch.setattr(RecommendationService._coalescer, 'batch_fn',
+                        lambda seeds: batches.append(len(seeds)) or search_coalesced(seeds))
+
+    results = call_concurrently(lambda seed: RecommendationService.get_similar_songs(**seed), SEEDS)
+
+    assert batches == [len(SEEDS)]
+    for seed, result, direct in zip(SEEDS, results, expected):
+        if seed['base_song_id'] == 999999:
+            assert isinstance(result, ValueError) and str(result) == direct
+        else:
+            assert result == direct
+
+
+def test_concurrent_first_calls_load_the_assets_once(indexed_app, monkeypatch):
+    read_assets = RecommendationService._read_assets
+    calls = []
+
+    def slow_read_assets():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return read_assets()
+
+    monkeypatch.setattr(RecommendationService, '_read_assets', slow_read_assets)
+    snapshots = call_concurrently(lambda _: RecommendationService._load_assets(), list(range(8)))
+
+    assert len(calls) == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert RecommendationService.get_assets() is snapshots[0]
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import func, select
+
+from backend.api.database.models import CamelotKey, Song
+from backend.api.extensions import db
+from backend.scripts.operations.data_files import write_table
+from backend.scripts.operations.pre_process import PROCESSED_DTYPES
+from backend.scripts.operations.seed import seed_database, seed_songs_from_csv
+
+
+def stored_songs():
+    rows = db.session.execute(select(Song.song_id, Song.title, Song.artist, Song.energy).order_by(Song.song_id))
+    return [tuple(row) for row in rows]
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_seed_stores_every_column(app, tmp_path, make_songs, suffix):
+    songs = make_songs(50)
+    path = tmp_path / f"songs{suffix}"
+    write_table(songs, path, dtypes=PROCESSED_DTYPES)
+
+    with app.app_context():
+        assert seed_database(csv_path=str(path)) == 50
+        assert db.session.execute(select(func.count()).select_from(CamelotKey)).scalar_one() == 24
+
+        song = db.session.get(Song, 7)
+        expected = songs.iloc[7]
+        assert (song.title, song.artist, song.genre) == (expected['Track'], expected['Artist'], expected['Genre'])
+        assert (song.year, song.duration, song.camelot_key_id) == (
+            expected['Year'], expected['Duration'], expected['Camelot_Key'])
+        assert song.energy == pytest.approx(expected['Energy'])
+        assert song.loudness_dB == pytest.approx(expected['Loudness_dB'])
+        assert song.updated_at is not None
+
+
+def test_duplicate_artist_track_pairs_keep_the_first_across_chunks(app, tmp_path, make_songs):
+    songs = make_songs(30)
+    # Rows 25-29 repeat the (Artist, Track) of rows 0-4 under new song IDs
+    songs.loc[25:, ['Artist', 'Track']] = songs.loc[:4, ['Artist', 'Track']].to_numpy()
+    path = tmp_path / 'songs.csv'
+    songs.to_csv(path, index=False)
+
+    with app.app_context():
+        assert seed_songs_from_csv(path, chunk_size=7) == 25
+        assert [song_id for song_id, *_ in stored_songs()] == list(range(25))
+
+
+def test_reseeding_without_refresh_skips_existing_songs(app, tmp_path, make_songs):
+    first = tmp_path / 'first.csv'
+    make_songs(20).to_csv(first, index=False)
+    # Overlaps song IDs 10-19 (with other values) and adds 20-29
+    second = tmp_path / 'second.csv'
+    make_songs(20, first_song_id=10, seed=1).assign(Track=lambda df: 'New ' + df['Track']).to_csv(second, index=False)
+
+    with app.app_context():
+        seed_database(csv_path=str(first))
+        before = stored_songs()
+
+        assert seed_database(csv_path=str(second), refresh=False) == 10
+        after = stored_songs()
+        assert after[:20] == before
+        assert [title for _, title, _, _ in after[20:]] == [f"New Track {i}" for i in range(20, 30)]
+
+
+def test_text_columns_stay_strings(app, tmp_path, make_songs):
+    songs = make_songs(5).assign(Track=['1999', '2000', '007', '1e3', 'Song'])
+    path = tmp_path / 'songs.csv'
+    songs.to_csv(path, index=False)
+
+    with app.app_context():
+        seed_database(csv_path=str(path))
+        assert [title for _, title, _, _ in stored_songs()] == ['1999', '2000', '007', '1e3', 'Song']
@@ -0,0 +1,77 @@
+import json
+import logging
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from backend.api.services.song_service import SongService
+from backend.tests.conftest import CATALOG_SIZE
+
+
+def test_keyset_pages_cover_the_catalog_once(seeded_app):
+    client = seeded_app.test_client()
+
+    song_ids, url = [], '/api/songs/?limit=64'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        page = response.get_json()
+        song_ids += [song['songId'] for song in page]
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is not None:
+            assert cursor == str(page[-1]['songId'])
+        url = f"/api/songs/?limit=64&after={cursor}" if cursor else None
+
+    assert song_ids == list(range(CATALOG_SIZE))
+
+
+def test_short_page_has_no_cursor(seeded_app):
+    response = seeded_app.test_client().get(f"/api/songs/?limit=50&after={CATALOG_SIZE - 11}")
+
+    assert [song['songId'] for song in response.get_json()] == list(range(CATALOG_SIZE - 10, CATALOG_SIZE))
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_ndjson_streams_the_same_songs(seeded_app):
+    client = seeded_app.test_client()
+    listed = client.get(f"/api/songs/?limit={CATALOG_SIZE}").get_json()
+
+    response = client.get('/api/songs/?format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == listed
+
+    page = client.get('/api/songs/?format=ndjson&after=99&limit=3').get_data(as_text=True).splitlines()
+    assert [json.loads(line)['songId'] for line in page] == [100, 101, 102]
+
+
+@pytest.mark.parametrize('query, error', [
+    ('after=abc', "'after' must be an integer"),
+    ('after=1.5', "'after' must be an integer"),
+    ('limit=ten', "'limit' must be an integer"),
+    ('limit=0', "'limit' must be at least 1"),
+    ('limit=-3', "'limit' must be at least 1"),
+])
+@pytest.mark.parametrize('output_format', ['json', 'ndjson'])
+def test_malformed_paging_parameters_are_rejected(seeded_app, query, error, output_format):
+    response = seeded_app.test_client().get(f"/api/songs/?format={output_format}&{query}")
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+
+
+def test_database_error_mid_stream_ends_with_an_error_line(seeded_app, monkeypatch, caplog):
+    with seeded_app.app_context():
+        rows = SongService.get_songs(limit=2)
+
+    def failing_iter_songs(after=None, limit=None):
+        yield from rows
+        raise OperationalError('SELECT ...', {}, Exception('connection lost'))
+
+    monkeypatch.setattr(SongService, 'iter_songs', failing_iter_songs)
+    with caplog.at_level(logging.ERROR):
+        response = seeded_app.test_client().get('/api/songs/?format=ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert [song['songId'] for song in lines[:2]] == [0, 1]
+    assert lines[2:] == [{'error': 'Database error'}]
+    assert 'Database error streaming songs' in caplog.text
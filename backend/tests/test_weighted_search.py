@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from backend.api.services.catalog_service import SongCatalog, build_row_lookup
+from backend.api.services.index_factory import create_index, create_weighted_index, weighted_query
+from backend.api.services.song_service import RecommendationAssets, RecommendationService
+
+DIMENSION = 8
+
+
+@pytest.fixture(scope='module')
+def vectors():
+    # Multiples of 1/4 make ties common, and keep the distances exact in float32
+    rng = np.random.default_rng(5)
+    return (np.round(rng.standard_normal((4000, DIMENSION)) * 4) / 4).astype(np.float32)
+
+
+@pytest.fixture(scope='module')
+def assets(vectors):
+    song_ids = np.arange(len(vectors), dtype=np.int64)
+    catalog = SongCatalog(song_ids, build_row_lookup(song_ids), SongCatalog._empty_columns(len(vectors)), 'test')
+    index, _ = create_index(vectors, 'flat')
+    return RecommendationAssets(index, song_ids, {}, catalog, vectors=vectors)
+
+
+def weighted_distances(vectors, query, weights):
+    diff = vectors.astype(np.float64) - query
+    return (diff * diff) @ weights
+
+
+def test_inner_product_identity(vectors):
+    """offset - [x, x^2].[2wq, -w] is the weighted squared distance sum(w (x - q)^2)"""
+    rng = np.random.default_rng(6)
+    index = create_weighted_index(vectors)
+    for _ in range(5):
+        query = rng.standard_normal(DIMENSION).astype(np.float32)
+        weights = rng.uniform(0, 3, DIMENSION).astype(np.float32)
+
+        augmented, offset = weighted_query(query, weights)
+        scores, rows = index.search(augmented, len(vectors))
+
+        distances = np.empty(len(vectors))
+        distances[rows[0]] = offset - scores[0]
+        np.testing.assert_allclose(distances, weighted_distances(vectors, query, weights), atol=1e-3)
+
+
+def test_unit_weights_match_plain_l2(vectors):
+    query = vectors[17]
+    augmented, offset = weighted_query(query, np.ones(DIMENSION, dtype=np.float32))
+    scores, rows = create_weighted_index(vectors).search(augmented, 10)
+
+    expected = weighted_distances(vectors, query, np.ones(DIMENSION))
+    np.testing.assert_allclose(offset - scores[0], expected[rows[0]], atol=1e-4)
+    assert rows[0, 0] == 17
+
+
+@pytest.mark.parametrize('engine', ['faiss', 'numpy'])
+def test_weighted_search_matches_brute_force(monkeypatch, vectors, assets, engine):
+    monkeypatch.setattr(RecommendationService, '_engine', engine)
+    rng = np.random.default_rng(7)
+    for row in rng.choice(len(vectors), 40, replace=False):
+        weights = rng.choice([0.0, 0.5, 1.0, 2.0, 3.0], DIMENSION).astype(np.float32)
+        weights[0] = 1.0
+        mask = rng.random(len(vectors)) < 0.5
+        query = {'vector': vectors[row].copy(), 'weights': weights}
+
+        distances, rows = RecommendationService._search_query(assets, query, mask, 20)
+
+        # Same distances in the same order; rows tied at the cut-off may differ
+        reference = weighted_distances(vectors, vectors[row], weights)
+        allowed = np.flatnonzero(mask)
+        expected = allowed[np.lexsort((allowed, reference[allowed]))[:20]]
+        assert mask[rows].all()
+        assert reference[rows].tolist() == reference[expected].tolist()
+        assert (np.lexsort((rows, reference[rows])) == np.arange(len(rows))).all()
+        np.testing.assert_allclose(distances, reference[rows], atol=1e-4)